@@ -0,0 +1,80 @@
+import time
+from threading import Lock
+from requests import Session
+from requests.adapters import HTTPAdapter
+from telebot import apihelper, asyncio_helper
+
+
+class ApiSessionStats:
+    def __init__(self, request_count: int, error_count: int, in_flight_count: int, total_time: float,
+                 connection_count: int, idle_connection_count: int):
+        self.request_count = request_count
+        self.error_count = error_count
+        self.in_flight_count = in_flight_count
+        self.total_time = total_time
+        self.connection_count = connection_count    # Connections opened since start
+        self.idle_connection_count = idle_connection_count    # Kept alive in the pool
+
+    @property
+    def average_latency(self) -> float:
+        return self.total_time / self.request_count if self.request_count else 0
+
+
+class PooledApiSession:
+    """
+    Shared keep-alive HTTP session sending all TeleBot requests.
+    Up to [pool_size] connections are kept open, requests beyond the pool size wait for a free connection.
+    """
+
+    def __init__(self, pool_size: int, connect_timeout: float, read_timeout: float):
+        self._pool_size = pool_size
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self._session = Session()
+        for prefix in ('http://', 'https://'):
+            self._session.mount(prefix, self._adapter)
+        self._stats_lock = Lock()
+        self._request_count = 0
+        self._error_count = 0
+        self._in_flight_count = 0
+        self._total_time = 0
+
+    @property
+    def stats(self) -> ApiSessionStats:
+        connection_count, idle_connection_count = 0, 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            connection_count += pool.num_connections
+            idle_connection_count += sum(1 for connection in list(pool.pool.queue) if connection is not None)
+        with self._stats_lock:
+            return ApiSessionStats(self._request_count, self._error_count, self._in_flight_count, self._total_time,
+                                   connection_count, idle_connection_count)
+
+    def install(self):    # Used by TeleBot for every request
+        apihelper.CUSTOM_REQUEST_SENDER = self.send
+
+    def install_async(self):    # AsyncTeleBot keeps its own aiohttp session limited the same way
+        asyncio_helper.REQUEST_LIMIT = self._pool_size
+        asyncio_helper.REQUEST_TIMEOUT = self._connect_timeout + self._read_timeout
+
+    def send(self, method: str, url: str, params=None, files=None, timeout=None, proxies=None):
+        if not url.endswith('/getUpdates'):    # Long polling keeps its own timeout
+            timeout = (self._connect_timeout, self._read_timeout)
+        with self._stats_lock:
+            self._in_flight_count += 1
+        start_time = time.monotonic()
+        failed = True
+        try:
+            response = self._session.request(method, url, params=params, files=files,
+                                             timeout=timeout, proxies=proxies)
+            failed = False
+            return response
+        finally:
+            with self._stats_lock:
+                self._in_flight_count -= 1
+                self._request_count += 1
+                self._total_time += time.monotonic() - start_time
+                if failed:
+                    self._error_count += 1
@@ -0,0 +1,57 @@
+"""
+Latency and throughput of TeleBot requests sent by concurrent workers to the fake Bot API of the tests:
+telebot's default per-thread sessions, a new connection per request and the shared PooledApiSession.
+Usage: python benchmarks/api_session.py [worker_count] [request_count]
+"""
+
+import sys
+import time
+from threading import Thread
+
+import common
+from telebot import TeleBot, apihelper
+
+from api_session import PooledApiSession
+from fake_api import FakeApi
+
+
+def send_requests(bot: TeleBot, chat_id: int, request_count: int, latencies: list):
+    for index in range(request_count):
+        start_time = time.perf_counter()
+        bot.edit_message_text(f'Move {index}', chat_id, 10)
+        latencies.append(1000 * (time.perf_counter() - start_time))
+
+
+def run(name: str, worker_count: int, request_count: int, api_session: PooledApiSession = None):
+    api = FakeApi()
+    apihelper.API_URL = api.url
+    bot = TeleBot('1:token')
+    send_requests(bot, 1, 10, [])    # Warms up
+    latencies = []
+    threads = [Thread(target=send_requests, args=(bot, chat_id, request_count, latencies))
+               for chat_id in range(worker_count)]
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    total_time = time.perf_counter() - start_time
+    api.close()
+    print(name)
+    common.report('  throughput', len(latencies) / total_time, 'requests/s')
+    common.report('  latency p50', common.get_percentile(latencies, 50), 'ms')
+    common.report('  latency p99', common.get_percentile(latencies, 99), 'ms')
+    if api_session is not None:
+        common.report('  connections opened', api_session.stats.connection_count, '')
+
+
+if __name__ == '__main__':
+    worker_count = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    request_count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    run('default per-thread sessions', worker_count, request_count)
+    apihelper.SESSION_TIME_TO_LIVE = 0
+    run('new connection per request', worker_count, request_count)
+    apihelper.SESSION_TIME_TO_LIVE = None
+    session = PooledApiSession(worker_count, 5, 15)
+    session.install()
+    run('pooled session', worker_count, request_count, session)
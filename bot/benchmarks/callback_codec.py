@@ -0,0 +1,54 @@
+"""
+Encoding and decoding cost and payload size of game callback data:
+registered compact schemas against the previous 'source:key=value' f-strings and parser.
+The previous decoding includes the int() conversions done by the handlers.
+Usage: python benchmarks/callback_codec.py [call_count]
+"""
+
+import sys
+
+import common
+from call import Call, CallSchemas
+from game import Game
+
+LEGACY_GAME_ID = 'x' * 25    # Game ids were 25 characters long
+
+
+def legacy_decode(data: str, int_keys: tuple) -> dict:
+    source_name, arg_str = data.split(':')
+    args = dict()
+    for item in arg_str.split(','):
+        if not item.count('='):
+            continue
+        key, value = item.split('=')
+        args[key] = value
+    for key in int_keys:
+        args[key] = int(args[key])
+    return args
+
+
+def get_cases(game_id: str) -> list:    # Tuples of (name, compact encode, legacy encode, int keys)
+    return [('Halma click', lambda: CallSchemas.HALMA_CLICK.encode(game_id, 1, 3, 4),
+             lambda: f'game:action=click,game-id={LEGACY_GAME_ID},p={1},a={3},b={4}', ('p', 'a', 'b')),
+            ('Memory click', lambda: CallSchemas.MEMORY_CLICK.encode(game_id, 2, 5),
+             lambda: f'game:action=click,game-id={LEGACY_GAME_ID},a={2},b={5}', ('a', 'b')),
+            ('end turn', lambda: CallSchemas.END_TURN.encode(game_id, 1),
+             lambda: f'game:action=end-turn,game-id={LEGACY_GAME_ID},p={1}', ('p',))]
+
+
+if __name__ == '__main__':
+    call_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for name, encode, legacy_encode, int_keys in get_cases(Game._random_uid()):
+        data, legacy_data = encode(), legacy_encode()
+        assert Call.decode(legacy_data)[1] == dict(legacy_decode(legacy_data, int_keys),
+                                                   **{'game-id': LEGACY_GAME_ID}), 'Legacy data decodes differently'
+        print(name)
+        common.report('  compact size', len(data.encode()), 'bytes')
+        common.report('  previous size', len(legacy_data.encode()), 'bytes')
+        common.report('  compact encode', 1e6 * common.measure(encode, call_count), 'us')
+        common.report('  previous encode', 1e6 * common.measure(legacy_encode, call_count), 'us')
+        common.report('  compact decode', 1e6 * common.measure(lambda: Call.decode(data), call_count), 'us')
+        common.report('  previous decode', 1e6 * common.measure(lambda: legacy_decode(legacy_data, int_keys),
+                                                                 call_count), 'us')
+        common.report('  previous format by Call.decode', 1e6 * common.measure(lambda: Call.decode(legacy_data),
+                                                                                 call_count), 'us')
@@ -0,0 +1,32 @@
+import os
+import sys
+import time
+
+BOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BOT_DIRECTORY)    # Modules of the bot are imported as top-level ones, like by main.py
+sys.path.insert(1, os.path.join(BOT_DIRECTORY, 'tests'))    # The fake Bot API of the tests is shared
+os.environ.setdefault('DATA_DIRECTORY', os.path.join(BOT_DIRECTORY, 'data'))
+
+from utils.logger import Logger, StaticLogger
+
+StaticLogger.logger = Logger()
+
+
+def measure(action, count: int, rounds: int = 5) -> float:    # Best average time of an [action] call in seconds
+    best_time = None
+    for _ in range(rounds):
+        start_time = time.perf_counter()
+        for _ in range(count):
+            action()
+        round_time = (time.perf_counter() - start_time) / count
+        best_time = round_time if best_time is None else min(best_time, round_time)
+    return best_time
+
+
+def get_percentile(values: list, percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * percent / 100), len(ordered) - 1)]
+
+
+def report(name: str, value: float, unit: str):
+    print(f'{name:<48} {value:>12.2f} {unit}')
@@ -0,0 +1,68 @@
+"""
+API calls per game and latency of the final visible state of fast Memory games with edit coalescing.
+Every chat edits its game message after each move, a move every 50-250 ms.
+Edits are sent to the fake Bot API of the tests under the Telegram rate limits (30/s, 1/s per chat, burst 3).
+The baseline queues every edit to the dispatcher without a key, as before coalescing.
+Usage: python benchmarks/edit_coalescing.py [chat_count] [move_count]
+"""
+
+import sys
+import time
+import random
+from threading import Thread
+
+import common
+from telebot import TeleBot, apihelper
+from telebot.types import Message
+
+from chat_bot import ChatBot
+from outbound_dispatcher import OutboundDispatcher, Priority
+from fake_api import FakeApi, create_message_update
+
+WINDOWS = [None, 0, 0.2, 0.5]    # In seconds, 0 coalesces only queued edits, None is the baseline
+
+
+def play(chat_bot: ChatBot, chat_id: int, move_count: int, final_times: dict, uses_baseline: bool):
+    rng = random.Random(chat_id)
+    message = Message.de_json(create_message_update(chat_id, '', 10)['message'])
+    for move in range(move_count):
+        time.sleep(rng.uniform(0.05, 0.25))
+        message.text = f'Move {move}'
+        final_times[chat_id] = time.monotonic()
+        if uses_baseline:
+            chat_bot._dispatcher.submit(chat_id, lambda text=message.text: chat_bot._bot.edit_message_text(
+                text, chat_id, 10), Priority.GAME)
+        else:
+            chat_bot.update_message(message, Priority.GAME)
+
+
+def run(window: float, chat_count: int, move_count: int):
+    api = FakeApi()
+    apihelper.API_URL = api.url
+    dispatcher = OutboundDispatcher(8, 30, 1, 3)
+    chat_bot = ChatBot(TeleBot('1:token'), dispatcher, window or 0)
+    final_times = dict()    # Dict: [int chat_id] = float time of the last edit
+    threads = [Thread(target=play, args=(chat_bot, chat_id, move_count, final_times, window is None))
+               for chat_id in range(1, chat_count + 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    chat_bot.flush()
+    calls = api.get_calls('editMessageText')
+    api.close()
+    final_text = f'Move {move_count - 1}'
+    latencies = [1000 * (call_time - final_times[int(params['chat_id'])])
+                 for call_time, params in calls if params['text'] == final_text]
+    assert len(latencies) == chat_count, 'A final state is lost'
+    print('baseline' if window is None else f'window {window} s')
+    common.report('  API calls per game', len(calls) / chat_count, f'of {move_count} moves')
+    common.report('  final state latency p50', common.get_percentile(latencies, 50), 'ms')
+    common.report('  final state latency p99', common.get_percentile(latencies, 99), 'ms')
+
+
+if __name__ == '__main__':
+    chat_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    move_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    for window in WINDOWS:
+        run(window, chat_count, move_count)
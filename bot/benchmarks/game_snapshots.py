@@ -0,0 +1,53 @@
+"""
+Size, save and restore time of a snapshot of active games, half Memory 4x5 and half Halma with a few moves made.
+The snapshot file is written to a temporary directory.
+Usage: python benchmarks/game_snapshots.py [game_count]
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+import common
+from game import Game
+from game_models.memory import MemoryModel
+from game_models.halma import HalmaModel
+from game_snapshots import GameSnapshots
+from player import Player
+
+
+def create_games(game_count: int) -> list:
+    games = []
+    for index in range(game_count):
+        if index % 2:
+            game = Game(HalmaModel(60), [Player(2 * index, 'en'), Player(2 * index + 1, 'ru')])
+            game.model.try_click(0, 5, 7)
+            game.model.try_click(0, 4, 6)
+        else:
+            game = Game(MemoryModel(4, 5, 10), [Player(2 * index, 'en')])
+            game.model.try_select(0, 0)
+        for player_index, player in enumerate(game.players):
+            game.messages[player_index]['main'] = GameSnapshots._create_message(player.user_id, 100 + index)
+        games.append(game)
+    return games
+
+
+if __name__ == '__main__':
+    game_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    games = create_games(game_count)
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'games.snapshot')
+        start_time = time.perf_counter()
+        GameSnapshots.save(file_path, games)
+        save_time = time.perf_counter() - start_time
+        size = os.path.getsize(file_path)
+        start_time = time.perf_counter()
+        restored_games = GameSnapshots.load(file_path, lambda user_id, lang: Player(user_id, lang))
+        load_time = time.perf_counter() - start_time
+    assert [(game.uid, game.model.get_snapshot()) for game in restored_games] == \
+           [(game.uid, game.model.get_snapshot()) for game in games], 'Restored games differ'
+    print(f'{game_count} games')
+    common.report('  snapshot size', size / 1024, 'KiB')
+    common.report('  save', 1000 * save_time, 'ms')
+    common.report('  restore', 1000 * load_time, 'ms')
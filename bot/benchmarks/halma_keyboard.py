@@ -0,0 +1,68 @@
+"""
+Render and serialization cost of both perspectives of a Halma move:
+HalmaMain with the per-game KeyboardTemplate against a MarkupScheme of 64 ButtonSchemes built on every render.
+Usage: python benchmarks/halma_keyboard.py [render_count]
+"""
+
+import sys
+import tracemalloc
+
+import common
+from data import content
+from game import Game
+from game_models.halma import HalmaModel
+from game_models.models_enum import GameModels
+from message_schemes.game_schemes import HalmaMain
+from message_schemes.message_scheme import MarkupScheme, ButtonScheme
+from call import CallSchemas
+from player import Player
+
+
+def render_template(game: Game) -> list:
+    return [HalmaMain(game, player_index).get_inline_markup().to_json() for player_index in (0, 1)]
+
+
+def render_markup_scheme(game: Game) -> list:    # Like HalmaMain before the templates
+    emoji = content.emoji['game'][GameModels.HALMA.key]
+    piece_emoji = ((emoji['player-piece'], emoji['player-selected-piece']),
+                   (emoji['opponent-piece'], emoji['opponent-selected-piece']))
+    markups = []
+    for player_index in (0, 1):
+        board = game.model.get_board(player_index)
+        markup = MarkupScheme()
+        for i in range(8):
+            for j in range(8):
+                square = board[i, j]
+                if square.is_empty:
+                    label = emoji['move-target'] if square.is_move_target else ' '
+                else:
+                    label = piece_emoji[square.color][square.is_selected]
+                a, b = ((i, j), (7 - i, 7 - j))[player_index]
+                markup.add(ButtonScheme(label, CallSchemas.HALMA_CLICK.encode(game.uid, player_index, a, b)))
+        if game.model.can_end_turn(player_index):
+            text = content.get_text(game.players[player_index].lang, 'game', 'halma', 'end-turn')
+            markup.row(ButtonScheme(text, CallSchemas.END_TURN.encode(game.uid, player_index)))
+        markups.append(markup.to_inline_markup().to_json())
+    return markups
+
+
+def get_peak_memory(render, game: Game) -> int:    # Peak of memory allocated by a render in bytes
+    tracemalloc.start()
+    render(game)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+if __name__ == '__main__':
+    render_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    game = Game(HalmaModel(), [Player(1), Player(2)])
+    game.model.try_click(0, 5, 7)    # Moves a piece one step and selects another one
+    game.model.try_click(0, 4, 6)
+    game.model.try_click(1, 2, 0)
+    assert render_template(game) == render_markup_scheme(game), 'Keyboards differ'
+    for name, render in (('MarkupScheme', render_markup_scheme), ('KeyboardTemplate', render_template)):
+        print(name)
+        render(game)    # Builds the templates of the game
+        common.report('  render of both perspectives', 1e6 * common.measure(lambda: render(game), render_count), 'us')
+        common.report('  peak memory of a render', get_peak_memory(render, game) / 1024, 'KiB')
@@ -0,0 +1,37 @@
+"""
+Nodes per second, think time and completed depth of the Halma bot search for every bot level.
+Positions are taken from a game the normal level plays against itself.
+Usage: python benchmarks/halma_search.py [position_count]
+"""
+
+import sys
+
+import common
+from data import content
+from game_models.halma import HalmaModel
+from game_models.halma_search import search_move
+from game_models.models_enum import GameModels
+
+
+def get_positions(position_count: int) -> list:    # Tuples of (masks, player_index)
+    model, positions = HalmaModel(), []
+    while len(positions) < position_count and not model.is_ended:
+        positions.append((model.get_masks(), model.turn))
+        result = search_move(2, 1, 0.2, model.get_masks(), model.turn)
+        model.try_move(model.turn, result.move)
+    return positions
+
+
+if __name__ == '__main__':
+    position_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    positions = get_positions(position_count)
+    levels = content.game_setup[GameModels.HALMA.key]['bot-levels']
+    for name, level in levels.items():
+        results = [search_move(level['depth'], level['time'], level['random-move-rate'], masks, player_index)
+                   for masks, player_index in positions]
+        node_count = sum(result.node_count for result in results)
+        think_time = sum(result.think_time for result in results)
+        print(f"{name} (depth {level['depth']}, {level['time']} s)")
+        common.report('  nodes per second', node_count / think_time, '')
+        common.report('  average think time', 1000 * think_time / len(results), 'ms')
+        common.report('  average completed depth', sum(result.depth for result in results) / len(results), '')
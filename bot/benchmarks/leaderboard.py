@@ -0,0 +1,53 @@
+"""
+Leaderboard queries of ResultsStore with millions of Halma ratings: top entries with the rank of a player,
+against a COUNT scan for the same rank, and the write path of results through the leaderboard update.
+The database is created in a temporary directory.
+Usage: python benchmarks/leaderboard.py [player_count]
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+
+import common
+from data.results_store import ResultsStore
+
+BOARD = ResultsStore.HALMA_KEY
+
+
+def fill(store: ResultsStore, player_count: int, rng: random.Random):    # Ratings are normal (1500, sd 300)
+    with store._connection as connection:
+        connection.executemany('INSERT INTO leaderboard (board, user_id, score) VALUES (?, ?, ?)',
+                               ((BOARD, user_id, max(rng.gauss(1500, 300), 0)) for user_id in range(player_count)))
+        connection.execute('INSERT INTO score_counts (board, bucket, count) SELECT board, CAST(score AS INTEGER), '
+                           'COUNT(*) FROM leaderboard GROUP BY board, CAST(score AS INTEGER)')
+
+
+def count_rank(store: ResultsStore, user_id: int) -> int:    # Without the score counts
+    return store._connection.execute('SELECT COUNT(*) + 1 FROM leaderboard WHERE board = ? AND score > '
+                                     '(SELECT score FROM leaderboard WHERE board = ? AND user_id = ?)',
+                                     (BOARD, BOARD, user_id)).fetchone()[0]
+
+
+if __name__ == '__main__':
+    player_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultsStore(os.path.join(directory, 'results.db'), 3600)
+        fill(store, player_count, rng)
+        user_ids = [rng.randrange(player_count) for _ in range(200)]
+        for user_id in user_ids[:20]:
+            assert store.get_leaderboard(BOARD, user_id, 10).rank == count_rank(store, user_id), 'Ranks differ'
+        print(f'{player_count} Halma ratings')
+        common.report('  top 10 and rank', 1000 * common.measure(
+            lambda: [store.get_leaderboard(BOARD, user_id, 10) for user_id in user_ids], 1) / len(user_ids), 'ms')
+        common.report('  rank by a COUNT scan', 1000 * common.measure(
+            lambda: [count_rank(store, user_id) for user_id in user_ids[:20]], 1) / 20, 'ms')
+        rows = [(0, BOARD, rng.randrange(player_count), 'win', 30, rng.gauss(1500, 300)) for _ in range(100000)]
+        start_time = time.perf_counter()
+        store._add_pending(rows)
+        store._flush(store._connection)
+        common.report('  written results', len(rows) / (time.perf_counter() - start_time), 'results/s')
+        store.stop()
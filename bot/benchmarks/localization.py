@@ -0,0 +1,74 @@
+"""
+Per-render cost of MemoryMain, HalmaMain, GameMenu and of the content calls alone with the compiled localization tables
+against the previous content functions walking all_text and replacing variables one by one.
+Usage: python benchmarks/localization.py [render_count]
+"""
+
+import sys
+
+import common
+from data import content
+from game import Game
+from game_models.memory import MemoryModel
+from game_models.halma import HalmaModel
+from message_schemes.game_schemes import MemoryMain, HalmaMain
+from message_schemes.menu_schemes import GameMenu
+from player import Player
+
+
+def legacy_get_text(*args: str):
+    result = content.all_text
+    for arg in args:
+        result = result[arg]
+    return result
+
+
+def legacy_subs(text: str, **kwargs) -> str:
+    for var in kwargs.keys():
+        text = text.replace('{{' + var + '}}', str(kwargs[var]))
+    return text
+
+
+def legacy_combine(*args) -> str:
+    def is_emoji(text_value: str): return len(text_value) == 1
+    if not len(args):
+        return ''
+    args = [str(arg) for arg in args]
+    text = args[0]
+    for i in range(1, len(args)):
+        if is_emoji(args[i - 1]) or is_emoji(args[i]):
+            text = text + ' ' + args[i]
+        else:
+            text = text + '\n' + args[i]
+    return text
+
+
+def get_renders() -> dict:    # Dict: [str name] = function rendering the scheme and returning its title
+    player = Player(1)
+    memory_game = Game(MemoryModel(3, 4, 6), [player])
+    memory_game.model.try_select(0, 0)
+    halma_game = Game(HalmaModel(), [player, Player(2)])
+    return {'MemoryMain': lambda: MemoryMain(memory_game).title,
+            'HalmaMain': lambda: HalmaMain(halma_game, 0).title,
+            'GameMenu': lambda: GameMenu(player, {'game-key': 'memory'}).title,
+            'get_text, subs and combine calls': lambda: content.combine(
+                content.get_text('en', 'game', 'halma', 'end-turn'),
+                content.subs(content.get_text('en', 'game', 'memory', 'progress'), removed=4, size=12))}
+
+
+if __name__ == '__main__':
+    render_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    renders = get_renders()
+    compiled = content.get_text, content.subs, content.combine
+    titles = {name: render() for name, render in renders.items()}
+    times = dict()    # Dict: [str name] = tuple of legacy and compiled render time
+    for name, render in renders.items():
+        content.get_text, content.subs, content.combine = legacy_get_text, legacy_subs, legacy_combine
+        assert render() == titles[name], 'Titles differ'
+        legacy_time = common.measure(render, render_count)
+        content.get_text, content.subs, content.combine = compiled
+        times[name] = legacy_time, common.measure(render, render_count)
+    for name, (legacy_time, compiled_time) in times.items():
+        print(name)
+        common.report('  previous content functions', 1e6 * legacy_time, 'us')
+        common.report('  compiled tables', 1e6 * compiled_time, 'us')
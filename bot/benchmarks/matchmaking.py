@@ -0,0 +1,75 @@
+"""
+Simulation of Halma matchmaking in RatedQueue with the settings of game_setup.json.
+Players arrive at random with normally distributed ratings (1500, sd 300), the queue is updated every simulated second.
+Reports match rate, wait percentiles of matched players and CPU time per match for several arrival rates.
+Usage: python benchmarks/matchmaking.py [arrival_count]
+"""
+
+import sys
+import time
+import random
+
+import common
+from data import content
+from game_models.models_enum import GameModels
+from multiplayer_provider import RatedQueue, PlayerConnection
+from player import Player
+
+ARRIVAL_RATES = [0.05, 1, 100]    # Players per second
+
+
+class SimulatedMessage:
+    def __init__(self, message_id: int):
+        self.message_id = message_id
+
+
+class SimulatedCall:    # Only what PlayerConnection reads from a call
+    def __init__(self, chat_id: int):
+        self.chat_id = chat_id
+        self.message = SimulatedMessage(1)
+        self.args = {'game-key': GameModels.HALMA.key}
+
+
+def simulate(arrival_rate: float, arrival_count: int, rng: random.Random):
+    queue = RatedQueue(content.game_setup[GameModels.HALMA.key]['matchmaking'])
+    arrival_times = dict()    # Dict: [connection key] = float arrival time
+    waits, expired_count, match_count = [], 0, 0
+
+    def add_groups(groups: list, now: float):
+        nonlocal match_count
+        for group in groups:
+            match_count += 1
+            waits.extend(now - arrival_times[connection.key] for connection in group)
+
+    now, next_arrival, next_tick, arrived = 0, rng.expovariate(arrival_rate), 1, 0
+    cpu_start_time = time.process_time()
+    while arrived < arrival_count or len(queue):
+        if arrived < arrival_count and next_arrival < next_tick:
+            now = next_arrival
+            player = Player(arrived)
+            player.rating = rng.gauss(1500, 300)
+            connection = PlayerConnection(player, SimulatedCall(arrived))
+            arrival_times[connection.key] = now
+            group = queue.add(connection, now)
+            add_groups([group] if group else [], now)
+            arrived += 1
+            next_arrival += rng.expovariate(arrival_rate)
+        else:
+            now = next_tick
+            groups, expired = queue.update(now)
+            add_groups(groups, now)
+            expired_count += len(expired)
+            next_tick += 1
+    cpu_time = time.process_time() - cpu_start_time
+    print(f'{arrival_rate} arrivals/s')
+    common.report('  matched players', 100 * len(waits) / arrival_count, '%')
+    common.report('  expired players', 100 * expired_count / arrival_count, '%')
+    for percent in (50, 90, 99):
+        common.report(f'  wait p{percent}', common.get_percentile(waits, percent), 's')
+    common.report('  CPU time per match', 1e6 * cpu_time / match_count, 'us')
+
+
+if __name__ == '__main__':
+    arrival_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    for rate in ARRIVAL_RATES:
+        simulate(rate, arrival_count, random.Random(1))
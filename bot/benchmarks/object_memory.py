@@ -0,0 +1,36 @@
+"""
+Memory of objects created per game, per cached player and per log line, measured with tracemalloc.
+A Halma game includes its model and both players, a cached player includes its cache item.
+Usage: python benchmarks/object_memory.py [instance_count]
+"""
+
+import sys
+import tracemalloc
+
+import common
+from data.cache import CachingItem
+from game import Game
+from game_models.halma import HalmaModel
+from player import Player
+from utils.log_types import InfoLog
+
+
+def get_size(create, instance_count: int) -> float:    # Average bytes allocated per kept instance
+    instances = []
+    tracemalloc.start()
+    start_size = tracemalloc.get_traced_memory()[0]
+    for index in range(instance_count):
+        instances.append(create(index))
+    size = tracemalloc.get_traced_memory()[0] - start_size
+    tracemalloc.stop()
+    return size / instance_count
+
+
+if __name__ == '__main__':
+    instance_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    messages = [f'Player {index} connected' for index in range(instance_count)]    # Not counted in log entries
+    common.report('Halma game', get_size(lambda index: Game(HalmaModel(), [Player(2 * index),
+                                                                           Player(2 * index + 1)]),
+                                         instance_count), 'bytes')
+    common.report('cached player', get_size(lambda index: CachingItem(Player(index)), instance_count), 'bytes')
+    common.report('log entry', get_size(lambda index: InfoLog(messages[index]), instance_count), 'bytes')
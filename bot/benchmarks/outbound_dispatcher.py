@@ -0,0 +1,58 @@
+"""
+Scheduling overhead of the outbound dispatchers: requests with no-op actions spread over many chats,
+with rate limits high enough to never delay them, so only the queue and the workers are measured.
+Usage: python benchmarks/outbound_dispatcher.py [request_count] [chat_count]
+"""
+
+import sys
+import time
+import asyncio
+
+import common
+from outbound_dispatcher import OutboundQueue, OutboundRequest, OutboundDispatcher, AsyncOutboundDispatcher, Priority
+
+UNLIMITED_RATE = 1e9
+
+
+def run_queue(request_count: int, chat_count: int) -> float:    # Requests per second
+    queue = OutboundQueue(UNLIMITED_RATE, UNLIMITED_RATE, UNLIMITED_RATE)
+    start_time = time.perf_counter()
+    for index in range(request_count):
+        queue.put(OutboundRequest(index % chat_count, None, Priority(index % 2)), time.monotonic())
+    while not queue.is_empty:
+        now = time.monotonic()
+        request = queue.pop(now)
+        queue.complete(request, now)
+    return request_count / (time.perf_counter() - start_time)
+
+
+def run_threads(request_count: int, chat_count: int) -> float:
+    dispatcher = OutboundDispatcher(8, UNLIMITED_RATE, UNLIMITED_RATE, UNLIMITED_RATE)
+    start_time = time.perf_counter()
+    for index in range(request_count):
+        dispatcher.submit(index % chat_count, lambda: None)
+    dispatcher.wait_empty()
+    assert dispatcher.sent_count == request_count
+    return request_count / (time.perf_counter() - start_time)
+
+
+async def run_asyncio(request_count: int, chat_count: int) -> float:
+    async def send():
+        pass
+
+    dispatcher = AsyncOutboundDispatcher(8, UNLIMITED_RATE, UNLIMITED_RATE, UNLIMITED_RATE)
+    start_time = time.perf_counter()
+    for index in range(request_count):
+        dispatcher.submit(index % chat_count, send)
+    await dispatcher.wait_empty()
+    assert dispatcher.sent_count == request_count
+    return request_count / (time.perf_counter() - start_time)
+
+
+if __name__ == '__main__':
+    request_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    chat_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    common.report('OutboundQueue put, pop and complete', run_queue(request_count, chat_count), 'requests/s')
+    common.report('OutboundDispatcher, 8 workers', run_threads(request_count, chat_count), 'requests/s')
+    common.report('AsyncOutboundDispatcher, 8 in flight', asyncio.run(run_asyncio(request_count, chat_count)),
+                  'requests/s')
@@ -0,0 +1,47 @@
+"""
+Player cache and store: cache hit latency, read-through latency of a miss loaded from SQLite,
+save latency and write-behind throughput. The database is created in a temporary directory.
+Usage: python benchmarks/player_store.py [player_count]
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+import common
+from data.cache import Cache
+from data.player_store import PlayerStore
+from player import Player
+
+
+def get_lookup_time(cache: Cache, user_ids: range) -> float:    # Average time of a lookup in seconds
+    start_time = time.perf_counter()
+    for user_id in user_ids:
+        cache[user_id]
+    return (time.perf_counter() - start_time) / len(user_ids)
+
+
+if __name__ == '__main__':
+    player_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    user_ids = range(player_count)
+    with tempfile.TemporaryDirectory() as directory:
+        store = PlayerStore(os.path.join(directory, 'players.db'), 3600)
+        players = [Player(user_id, 'ru') for user_id in user_ids]
+        start_time = time.perf_counter()
+        for player in players:
+            store.save(player)
+        save_time = time.perf_counter() - start_time
+        store.start()
+        store.stop()    # Writes all saved rows in one transaction
+        write_time = time.perf_counter() - start_time
+        assert store.written_count == player_count
+        store = PlayerStore(os.path.join(directory, 'players.db'), 3600)
+        cache = Cache(loader=store.load)
+        common.report('save', 1e6 * save_time / player_count, 'us')
+        common.report('save and write throughput', player_count / write_time, 'rows/s')
+        common.report('cache miss read through', 1e6 * get_lookup_time(cache, user_ids), 'us')
+        common.report('cache hit', 1e6 * get_lookup_time(cache, user_ids), 'us')
+        common.report('cache miss of an unknown player', 1e6 * get_lookup_time(cache, range(-player_count, 0)), 'us')
+        assert cache[0].lang == 'ru'
+        store.stop()
@@ -0,0 +1,66 @@
+from threading import Lock
+from concurrent.futures import Future
+
+from data import content
+from utils.process_lane import ProcessLane
+from game_models.models_enum import GameModels
+from game_models.halma_search import HalmaSearchResult, search_move
+from game import Game
+
+
+class BotOpponentStats:
+    def __init__(self, move_count: int, node_count: int, think_time: float):
+        self.move_count = move_count
+        self.node_count = node_count
+        self.think_time = think_time    # Total, in seconds
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.node_count / self.think_time if self.think_time else 0
+
+    @property
+    def average_think_time(self) -> float:
+        return self.think_time / self.move_count if self.move_count else 0
+
+
+class BotOpponent:
+    """
+    Finds moves of bot players in the process lane, so searches don't slow down game processing.
+    Search settings of bot levels are taken from game setup.
+    """
+
+    def __init__(self, lane: ProcessLane):
+        self._lane = lane
+        self._stats_lock = Lock()
+        self._move_count = 0
+        self._node_count = 0
+        self._think_time = 0
+
+    @property
+    def stats(self) -> BotOpponentStats:
+        with self._stats_lock:
+            return BotOpponentStats(self._move_count, self._node_count, self._think_time)
+
+    @staticmethod
+    def get_levels(game_model: GameModels) -> dict:
+        return content.game_setup[game_model.key]['bot-levels']
+
+    def submit(self, game: Game, player_index: int) -> Future:    # Future result is HalmaMove or None
+        level = BotOpponent.get_levels(GameModels.HALMA)[game.players[player_index].level]
+        move_future = Future()
+        search_future = self._lane.submit(search_move, level['depth'], level['time'], level['random-move-rate'],
+                                          game.model.get_masks(), player_index)
+        search_future.add_done_callback(lambda done_future: self._report_searched(done_future, move_future))
+        return move_future
+
+    def _report_searched(self, search_future: Future, move_future: Future):
+        if search_future.cancelled() or search_future.exception() is not None:
+            move_future.set_exception(search_future.exception() if not search_future.cancelled()
+                                      else RuntimeError('Search is cancelled'))
+            return
+        result: HalmaSearchResult = search_future.result()
+        with self._stats_lock:
+            self._move_count += 1
+            self._node_count += result.node_count
+            self._think_time += result.think_time
+        move_future.set_result(result.move)
@@ -1,6 +1,16 @@
+from bot_opponent import BotOpponentStats
+from data.cache import CacheStats
+from api_session import ApiSessionStats
+
 
 class BotStatus:
-    def __init__(self, is_paused: bool = None, active_game_count: int = None, log_count: int = None):
+    def __init__(self, is_paused: bool = None, active_game_count: int = None, log_count: int = None,
+                 skipped_edit_count: int = None, bot_opponent_stats: BotOpponentStats = None,
+                 player_cache_stats: CacheStats = None, api_session_stats: ApiSessionStats = None):
         self.is_paused = is_paused
         self.active_game_count = active_game_count
         self.log_count = log_count
+        self.skipped_edit_count = skipped_edit_count
+        self.bot_opponent_stats = bot_opponent_stats
+        self.player_cache_stats = player_cache_stats
+        self.api_session_stats = api_session_stats
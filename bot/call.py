@@ -10,17 +10,127 @@ class CallSources(Enum):
     ADMIN = 'admin'
 
 
+class CallSchema:
+    """
+    Compact callback data layout: a short tag and field values separated by '|', e.g. 'h|<game-id>|0|3|4'.
+    Constant args are not encoded, they are restored from the schema. Field values must not contain '|'.
+    """
+
+    __slots__ = ('tag', 'source', 'constants', 'field_names', 'field_types')
+
+    SEPARATOR = '|'
+    MAX_SIZE = 64    # Bytes of callback data accepted by Telegram
+
+    def __init__(self, tag: str, source: CallSources, constants: dict, fields: tuple):    # fields: (name, type)
+        self.tag = tag
+        self.source = source
+        self.constants = constants
+        self.field_names = tuple(name for name, _ in fields)
+        self.field_types = tuple(field_type for _, field_type in fields)
+
+    def encode(self, *values) -> str:
+        data = CallSchema.SEPARATOR.join((self.tag, *map(str, values)))
+        if len(data.encode()) > CallSchema.MAX_SIZE:
+            raise ValueError(f'Callback data is longer than {CallSchema.MAX_SIZE} bytes: {data}')
+        return data
+
+    def decode(self, values: list) -> dict:    # Values without the tag
+        args = dict(self.constants)
+        for name, field_type, value in zip(self.field_names, self.field_types, values):
+            args[name] = field_type(value)
+        return args
+
+
+class CallSchemas:
+    NAVIGATION = CallSchema('n', CallSources.NAVIGATION, {}, (('category', str), ('target', str)))
+    GAME_NAVIGATION = CallSchema('g', CallSources.NAVIGATION, {},
+                                 (('category', str), ('target', str), ('game-key', str)))
+    LANG = CallSchema('l', CallSources.UPDATE_PARAM, {'param': 'lang'}, (('lang', str),))
+    DIFFICULTY = CallSchema('s', CallSources.UPDATE_PARAM, {'param': 'difficulty'},
+                            (('game-key', str), ('w', int), ('h', int), ('variety', int)))
+    MEMORY_CLICK = CallSchema('m', CallSources.GAME, {'action': 'click'}, (('game-id', str), ('a', int), ('b', int)))
+    HALMA_CLICK = CallSchema('h', CallSources.GAME, {'action': 'click'},
+                             (('game-id', str), ('p', int), ('a', int), ('b', int)))
+    END_TURN = CallSchema('e', CallSources.GAME, {'action': 'end-turn'}, (('game-id', str), ('p', int)))
+    CONNECT = CallSchema('c', CallSources.CONNECTING, {'action': 'connect'}, (('game-key', str),))
+    CONNECT_MEMORY = CallSchema('C', CallSources.CONNECTING, {'action': 'connect'},
+                                (('game-key', str), ('w', int), ('h', int), ('variety', int)))
+    CONNECT_BOT = CallSchema('b', CallSources.CONNECTING, {'action': 'connect-bot'},
+                             (('game-key', str), ('level', str)))
+    DISCONNECT = CallSchema('d', CallSources.CONNECTING, {'action': 'disconnect'}, (('game-key', str),))
+    ADMIN = CallSchema('a', CallSources.ADMIN, {}, (('action', str),))
+
+
+def _create_schema_table() -> dict:    # Dict: [(str tag, int field_count)] = CallSchema schema
+    schemas = [value for value in vars(CallSchemas).values() if isinstance(value, CallSchema)]
+    return {(schema.tag, len(schema.field_names)): schema for schema in schemas}
+
+
+def _create_legacy_types() -> dict:    # Dict: [str arg_name] = type, for args of the 'source:key=value,...' format
+    types = dict()
+    for schema in _SCHEMAS.values():
+        types.update(zip(schema.field_names, schema.field_types))
+    return types
+
+
+_SCHEMAS = _create_schema_table()
+_LEGACY_TYPES = _create_legacy_types()
+
+
 class Call:
+    __slots__ = ('call_id', 'message', 'chat_id', 'date', 'arg_str', 'source', 'args')
+
     def __init__(self, call: CallbackQuery):
         self.call_id = call.id
         self.message = call.message
         self.chat_id = call.message.chat.id
         self.date = call.message.date
-        source_name, self.arg_str = call.data.split(':')
-        self.source = CallSources(source_name)
-        self.args = dict()
-        for item in self.arg_str.split(','):
+        self.source, self.args, self.arg_str = Call.decode(call.data)
+
+    @staticmethod
+    def decode(data: str) -> tuple:    # (CallSources source, dict args, str arg_str)
+        values = data.split(CallSchema.SEPARATOR)
+        schema = _SCHEMAS.get((values[0], len(values) - 1))
+        if schema is not None:
+            return schema.source, schema.decode(values[1:]), data[len(schema.tag) + 1:]
+        source_name, arg_str = data.split(':')    # Format of buttons sent before the compact layout
+        args = dict()
+        for item in arg_str.split(','):
             if not item.count('='):
                 continue
             key, value = item.split('=')
-            self.args[key] = value
+            args[key] = _LEGACY_TYPES.get(key, str)(value)
+        return CallSources(source_name), args, arg_str
+
+
+class InternalCall(Call):
+    """
+    Game call made by the bot itself, not by a player, so it has no message.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, args: dict):
+        self.call_id = None
+        self.message = None
+        self.chat_id = None
+        self.date = None
+        self.arg_str = None
+        self.source = CallSources.GAME
+        self.args = args
+
+
+class BotCall(InternalCall):
+    """
+    Game call made by a bot player, its args can contain any objects.
+    """
+
+    __slots__ = ()
+
+
+class TimerCall(InternalCall):
+    """
+    Game call made by the timer service.
+    """
+
+    __slots__ = ()
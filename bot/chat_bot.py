@@ -1,23 +1,184 @@
+import asyncio
+from threading import Thread
 from telebot import TeleBot
+from telebot.async_telebot import AsyncTeleBot
 from telebot.types import Message
 
 from message_schemes.menu_schemes import MessageScheme
+from utils.edit_coalescer import EditCoalescer
+from utils.fingerprint_cache import FingerprintCache
+from outbound_dispatcher import OutboundDispatcher, AsyncOutboundDispatcher, Priority
 from player import Player
 
 
 class ChatBot:
-    def __init__(self, bot: TeleBot):
+    """
+    API calls are queued to the rate-limited dispatcher and sent asynchronously.
+    Edits not changing the last rendered state of a message are skipped,
+    the state is forgotten if its edit fails, so the same edit can be repeated.
+    Queued edits of the same message are replaced by the latest one. If [edit_window] is positive,
+    edits are additionally held for [edit_window] seconds to be coalesced before queuing.
+    Held edits of a chat are queued at once when a new message is sent to it, so they are not sent after it.
+    """
+
+    FINGERPRINT_CACHE_SIZE = 100000
+
+    def __init__(self, bot: TeleBot, dispatcher: OutboundDispatcher, edit_window: float = 0):
         self._bot = bot
+        self._dispatcher = dispatcher
+        self._fingerprints = FingerprintCache(ChatBot.FINGERPRINT_CACHE_SIZE)
+        self._edit_coalescer = None
+        if edit_window > 0:
+            self._edit_coalescer = EditCoalescer(edit_window)
+            Thread(target=self._send_edits_forever, daemon=True).start()
+
+    @property
+    def coalesced_edit_count(self) -> int:
+        coalesced_count = self._dispatcher.replaced_count
+        if self._edit_coalescer is not None:
+            coalesced_count += self._edit_coalescer.coalesced_count
+        return coalesced_count
 
-    def send_message(self, player: Player, scheme: MessageScheme):
-        self._bot.send_message(player.user_id, scheme.title, reply_markup=scheme.get_inline_markup())
+    @property
+    def skipped_edit_count(self) -> int:
+        return self._fingerprints.skipped_count
 
-    def delete_message(self, message: Message):
-        self._bot.delete_message(message.chat.id, message.message_id)
+    def send_message(self, player: Player, scheme: MessageScheme, priority: Priority = Priority.MENU):
+        title, reply_markup = scheme.title, scheme.get_inline_markup()
+        self._submit_held_edits(player.user_id)
+        self._dispatcher.submit(player.user_id, lambda: self._bot.send_message(player.user_id, title,
+                                                                               reply_markup=reply_markup), priority)
 
-    def update_message(self, message: Message):
-        self._bot.edit_message_text(message.text, message.chat.id,
-                                    message.message_id, reply_markup=message.reply_markup)
+    def delete_message(self, message: Message, priority: Priority = Priority.MENU):
+        self.forget_message(message)
+        key = (message.chat.id, message.message_id)
+        if self._edit_coalescer is not None:
+            self._edit_coalescer.discard(key)
+        self._dispatcher.submit(message.chat.id, lambda: self._bot.delete_message(*key), priority)
+
+    def update_message(self, message: Message, priority: Priority = Priority.MENU):
+        key = (message.chat.id, message.message_id)
+        if not self._fingerprints.try_update(key, FingerprintCache.get_fingerprint(message.text,
+                                                                                   message.reply_markup)):
+            return
+        edit = (message.text, message.reply_markup, priority)
+        if self._edit_coalescer is None:
+            self._submit_edit(key, edit)
+        else:
+            self._edit_coalescer.put(key, edit)
 
     def send_document(self, player: Player, document):
-        self._bot.send_document(player.user_id, document)
+        self._submit_held_edits(player.user_id)
+        self._dispatcher.submit(player.user_id, lambda: self._bot.send_document(player.user_id, document))
+
+    def forget_message(self, message: Message):    # The message is not going to be updated anymore
+        self._fingerprints.remove((message.chat.id, message.message_id))
+
+    def flush(self):    # Waits until queued requests are sent
+        if self._edit_coalescer is not None:
+            self._edit_coalescer.wait_empty()
+        self._dispatcher.wait_empty()
+
+    def _send_edits_forever(self):
+        while True:
+            for key, edit in self._edit_coalescer.wait_due():
+                self._submit_edit(key, edit)
+                self._edit_coalescer.report_sent(key)    # The dispatcher keeps the order of the message edits
+
+    def _submit_held_edits(self, chat_id: int):
+        if self._edit_coalescer is None:
+            return
+        for key, edit in self._edit_coalescer.take(lambda key: key[0] == chat_id):
+            self._submit_edit(key, edit)
+            self._edit_coalescer.report_sent(key)
+
+    def _submit_edit(self, key: tuple, edit: tuple):
+        (chat_id, message_id), (text, reply_markup, priority) = key, edit
+        self._dispatcher.submit(chat_id, lambda: self._bot.edit_message_text(text, chat_id, message_id,
+                                                                             reply_markup=reply_markup),
+                                priority, key, lambda: self._fingerprints.remove(key))
+
+
+class AsyncChatBot:
+    """
+    Coroutine variant of ChatBot.
+    API calls are awaited by the dispatcher on the event loop instead of blocking a worker thread.
+    """
+
+    def __init__(self, bot: AsyncTeleBot, dispatcher: AsyncOutboundDispatcher, edit_window: float = 0):
+        self._bot = bot
+        self._dispatcher = dispatcher
+        self._fingerprints = FingerprintCache(ChatBot.FINGERPRINT_CACHE_SIZE)
+        self._edit_window = edit_window
+        self._pending_edits = dict()    # Dict: [(chat_id, message_id)] = (text, reply_markup, priority)
+        self._sent_edit_keys = set()
+        self._edit_tasks = set()
+        self._coalesced_edit_count = 0
+
+    @property
+    def coalesced_edit_count(self) -> int:
+        return self._dispatcher.replaced_count + self._coalesced_edit_count
+
+    @property
+    def skipped_edit_count(self) -> int:
+        return self._fingerprints.skipped_count
+
+    async def send_message(self, player: Player, scheme: MessageScheme, priority: Priority = Priority.MENU):
+        title, reply_markup = scheme.title, scheme.get_inline_markup()
+        self._submit_held_edits(player.user_id)
+        self._dispatcher.submit(player.user_id, lambda: self._bot.send_message(player.user_id, title,
+                                                                               reply_markup=reply_markup), priority)
+
+    async def delete_message(self, message: Message, priority: Priority = Priority.MENU):
+        self.forget_message(message)
+        key = (message.chat.id, message.message_id)
+        self._pending_edits.pop(key, None)
+        self._dispatcher.submit(message.chat.id, lambda: self._bot.delete_message(*key), priority)
+
+    async def update_message(self, message: Message, priority: Priority = Priority.MENU):
+        key = (message.chat.id, message.message_id)
+        if not self._fingerprints.try_update(key, FingerprintCache.get_fingerprint(message.text,
+                                                                                   message.reply_markup)):
+            return
+        edit = (message.text, message.reply_markup, priority)
+        if self._edit_window <= 0:
+            self._submit_edit(key, edit)
+            return
+        if key in self._pending_edits:
+            self._coalesced_edit_count += 1
+        self._pending_edits[key] = edit
+        if key not in self._sent_edit_keys:
+            self._sent_edit_keys.add(key)
+            task = asyncio.get_running_loop().create_task(self._send_edits(key))
+            self._edit_tasks.add(task)
+            task.add_done_callback(self._edit_tasks.discard)
+
+    async def send_document(self, player: Player, document):
+        self._submit_held_edits(player.user_id)
+        self._dispatcher.submit(player.user_id, lambda: self._bot.send_document(player.user_id, document))
+
+    def forget_message(self, message: Message):    # The message is not going to be updated anymore
+        self._fingerprints.remove((message.chat.id, message.message_id))
+
+    async def flush(self):    # Waits until queued requests are sent
+        while len(self._edit_tasks):
+            await asyncio.wait(list(self._edit_tasks))
+        await self._dispatcher.wait_empty()
+
+    async def _send_edits(self, key: tuple):
+        try:
+            await asyncio.sleep(self._edit_window)
+            if key in self._pending_edits:
+                self._submit_edit(key, self._pending_edits.pop(key))
+        finally:
+            self._sent_edit_keys.discard(key)
+
+    def _submit_held_edits(self, chat_id: int):    # The waiting tasks find nothing to send
+        for key in [key for key in self._pending_edits if key[0] == chat_id]:
+            self._submit_edit(key, self._pending_edits.pop(key))
+
+    def _submit_edit(self, key: tuple, edit: tuple):
+        (chat_id, message_id), (text, reply_markup, priority) = key, edit
+        self._dispatcher.submit(chat_id, lambda: self._bot.edit_message_text(text, chat_id, message_id,
+                                                                             reply_markup=reply_markup),
+                                priority, key, lambda: self._fingerprints.remove(key))
@@ -1,34 +1,133 @@
 import time
 from threading import Lock
+from collections import OrderedDict
 
 
 class CachingItem:
+    __slots__ = ('value', 'last_call')
+
     def __init__(self, value):
         self.value = value
-        self.last_call = time.time()
+        self.last_call = time.monotonic()
 
     def report_called(self):
-        self.last_call = time.time()
+        self.last_call = time.monotonic()
 
 
-class Cache:
+class CacheStats:
+    __slots__ = ('size', 'hit_count', 'miss_count', 'eviction_count')
+
+    def __init__(self, size: int = 0, hit_count: int = 0, miss_count: int = 0, eviction_count: int = 0):
+        self.size = size
+        self.hit_count = hit_count
+        self.miss_count = miss_count
+        self.eviction_count = eviction_count    # Items dropped by size or ttl, removed items are not counted
+
+    @property
+    def hit_rate(self) -> float:
+        call_count = self.hit_count + self.miss_count
+        return self.hit_count / call_count if call_count else 0
+
+
+class _CacheStripe:
+    __slots__ = ('items', 'lock', 'hit_count', 'miss_count', 'eviction_count')
+
     def __init__(self):
-        self._data = dict()
-        self._data_lock = Lock()
+        self.items = OrderedDict()    # Dict: [key] = CachingItem item, from least to most recently called
+        self.lock = Lock()
+        self.hit_count = 0
+        self.miss_count = 0
+        self.eviction_count = 0
+
+
+class Cache:
+    """
+    Thread-safe storage bounded by [max_size] items and [ttl] seconds since the last call of an item.
+    Keys are spread over stripes by hash, every stripe has its own lock and an equal share of [max_size].
+    A stripe keeps its items in the order of calls, so the least recently called item is evicted in O(1).
+    Items not called for longer than [ttl] are dropped when met at the old end of a stripe.
+    The cache is not bounded by size or time if [max_size] or [ttl] is None.
+    Missing items are read through [loader] if specified, it is called with the key outside of the locks
+    and returns the value or None.
+    """
+
+    STRIPE_COUNT = 16
+
+    def __init__(self, max_size: int = None, ttl: float = None, loader=None):
+        stripe_count = Cache.STRIPE_COUNT if max_size is None else max(1, min(Cache.STRIPE_COUNT, max_size))
+        self._stripe_max_size = None if max_size is None else max_size // stripe_count
+        self._ttl = ttl
+        self._loader = loader
+        self._stripes = tuple(_CacheStripe() for _ in range(stripe_count))
+
+    @property
+    def stats(self) -> CacheStats:
+        stats = CacheStats()
+        for stripe in self._stripes:
+            stats.size += len(stripe.items)
+            stats.hit_count += stripe.hit_count
+            stats.miss_count += stripe.miss_count
+            stats.eviction_count += stripe.eviction_count
+        return stats
 
     def __getitem__(self, key):
-        with self._data_lock:
-            if key in self._data:
-                self._data[key].report_called()
-                return self._data[key].value
-        # TODO: Try load from database
-        return None
+        return self._get(key, True)
+
+    def get_cached(self, key):    # Returns None if the item is not in the cache, misses are counted by loading lookups
+        return self._get(key, False)
 
     def __setitem__(self, key, value):
-        with self._data_lock:
-            self._data[key] = CachingItem(value)
+        stripe = self._get_stripe(key)
+        with stripe.lock:
+            stripe.items[key] = CachingItem(value)
+            stripe.items.move_to_end(key)
+            self._evict(stripe)
 
     def remove(self, key):
-        with self._data_lock:
-            if key in self._data:
-                self._data.pop(key)
+        stripe = self._get_stripe(key)
+        with stripe.lock:
+            stripe.items.pop(key, None)
+
+    def _get(self, key, load: bool):
+        stripe = self._get_stripe(key)
+        with stripe.lock:
+            item = stripe.items.get(key)
+            if item is not None and self._is_expired(item, time.monotonic()):
+                stripe.items.pop(key)
+                stripe.eviction_count += 1
+                item = None
+            if item is not None:
+                item.report_called()
+                stripe.items.move_to_end(key)
+                stripe.hit_count += 1
+                return item.value
+            if not load:
+                return None
+            stripe.miss_count += 1
+        value = None if self._loader is None else self._loader(key)
+        if value is None:
+            return None
+        with stripe.lock:
+            item = stripe.items.get(key)
+            if item is not None:    # Loaded or set concurrently
+                return item.value
+            stripe.items[key] = CachingItem(value)
+            self._evict(stripe)
+        return value
+
+    def _get_stripe(self, key) -> _CacheStripe:
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def _is_expired(self, item: CachingItem, now: float) -> bool:
+        return self._ttl is not None and now - item.last_call > self._ttl
+
+    def _evict(self, stripe: _CacheStripe):    # Must be called under the stripe lock
+        items = stripe.items
+        now = time.monotonic()
+        while len(items) and self._is_expired(next(iter(items.values())), now):
+            items.popitem(last=False)
+            stripe.eviction_count += 1
+        if self._stripe_max_size is not None:
+            while len(items) > self._stripe_max_size:
+                items.popitem(last=False)
+                stripe.eviction_count += 1
@@ -1,3 +1,4 @@
+import re
 import json
 from os import path, environ
 from dotenv import load_dotenv
@@ -8,32 +9,57 @@ def _load_json(file_path: str):
         return json.loads(f.read())
 
 
+class _KeptVariables(dict):
+    def __missing__(self, key):    # Variables not passed are left as they are
+        return '{{' + key + '}}'
+
+
+def _compile_template(text: str):    # Returns format function of the text with {{var}} variables
+    parts = re.split(r'{{([\w-]+)}}', text)
+    for i in range(0, len(parts), 2):
+        parts[i] = parts[i].replace('{', '{{').replace('}', '}}')
+    for i in range(1, len(parts), 2):
+        parts[i] = '{' + parts[i] + '}'
+    return ''.join(parts).format_map
+
+
+def _compile_text(node, node_path: tuple, node_table: dict, template_table: dict):    # Walks the text tree
+    node_table[node_path] = node
+    if isinstance(node, dict):
+        for key in node:
+            _compile_text(node[key], node_path + (key,), node_table, template_table)
+    elif isinstance(node, str) and '{{' in node and node not in template_table:
+        template_table[node] = _compile_template(node)
+
+
 def get_text(*args: str):
-    global all_text
-    result = all_text
-    for arg in args:
-        result = result[arg]
-    return result
+    global flat_text
+    return flat_text[args]
 
 
 def subs(text: str, **kwargs) -> str:
-    for var in kwargs.keys():
-        text = text.replace('{{' + var + '}}', str(kwargs[var]))
-    return text
+    global templates
+    template = templates.get(text)
+    if template is None:    # Not a content string
+        for var in kwargs.keys():
+            text = text.replace('{{' + var + '}}', str(kwargs[var]))
+        return text
+    return template(_KeptVariables(kwargs))
 
 
 def combine(*args) -> str:
-    def is_emoji(text_value: str): return len(text_value) == 1    # FIXME
     if not len(args):
         return ''
-    args = [str(arg) for arg in args]
-    text = args[0]
-    for i in range(1, len(args)):
-        if is_emoji(args[i - 1]) or is_emoji(args[i]):
-            text = text + ' ' + args[i]
-        else:
-            text = text + '\n' + args[i]
-    return text
+    parts = []
+    is_previous_emoji = False
+    for i in range(len(args)):
+        arg = str(args[i])
+        is_emoji = len(arg) == 1    # FIXME
+        if i:
+            parts.append(' ' if is_previous_emoji or is_emoji else '\n')
+        parts.append(arg)
+        is_previous_emoji = is_emoji
+    return ''.join(parts)
 
 
 def combine_with_dash(text: str) -> str:
@@ -46,5 +72,8 @@ data_directory = '' if environ.get('DATA_DIRECTORY') is None else environ['DATA_
 game_setup = _load_json(path.join(data_directory, 'game_setup.json'))
 emoji = _load_json(path.join(data_directory, 'emoji.json'))
 all_text = _load_json(path.join(data_directory, 'localization.json'))
+flat_text = dict()    # Dict: [tuple key_path] = text node, compiled from all_text
+templates = dict()    # Dict: [str text] = format function of the text variables
+_compile_text(all_text, tuple(), flat_text, templates)
 __all__ = ['get_text', 'subs', 'combine', 'combine_with_dash',
            'game_setup', 'emoji', 'all_text']
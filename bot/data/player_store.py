@@ -0,0 +1,106 @@
+import json
+import sqlite3
+from threading import Thread, Lock, Event
+
+from utils.logger import StaticLogger
+from player import Player
+
+
+class PlayerStore:
+    """
+    Keeps player settings in a local SQLite database.
+    Saved players are written behind: their rows are collected by user id and written in one transaction
+    every [flush_interval] seconds by a separate thread, so saving never waits for the disk.
+    Rows not written yet are returned by load as well.
+    """
+
+    def __init__(self, file_path: str, flush_interval: float):
+        self._file_path = file_path
+        self._flush_interval = flush_interval
+        self._connection = PlayerStore._connect(file_path)    # Used for reading
+        self._connection.execute('CREATE TABLE IF NOT EXISTS players (user_id INTEGER PRIMARY KEY, lang TEXT, '
+                                 'game_settings TEXT, rating REAL)')
+        self._connection.commit()
+        self._read_lock = Lock()
+        self._pending_lock = Lock()
+        self._pending = dict()    # Dict: [int user_id] = tuple row, saved but not written
+        self._writing = dict()    # Dict: [int user_id] = tuple row, being written
+        self._stopped_event = Event()
+        self._thread = None
+        self._written_count = 0
+
+    @property
+    def written_count(self) -> int:
+        return self._written_count
+
+    def start(self):
+        self._thread = Thread(target=self._run_forever)
+        self._thread.start()
+
+    def stop(self):    # Pending rows are written
+        self._stopped_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._connection.close()
+
+    def load(self, user_id: int) -> Player:    # None if the player is not stored
+        with self._pending_lock:
+            row = self._pending.get(user_id) or self._writing.get(user_id)
+        if row is None:
+            with self._read_lock:
+                row = self._connection.execute('SELECT user_id, lang, game_settings, rating FROM players '
+                                               'WHERE user_id = ?', (user_id,)).fetchone()
+        return None if row is None else PlayerStore._from_row(row)
+
+    def save(self, player: Player):
+        row = PlayerStore._to_row(player)
+        with self._pending_lock:
+            self._pending[player.user_id] = row
+
+    @staticmethod
+    def _connect(file_path: str) -> sqlite3.Connection:
+        connection = sqlite3.connect(file_path, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')    # Reading is not blocked by writing
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    @staticmethod
+    def _to_row(player: Player) -> tuple:
+        return player.user_id, player.lang, json.dumps(player.game_settings), player.rating
+
+    @staticmethod
+    def _from_row(row: tuple) -> Player:
+        user_id, lang, game_settings, rating = row
+        player = Player(user_id, lang)
+        player.game_settings.update(json.loads(game_settings))
+        player.rating = rating
+        return player
+
+    def _run_forever(self):
+        connection = PlayerStore._connect(self._file_path)
+        while not self._stopped_event.wait(self._flush_interval):
+            self._flush(connection)
+        self._flush(connection)
+        connection.close()
+
+    @StaticLogger.exception_logged
+    def _flush(self, connection: sqlite3.Connection):
+        with self._pending_lock:
+            if not len(self._pending):
+                return
+            self._writing, self._pending = self._pending, dict()
+        is_written = False
+        try:
+            with connection:    # One transaction
+                connection.executemany('INSERT INTO players (user_id, lang, game_settings, rating) '
+                                       'VALUES (?, ?, ?, ?) ON CONFLICT (user_id) DO UPDATE SET '
+                                       'lang = excluded.lang, game_settings = excluded.game_settings, '
+                                       'rating = excluded.rating', list(self._writing.values()))
+            is_written = True
+            self._written_count += len(self._writing)
+        finally:
+            with self._pending_lock:
+                if not is_written:    # Retried with the next flush unless saved again meanwhile
+                    for user_id, row in self._writing.items():
+                        self._pending.setdefault(user_id, row)
+                self._writing = dict()
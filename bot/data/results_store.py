@@ -0,0 +1,185 @@
+import time
+import math
+import sqlite3
+from threading import Thread, Lock, Event
+
+from utils.logger import StaticLogger
+from data import content
+from data.player_store import PlayerStore
+from game import Game
+from game_models.models_enum import GameModels
+from game_models.game_result import ResultStatus
+
+
+class Leaderboard:
+    __slots__ = ('key', 'entries', 'score', 'rank')
+
+    def __init__(self, key: str, entries: list, score: float = None, rank: int = None):
+        self.key = key    # halma, memory/<level>
+        self.entries = entries    # Tuples of (int user_id, float score) from the best
+        self.score = score    # Of the requesting player, None if not ranked
+        self.rank = rank
+
+
+class ResultsStore:
+    """
+    Append-only history of game results in a local SQLite database with leaderboards maintained on every result:
+    Halma Elo ratings of games between humans and the best Memory move count of every difficulty level.
+    Results are written behind like in PlayerStore, leaderboards are updated in the same transaction.
+    A leaderboard keeps one score per player, ordered by an index for top queries,
+    and counts of players by integer score, so a rank is a sum over at most a few thousand counts
+    plus an index range count of players in the same integer score.
+    Ratings are changed in Player objects at once and saved to [player_store] if specified.
+    """
+
+    ELO_FACTOR = 32
+    HALMA_KEY = GameModels.HALMA.key
+
+    def __init__(self, file_path: str, flush_interval: float, player_store: PlayerStore = None):
+        self._file_path = file_path
+        self._flush_interval = flush_interval
+        self._player_store = player_store
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)    # Used for reading
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS results (id INTEGER PRIMARY KEY, time REAL, board TEXT, user_id INTEGER,
+                                                status TEXT, move_count INTEGER, score REAL);
+            CREATE TABLE IF NOT EXISTS leaderboard (board TEXT, user_id INTEGER, score REAL,
+                                                    PRIMARY KEY (board, user_id));
+            CREATE INDEX IF NOT EXISTS leaderboard_order ON leaderboard (board, score);
+            CREATE TABLE IF NOT EXISTS score_counts (board TEXT, bucket INTEGER, count INTEGER,
+                                                     PRIMARY KEY (board, bucket));
+        """)
+        self._read_lock = Lock()
+        self._rating_lock = Lock()
+        self._pending_lock = Lock()
+        self._pending = []    # Tuples of (float time, str board, int user_id, str status, int move_count, float score)
+        self._stopped_event = Event()
+        self._thread = None
+        self._written_count = 0
+
+    @property
+    def written_count(self) -> int:
+        return self._written_count
+
+    @staticmethod
+    def is_descending(board: str) -> bool:    # Higher scores are better
+        return board == ResultsStore.HALMA_KEY
+
+    @staticmethod
+    def get_memory_board(size: int, variety: int) -> str:    # None for a custom difficulty
+        levels = content.game_setup[GameModels.MEMORY.key]['levels']
+        for level in levels:
+            if levels[level]['size'] == size and levels[level]['variety'] == variety:
+                return f'{GameModels.MEMORY.key}/{level}'
+        return None
+
+    def start(self):
+        self._thread = Thread(target=self._run_forever)
+        self._thread.start()
+
+    def stop(self):    # Pending results are written
+        self._stopped_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._connection.close()
+
+    def add_game(self, game: Game):    # Results of an ended game, ratings are changed in its players
+        if not len(game.results):
+            return
+        now = time.time()
+        rows = []
+        if game.model_type is GameModels.MEMORY:
+            board = game.model.get_board()
+            board_key = ResultsStore.get_memory_board(board.size, board.variety)
+            result = game.results[0]
+            if board_key is not None and not game.players[0].is_bot:
+                rows.append((now, board_key, game.players[0].user_id, result.status.value, result.move_count,
+                             result.move_count))
+        if game.model_type is GameModels.HALMA and not any(player.is_bot for player in game.players):
+            with self._rating_lock:    # A player can play several games at once, ratings are queued in their order
+                changes = ResultsStore._get_elo_changes([player.rating for player in game.players],
+                                                        [result.status for result in game.results])
+                for player, result, change in zip(game.players, game.results, changes):
+                    player.rating += change
+                    result.rating_change = change
+                    rows.append((now, ResultsStore.HALMA_KEY, player.user_id, result.status.value,
+                                 result.move_count, player.rating))
+                self._add_pending(rows)
+                if self._player_store is not None:
+                    for player in game.players:
+                        self._player_store.save(player)
+            return
+        self._add_pending(rows)
+
+    def get_leaderboard(self, board: str, user_id: int, size: int) -> Leaderboard:
+        order = 'DESC' if ResultsStore.is_descending(board) else 'ASC'
+        with self._read_lock:
+            entries = self._connection.execute(f'SELECT user_id, score FROM leaderboard WHERE board = ? '
+                                               f'ORDER BY score {order} LIMIT ?', (board, size)).fetchall()
+            row = self._connection.execute('SELECT score FROM leaderboard WHERE board = ? AND user_id = ?',
+                                           (board, user_id)).fetchone()
+            if row is None:
+                return Leaderboard(board, entries)
+            score, bucket = row[0], ResultsStore._get_bucket(row[0])
+            if ResultsStore.is_descending(board):    # Better scores of the same bucket are counted by the index
+                comparison, bucket_condition, bucket_args = '>', 'score > ? AND score < ?', (score, bucket + 1)
+            else:
+                comparison, bucket_condition, bucket_args = '<', 'score >= ? AND score < ?', (bucket, score)
+            better_count = self._connection.execute(f'SELECT TOTAL(count) FROM score_counts WHERE board = ? '
+                                                    f'AND bucket {comparison} ?', (board, bucket)).fetchone()[0]
+            better_count += self._connection.execute(f'SELECT COUNT(*) FROM leaderboard WHERE board = ? '
+                                                     f'AND {bucket_condition}', (board, *bucket_args)).fetchone()[0]
+        return Leaderboard(board, entries, score, int(better_count) + 1)
+
+    def _add_pending(self, rows: list):
+        if len(rows):
+            with self._pending_lock:
+                self._pending.extend(rows)
+
+    @staticmethod
+    def _get_elo_changes(ratings: list, statuses: list) -> list:
+        expected = 1 / (1 + 10 ** ((ratings[1] - ratings[0]) / 400))    # Of the first player
+        score = {ResultStatus.WIN: 1, ResultStatus.DRAW: 0.5}.get(statuses[0], 0)
+        change = ResultsStore.ELO_FACTOR * (score - expected)
+        return [change, -change]
+
+    @staticmethod
+    def _get_bucket(score: float) -> int:
+        return math.floor(score)
+
+    def _run_forever(self):
+        connection = sqlite3.connect(self._file_path)
+        while not self._stopped_event.wait(self._flush_interval):
+            self._flush(connection)
+        self._flush(connection)
+        connection.close()
+
+    @StaticLogger.exception_logged
+    def _flush(self, connection: sqlite3.Connection):
+        with self._pending_lock:
+            rows, self._pending = self._pending, []
+        if not len(rows):
+            return
+        with connection:    # One transaction, not written results are lost on failure
+            connection.executemany('INSERT INTO results (time, board, user_id, status, move_count, score) '
+                                   'VALUES (?, ?, ?, ?, ?, ?)', rows)
+            for _, board, user_id, _, _, score in rows:
+                ResultsStore._update_leaderboard(connection, board, user_id, score)
+        self._written_count += len(rows)
+
+    @staticmethod
+    def _update_leaderboard(connection: sqlite3.Connection, board: str, user_id: int, score: float):
+        row = connection.execute('SELECT score FROM leaderboard WHERE board = ? AND user_id = ?',
+                                 (board, user_id)).fetchone()
+        if row is not None:
+            if not ResultsStore.is_descending(board) and row[0] <= score:    # Only the best Memory result is kept
+                return
+            connection.execute('UPDATE score_counts SET count = count - 1 WHERE board = ? AND bucket = ?',
+                               (board, ResultsStore._get_bucket(row[0])))
+        connection.execute('INSERT INTO leaderboard (board, user_id, score) VALUES (?, ?, ?) '
+                           'ON CONFLICT (board, user_id) DO UPDATE SET score = excluded.score',
+                           (board, user_id, score))
+        connection.execute('INSERT INTO score_counts (board, bucket, count) VALUES (?, ?, 1) '
+                           'ON CONFLICT (board, bucket) DO UPDATE SET count = count + 1',
+                           (board, ResultsStore._get_bucket(score)))
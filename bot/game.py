@@ -1,16 +1,31 @@
+import time
 import random
+from queue import SimpleQueue, Empty
+
+from call import Call
 from game_models.game_model import GameModel
 from game_models.models_enum import GameModels
 
 
 class Game:
     DELETE_MESSAGES_WHEN_ENDED = {GameModels.MEMORY}
+    UID_LENGTH = 12    # Short enough for compact callback data, 71 random bits
+
+    __slots__ = ('model', 'players', 'messages', '_uid', '_calls', 'keyboard_templates', 'last_action_time',
+                 'timed_turn_number', 'turn_timer', 'idle_timer', 'rejected_bot_move_count')
 
-    def __init__(self, model: GameModel, players: list):
+    def __init__(self, model: GameModel, players: list, uid: str = None):
         self.model = model
         self.players = players
         self.messages = [dict() for _ in range(self.player_count)]    # Dict: [str message_tag] = Message message
-        self._uid = Game._random_uid()
+        self._uid = Game._random_uid() if uid is None else uid    # Specified for restored games
+        self._calls = SimpleQueue()    # Thread-safe mailbox of game calls
+        self.keyboard_templates = dict()    # Dict: [key] = KeyboardTemplate template, built once per game
+        self.last_action_time = time.monotonic()    # Of the last player call
+        self.timed_turn_number = None    # Turn with a started clock
+        self.turn_timer = None    # Handles of the scheduled timer calls, canceled when the game is removed
+        self.idle_timer = None
+        self.rejected_bot_move_count = 0    # In a row, the same position is searched again after a rejected move
 
     @property
     def uid(self) -> str:
@@ -32,6 +47,19 @@ class Game:
     def results(self) -> list:
         return self.model.results
 
+    @property
+    def has_calls(self) -> bool:
+        return not self._calls.empty()
+
+    def add_call(self, call: Call):
+        self._calls.put(call)
+
+    def pop_call(self) -> Call:
+        try:
+            return self._calls.get_nowait()
+        except Empty:
+            return None
+
     def set_message(self, player_index, message, message_tag='main'):
         self.messages[player_index][message_tag] = message
 
@@ -41,4 +69,4 @@ class Game:
     @staticmethod
     def _random_uid() -> str:
         symbols = '0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
-        return ''.join([random.choice(symbols) for _ in range(25)])
+        return ''.join([random.choice(symbols) for _ in range(Game.UID_LENGTH)])
@@ -2,6 +2,8 @@
 class GameModel:
     PLAYER_COUNT = None
 
+    __slots__ = ('_is_ended', '_results')
+
     def __init__(self):
         self._is_ended = False
         self._results = []
@@ -14,6 +16,9 @@ class GameModel:
     def results(self) -> list:
         return self._results
 
+    def cancel(self):    # Ends the game without results
+        self._end([])
+
     def _end(self, results: list):
         self._is_ended = True
         self._results = results
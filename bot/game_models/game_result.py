@@ -10,18 +10,25 @@ class ResultStatus(enum.Enum):
 
 
 class GameResult:
+    __slots__ = ('status', 'move_count')
+
     def __init__(self, status: ResultStatus = ResultStatus.NONE):
         self.status = status
         self.move_count = None
 
 
 class MemoryResult(GameResult):
+    __slots__ = ()
+
     def __init__(self, move_count: int):
         super().__init__(ResultStatus.NAMELESS)
         self.move_count = move_count
 
 
 class HalmaResult(GameResult):
+    __slots__ = ('rating_change',)
+
     def __init__(self, status: ResultStatus, move_count: int):    # status: win, defeat
         super().__init__(status)
         self.move_count = move_count
+        self.rating_change = None    # Set when the result is rated
@@ -2,64 +2,125 @@ from game_models.game_model import GameModel
 from game_models.game_result import HalmaResult, ResultStatus
 
 
+def _bit(i: int, j: int) -> int:
+    return 1 << (i * 8 + j)
+
+
+def _reverse_mask(mask: int) -> int:    # Square (i, j) becomes (7 - i, 7 - j)
+    return int(format(mask, '064b')[::-1], 2)
+
+
+def _create_mask(condition) -> int:
+    mask = 0
+    for i in range(8):
+        for j in range(8):
+            if condition(i, j):
+                mask |= _bit(i, j)
+    return mask
+
+
+def _create_neighbour_masks() -> list:
+    masks = []
+    for i in range(8):
+        for j in range(8):
+            masks.append(_create_mask(lambda a, b: max(abs(a - i), abs(b - j)) == 1))
+    return masks
+
+
+def _create_jump_masks() -> list:    # Targets at distance 2 straight or diagonally, jumped square is in between
+    masks = []
+    for i in range(8):
+        for j in range(8):
+            masks.append(_create_mask(lambda a, b: abs(a - i) in (0, 2) and abs(b - j) in (0, 2)
+                                       and (a, b) != (i, j)))
+    return masks
+
+
+def _create_jumps(jump_masks: list) -> list:    # Tuples of (int target_index, int jumped_square_mask)
+    jumps = []
+    for index in range(64):
+        jumps.append(tuple((target, 1 << (index + target) // 2) for target in range(64)
+                           if jump_masks[index] >> target & 1))
+    return jumps
+
+
+class HalmaMove:
+    __slots__ = ('start', 'path')
+
+    def __init__(self, start: int, path: tuple):
+        self.start = start    # Square index of the moved piece
+        self.path = path    # Square indexes the piece is moved to one by one, a single step or a jump chain
+
+    @property
+    def end(self) -> int:
+        return self.path[-1]
+
+
 class HalmaSquare:
-    def __init__(self, color: int = None):
-        self.is_selected = False
+    __slots__ = ('is_selected', 'is_move_target', 'color')
+
+    def __init__(self, color: int = None, is_selected: bool = False, is_move_target: bool = False):
+        self.is_selected = is_selected
+        self.is_move_target = is_move_target    # Selected piece can be moved here
         self.color = color    # 0, 1
 
     @property
     def is_empty(self) -> bool:
         return self.color is None
 
-    def try_select(self, player_index: int) -> bool:
-        if player_index == self.color and not self.is_selected:
-            self.is_selected = True
-            return True
-        return False
 
-    def try_deselect(self, player_index: int) -> bool:
-        if player_index == self.color and self.is_selected:
-            self.is_selected = False
-            return True
-        return False
+class HalmaBoard:
+    """
+    Read-only view of the board from the perspective of a player, whose pieces have color 0.
+    Squares are shared instances and must not be modified.
+    """
 
+    SQUARES = tuple((HalmaSquare(color), HalmaSquare(color, is_selected=True)) for color in (0, 1))
+    EMPTY_SQUARES = (HalmaSquare(), HalmaSquare(is_move_target=True))
 
-class HalmaBoard:
-    def __init__(self):
-        self._board = [[HalmaSquare() for _ in range(8)] for _ in range(8)]
-        for i in range(8):
-            for j in range(8):
-                if i + j < 4:
-                    self[i, j].color = 1
-                if i + j > 10:
-                    self[i, j].color = 0
+    __slots__ = ('_masks', '_selected_mask', '_move_target_mask')
 
-    def __getitem__(self, index_pair) -> HalmaSquare:
-        return self._board[index_pair[0]][index_pair[1]]
+    def __init__(self, masks: tuple, selected_mask: int = 0, move_target_mask: int = 0):
+        self._masks = masks    # Occupancy masks of color 0 and color 1
+        self._selected_mask = selected_mask
+        self._move_target_mask = move_target_mask
 
-    def __setitem__(self, index_pair, value: HalmaSquare):
-        self._board[index_pair[0]][index_pair[1]] = value
+    def __getitem__(self, index_pair) -> HalmaSquare:
+        index = index_pair[0] * 8 + index_pair[1]
+        if self._masks[0] >> index & 1:
+            return HalmaBoard.SQUARES[0][self._selected_mask >> index & 1]
+        if self._masks[1] >> index & 1:
+            return HalmaBoard.SQUARES[1][self._selected_mask >> index & 1]
+        return HalmaBoard.EMPTY_SQUARES[self._move_target_mask >> index & 1]
 
     def reversed(self):
-        board = HalmaBoard()
-        for i in range(8):
-            for j in range(8):
-                board[i, j] = HalmaSquare()
-                board[i, j].is_selected = self[7 - i, 7 - j].is_selected
-                if not self[7 - i, 7 - j].is_empty:
-                    board[i, j].color = self[7 - i, 7 - j].color ^ 1
-        return board
+        return HalmaBoard((_reverse_mask(self._masks[1]), _reverse_mask(self._masks[0])),
+                          _reverse_mask(self._selected_mask), _reverse_mask(self._move_target_mask))
 
 
 class HalmaModel(GameModel):
+    """
+    The board is stored as occupancy bitmasks of both players, square (i, j) is bit i * 8 + j.
+    Player 0 starts at the bottom right corner and wins by occupying the starting squares of player 1.
+    """
+
     PLAYER_COUNT = 2
+    TOP_CORNER_MASK = _create_mask(lambda i, j: i + j < 4)    # Start of player 1, goal of player 0
+    BOTTOM_CORNER_MASK = _create_mask(lambda i, j: i + j > 10)    # Start of player 0, goal of player 1
+    NEIGHBOUR_MASKS = _create_neighbour_masks()
+    JUMP_MASKS = _create_jump_masks()
+    JUMPS = _create_jumps(JUMP_MASKS)
 
-    def __init__(self):
+    __slots__ = ('_masks', '_turn', '_selected', '_is_selection_shown', '_visited_mask', '_move_count', '_turn_time')
+
+    def __init__(self, turn_time: float = None):
         super().__init__()
-        self._board = HalmaBoard()
+        self._turn_time = turn_time    # In seconds, the player loses when a turn takes longer, not limited if None
+        self._masks = [HalmaModel.BOTTOM_CORNER_MASK, HalmaModel.TOP_CORNER_MASK]
         self._turn = 0    # 0, 1
-        self._selected = None
-        self._visited_squares = set()
+        self._selected = None    # Square index
+        self._is_selection_shown = False
+        self._visited_mask = 0
         self._move_count = 0
 
     @property
@@ -70,6 +131,14 @@ class HalmaModel(GameModel):
     def turn(self) -> int:
         return self._turn
 
+    @property
+    def turn_number(self) -> int:    # Identifies the current turn
+        return self._move_count * 2 + self._turn
+
+    @property
+    def turn_time(self) -> float:
+        return self._turn_time
+
     def can_end_turn(self, player_index: int) -> bool:
         return player_index == self.turn and self._piece_moved
 
@@ -82,85 +151,175 @@ class HalmaModel(GameModel):
     def try_click(self, player_index: int, row_id: int, column_id: int) -> bool:
         if self.is_ended or player_index != self._turn:
             return False
+        index = row_id * 8 + column_id
         if self._piece_moved:
-            return self._try_move_piece(row_id, column_id)
+            return self._try_move_piece(index)
         else:
-            if self._try_move_piece(row_id, column_id):
+            if self._try_move_piece(index):
                 return True
             changed = False
             if self._selected is not None:
-                if (row_id, column_id) == self._selected:
+                if index == self._selected:
                     return False
                 changed = True
-                self._board[self._selected].try_deselect(player_index)
-            if self._board[row_id, column_id].try_select(player_index):
-                self._selected = (row_id, column_id)
-                self._visited_squares.clear()
-                self._visited_squares.add(self._selected)
+                self._is_selection_shown = False
+            if self._masks[player_index] >> index & 1:
+                self._selected = index
+                self._is_selection_shown = True
+                self._visited_mask = 1 << index
                 changed = True
             return changed
 
+    def try_time_out(self, turn_number: int) -> bool:    # The player of the timed out turn loses
+        if self.is_ended or self._turn_time is None or turn_number != self.turn_number:
+            return False
+        self._end(self._get_results(winner_id=self._turn ^ 1))
+        return True
+
     def get_board(self, player_index: int) -> HalmaBoard:
-        if player_index == 0:
-            return self._board
-        else:
-            return self._board.reversed()
+        selected_mask, move_target_mask = 0, 0
+        if self._selected is not None and self._is_selection_shown:
+            selected_mask = 1 << self._selected
+            if player_index == self._turn:
+                move_target_mask = self.get_move_target_mask()
+        board = HalmaBoard((self._masks[0], self._masks[1]), selected_mask, move_target_mask)
+        return board if player_index == 0 else board.reversed()
+
+    def try_move(self, player_index: int, move: HalmaMove) -> bool:    # Performs the move by clicks
+        if not self.try_click(player_index, move.start // 8, move.start % 8) or self._selected != move.start:
+            return False
+        for index in move.path:
+            if not self.try_click(player_index, index // 8, index % 8):
+                return False
+        if self.can_end_turn(player_index):
+            self._change_turn()
+        return True
+
+    def get_snapshot(self) -> tuple:
+        return (self._masks[0], self._masks[1], self._turn, self._selected, self._is_selection_shown,
+                self._visited_mask, self._move_count, self._turn_time)
+
+    @staticmethod
+    def from_snapshot(snapshot: tuple):
+        first_mask, second_mask, turn, selected, is_selection_shown, visited_mask, move_count, turn_time = snapshot
+        model = HalmaModel(turn_time)
+        model._masks = [first_mask, second_mask]
+        model._turn = turn
+        model._selected = selected
+        model._is_selection_shown = is_selection_shown
+        model._visited_mask = visited_mask
+        model._move_count = move_count
+        return model
+
+    def get_masks(self) -> tuple:    # Occupancy masks of player 0 and player 1
+        return self._masks[0], self._masks[1]
+
+    def get_move_target_mask(self) -> int:    # Squares the selected piece can be moved to by the next click
+        if self._selected is None:
+            return 0
+        occupied = self._occupied_mask
+        targets = HalmaModel.get_jump_target_mask(self._selected, occupied, self._visited_mask)
+        if not self._piece_moved:
+            targets |= HalmaModel.NEIGHBOUR_MASKS[self._selected] & ~occupied
+        return targets
+
+    def generate_moves(self, player_index: int) -> list:
+        """
+        Returns all moves of the player from the current position as if the turn has just started.
+        A jump chain is a move for every square it passes, so every reachable square is the end of one move.
+        """
+        moves = []
+        occupied = self._occupied_mask
+        pieces = self._masks[player_index]
+        while pieces:
+            piece = pieces & -pieces
+            pieces ^= piece
+            start = piece.bit_length() - 1
+            targets = HalmaModel.NEIGHBOUR_MASKS[start] & ~occupied
+            while targets:
+                target = targets & -targets
+                targets ^= target
+                moves.append(HalmaMove(start, (target.bit_length() - 1,)))
+            moves.extend(HalmaModel.generate_jump_chains(start, occupied ^ piece))
+        return moves
+
+    @staticmethod
+    def get_jump_target_mask(index: int, occupied: int, visited: int = 0) -> int:
+        targets = 0
+        for target, jumped_mask in HalmaModel.JUMPS[index]:
+            if occupied & jumped_mask and not (occupied | visited) >> target & 1:
+                targets |= 1 << target
+        return targets
+
+    @staticmethod
+    def get_jump_reachable_mask(start: int, occupied: int) -> int:    # [occupied] must not contain the jumping piece
+        reachable = 0
+        frontier = 1 << start
+        visited = frontier
+        while frontier:
+            square = frontier & -frontier
+            frontier ^= square
+            for target, jumped_mask in HalmaModel.JUMPS[square.bit_length() - 1]:
+                if occupied & jumped_mask and not (occupied | visited) >> target & 1:
+                    visited |= 1 << target
+                    reachable |= 1 << target
+                    frontier |= 1 << target
+        return reachable
+
+    @staticmethod
+    def generate_jump_chains(start: int, occupied: int) -> list:
+        """
+        Returns the shortest jump chain to every square reachable by jumps from [start].
+        [occupied] must not contain the jumping piece.
+        """
+        moves = []
+        visited = 1 << start
+        chains = [(start, tuple())]
+        for index, path in chains:    # Breadth-first, chains are appended while iterating
+            for target, jumped_mask in HalmaModel.JUMPS[index]:
+                if occupied & jumped_mask and not (occupied | visited) >> target & 1:
+                    visited |= 1 << target
+                    chains.append((target, path + (target,)))
+                    moves.append(HalmaMove(start, path + (target,)))
+        return moves
 
     @property
     def _piece_moved(self) -> bool:
-        return len(self._visited_squares) > 1
+        return self._visited_mask & (self._visited_mask - 1) != 0
 
-    def _can_move_to(self, new_i: int, new_j: int) -> bool:
-        if self._selected is None:
-            return False
-        i, j = self._selected
-        if i == new_i and j == new_j:
-            return False
-        if (new_i, new_j) in self._visited_squares:
-            return False
-        if new_i - i in [-1, 0, 1] and new_j - j in [-1, 0, 1]:
-            return self._board[new_i, new_j].is_empty and not self._piece_moved
-        if new_i - i in [-2, 0, 2] and new_j - j in [-2, 0, 2]:
-            if self._board[new_i, new_j].is_empty and not self._board[(new_i + i) // 2, (new_j + j) // 2].is_empty:
-                return True
-        return False
+    @property
+    def _occupied_mask(self) -> int:
+        return self._masks[0] | self._masks[1]
+
+    def _can_move_to(self, index: int) -> bool:
+        return self.get_move_target_mask() >> index & 1 == 1
 
-    def _try_move_piece(self, new_i: int, new_j: int) -> bool:
-        if not self._can_move_to(new_i, new_j):
+    def _try_move_piece(self, index: int) -> bool:
+        if not self._can_move_to(index):
             return False
-        i, j = self._selected
-        self._board[new_i, new_j] = self._board[i, j]
-        self._board[i, j] = HalmaSquare()
-        self._visited_squares.add((new_i, new_j))
-        self._selected = (new_i, new_j)
-        can_move = False
-        if new_i - i in [-2, 0, 2] and new_j - j in [-2, 0, 2]:
-            for a in range(-2, 4, 2):
-                for b in range(-2, 4, 2):
-                    if (not a == b == 0) and 0 <= new_i + a <= 7 and 0 <= new_j + b <= 7:
-                        if self._can_move_to(new_i + a, new_j + b):
-                            can_move = True
-        if not can_move:
+        is_jump = HalmaModel.JUMP_MASKS[self._selected] >> index & 1
+        self._masks[self._turn] ^= (1 << self._selected) | (1 << index)
+        self._visited_mask |= 1 << index
+        self._selected = index
+        if not (is_jump and self._can_jump_further()):
             self._change_turn()
         return True
 
+    def _can_jump_further(self) -> bool:
+        return HalmaModel.get_jump_target_mask(self._selected, self._occupied_mask, self._visited_mask) != 0
+
     def _change_turn(self):
         if self._turn == 1:
             self._move_count += 1
         self._check_if_is_ended()
-        self._board[self._selected].is_selected = False
+        self._is_selection_shown = False
         self._selected = None
-        self._visited_squares.clear()
+        self._visited_mask = 0
         self._turn ^= 1
 
     def _check_if_is_ended(self):
-        first_won, second_won = True, True
-        for i in range(8):
-            for j in range(8):
-                if i + j < 4 and self._board[i, j].color != 0:
-                    first_won = False
-                if i + j > 10 and self._board[i, j].color != 1:
-                    second_won = False
+        first_won = self._masks[0] & HalmaModel.TOP_CORNER_MASK == HalmaModel.TOP_CORNER_MASK
+        second_won = self._masks[1] & HalmaModel.BOTTOM_CORNER_MASK == HalmaModel.BOTTOM_CORNER_MASK
         if first_won and second_won:    # Actually impossible
             self._end(self._get_results(draw=True))
         else:
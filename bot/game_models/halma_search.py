@@ -0,0 +1,171 @@
+import time
+import random
+
+from game_models.halma import HalmaModel, HalmaMove
+
+
+def _create_zobrist_keys() -> tuple:
+    generator = random.Random(64)
+    return tuple(tuple(generator.getrandbits(64) for _ in range(64)) for _ in range(2))
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class HalmaSearchResult:
+    def __init__(self, move: HalmaMove, score: int, depth: int, node_count: int, think_time: float):
+        self.move = move    # None if there are no moves
+        self.score = score
+        self.depth = depth    # Last completely searched depth
+        self.node_count = node_count
+        self.think_time = think_time
+
+
+class HalmaSearch:
+    """
+    Iterative deepening negamax with alpha-beta pruning and a transposition table.
+    Positions are pairs of occupancy masks, a move is a pair of square indexes and moves the whole turn.
+    Search stops at [max_depth] or when [time_budget] seconds are spent, the last completed depth is used.
+    A random move is made with [random_move_rate] probability to weaken the play.
+    """
+
+    WIN_SCORE = 100000
+    ZOBRIST_KEYS = _create_zobrist_keys()
+    SIDE_KEY = random.Random(65).getrandbits(64)
+    DISTANCES = (tuple(i + j for i in range(8) for j in range(8)),    # To the goal of player 0
+                 tuple(14 - i - j for i in range(8) for j in range(8)))
+    GOAL_MASKS = (HalmaModel.TOP_CORNER_MASK, HalmaModel.BOTTOM_CORNER_MASK)
+    TIMEOUT_CHECK_INTERVAL = 1024    # In nodes
+
+    def __init__(self, max_depth: int, time_budget: float, random_move_rate: float = 0):
+        self._max_depth = max_depth
+        self._time_budget = time_budget
+        self._random_move_rate = random_move_rate
+        self._table = dict()    # Dict: [int position_hash] = (int depth, int score, int bound, tuple best_move)
+        self._node_count = 0
+        self._deadline = None
+
+    def search(self, masks: tuple, player_index: int) -> HalmaSearchResult:
+        start_time = time.monotonic()
+        self._deadline = start_time + self._time_budget
+        self._node_count = 0
+        self._table.clear()
+        masks = list(masks)
+        moves = HalmaSearch._generate_moves(masks, player_index)
+        if not len(moves):
+            return HalmaSearchResult(None, 0, 0, 0, time.monotonic() - start_time)
+        best_move, best_score, completed_depth = moves[0], 0, 0
+        if random.random() < self._random_move_rate:
+            best_move = random.choice(moves)
+        else:
+            position_hash = HalmaSearch._get_hash(masks, player_index)
+            distances = [HalmaSearch._get_distance(masks, 0), HalmaSearch._get_distance(masks, 1)]
+            for depth in range(1, self._max_depth + 1):
+                try:
+                    best_score = self._negamax(masks, player_index, position_hash, distances, depth,
+                                               -HalmaSearch.WIN_SCORE - 1, HalmaSearch.WIN_SCORE + 1)
+                except SearchTimeout:
+                    break
+                best_move, completed_depth = self._table[position_hash][3], depth
+                if abs(best_score) >= HalmaSearch.WIN_SCORE - self._max_depth:    # Forced result is found
+                    break
+        start, end = best_move
+        occupied = masks[0] | masks[1]
+        if HalmaModel.NEIGHBOUR_MASKS[start] >> end & 1:
+            move = HalmaMove(start, (end,))
+        else:
+            move = next(chain for chain in HalmaModel.generate_jump_chains(start, occupied ^ 1 << start)
+                        if chain.end == end)
+        return HalmaSearchResult(move, best_score, completed_depth, self._node_count, time.monotonic() - start_time)
+
+    def _negamax(self, masks: list, side: int, position_hash: int, distances: list, depth: int,
+                 alpha: int, beta: int) -> int:
+        self._node_count += 1
+        if self._node_count % HalmaSearch.TIMEOUT_CHECK_INTERVAL == 0 and time.monotonic() > self._deadline:
+            raise SearchTimeout()
+        opponent = side ^ 1
+        if masks[opponent] & HalmaSearch.GOAL_MASKS[opponent] == HalmaSearch.GOAL_MASKS[opponent]:
+            return -HalmaSearch.WIN_SCORE - depth    # Faster wins are preferred
+        if depth == 0:
+            return distances[opponent] - distances[side]
+        original_alpha = alpha
+        table_move = None
+        entry = self._table.get(position_hash)
+        if entry is not None:
+            table_depth, table_score, bound, table_move = entry
+            if table_depth >= depth:
+                if bound == 0 or bound < 0 and table_score <= alpha or bound > 0 and table_score >= beta:
+                    return table_score
+        moves = HalmaSearch._generate_moves(masks, side)
+        if not len(moves):
+            return distances[opponent] - distances[side]
+        side_distances = HalmaSearch.DISTANCES[side]
+        moves.sort(key=lambda item: side_distances[item[1]] - side_distances[item[0]])    # Most advancing first
+        if table_move is not None and table_move in moves:
+            moves.remove(table_move)
+            moves.insert(0, table_move)
+        zobrist_keys = HalmaSearch.ZOBRIST_KEYS[side]
+        best_score, best_move = None, None
+        pieces = masks[side]
+        side_distance = distances[side]
+        for move in moves:
+            start, end = move
+            masks[side] = pieces ^ (1 << start | 1 << end)
+            distances[side] = side_distance + side_distances[end] - side_distances[start]
+            child_hash = position_hash ^ zobrist_keys[start] ^ zobrist_keys[end] ^ HalmaSearch.SIDE_KEY
+            try:
+                score = -self._negamax(masks, opponent, child_hash, distances, depth - 1, -beta, -alpha)
+            finally:
+                masks[side], distances[side] = pieces, side_distance
+            if best_score is None or score > best_score:
+                best_score, best_move = score, move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+        bound = 0
+        if best_score <= original_alpha:
+            bound = -1    # Upper bound
+        elif best_score >= beta:
+            bound = 1    # Lower bound
+        self._table[position_hash] = (depth, best_score, bound, best_move)
+        return best_score
+
+    @staticmethod
+    def _generate_moves(masks: list, side: int) -> list:    # List of (int start, int end)
+        moves = []
+        occupied = masks[0] | masks[1]
+        pieces = masks[side]
+        while pieces:
+            piece = pieces & -pieces
+            pieces ^= piece
+            start = piece.bit_length() - 1
+            targets = HalmaModel.NEIGHBOUR_MASKS[start] & ~occupied \
+                | HalmaModel.get_jump_reachable_mask(start, occupied ^ piece)
+            while targets:
+                target = targets & -targets
+                targets ^= target
+                moves.append((start, target.bit_length() - 1))
+        return moves
+
+    @staticmethod
+    def _get_distance(masks: list, side: int) -> int:
+        distance = 0
+        for index in range(64):
+            if masks[side] >> index & 1:
+                distance += HalmaSearch.DISTANCES[side][index]
+        return distance
+
+    @staticmethod
+    def _get_hash(masks: list, side: int) -> int:
+        position_hash = HalmaSearch.SIDE_KEY if side else 0
+        for color in (0, 1):
+            for index in range(64):
+                if masks[color] >> index & 1:
+                    position_hash ^= HalmaSearch.ZOBRIST_KEYS[color][index]
+        return position_hash
+
+
+def search_move(max_depth: int, time_budget: float, random_move_rate: float, masks: tuple,
+                player_index: int) -> HalmaSearchResult:    # Picklable entry point for other processes
+    return HalmaSearch(max_depth, time_budget, random_move_rate).search(masks, player_index)
@@ -3,41 +3,24 @@ from game_models.game_model import GameModel
 from game_models.game_result import MemoryResult
 
 
-class MemoryCard:
-    def __init__(self, value: int):
-        self.is_removed = False
-        self.is_hidden = True
-        self.value = value
-
-    def try_remove(self) -> bool:
-        if self.is_removed:
-            return False
-        self.is_removed = True
-        return True
-
-    def try_show(self) -> bool:
-        if self.is_removed or not self.is_hidden:
-            return False
-        self.is_hidden = False
-        return True
+class MemoryBoard:
+    """
+    Card values and states are stored in flat byte buffers, card (i, j) has index i * columns + j.
+    """
 
-    def try_hide(self) -> bool:
-        if self.is_removed or self.is_hidden:
-            return False
-        self.is_hidden = True
-        return True
+    HIDDEN = 0
+    SHOWN = 1
+    REMOVED = 2
 
+    __slots__ = ('values', 'states', 'rows', 'columns', 'variety')
 
-class MemoryBoard:
-    def __init__(self, values, rows=None, columns=None, variety=None):
-        self._board = [[MemoryCard(v) for v in row] for row in values]
+    def __init__(self, values: bytes, rows: int, columns: int, variety: int = None):
+        self.values = bytes(values)
+        self.states = bytearray(len(values))    # HIDDEN, SHOWN, REMOVED
         self.rows = rows
         self.columns = columns
         self.variety = variety
 
-    def __getitem__(self, index_pair) -> MemoryCard:
-        return self._board[index_pair[0]][index_pair[1]]
-
     @property
     def size(self) -> int:
         return self.rows * self.columns
@@ -46,19 +29,20 @@ class MemoryBoard:
     def create_random(rows: int, columns: int, variety: int):
         cards = [(i // 2) % variety for i in range(rows * columns)]
         random.shuffle(cards)
-        values = [[cards[i * columns + j] for j in range(columns)] for i in range(rows)]
-        return MemoryBoard(values, rows, columns, variety)
+        return MemoryBoard(cards, rows, columns, variety)
 
 
 class MemoryModel(GameModel):
     PLAYER_COUNT = 1
 
+    __slots__ = ('_board', '_selected', '_pending', '_pending_state', '_move_count', '_removed_count')
+
     def __init__(self, rows: int, columns: int, variety: int):
         super().__init__()
         self._board = MemoryBoard.create_random(rows, columns, variety)
-        self._selected = None
-        self._cards_to_remove = []
-        self._cards_to_hide = []
+        self._selected = None    # Index of the first shown card
+        self._pending = ()    # Indexes of shown pair, which is removed or hidden on the next selection
+        self._pending_state = MemoryBoard.HIDDEN
         self._move_count = 0
         self._removed_count = 0
 
@@ -71,24 +55,26 @@ class MemoryModel(GameModel):
         return self._removed_count
 
     def try_select(self, row_id: int, column_id: int) -> bool:
-        for card in self._cards_to_remove:
-            card.try_remove()
-        self._cards_to_remove.clear()
-        for card in self._cards_to_hide:
-            card.try_hide()
-        self._cards_to_hide.clear()
-        card = self._board[row_id, column_id]
-        if not card.try_show():
+        states = self._board.states
+        for index in self._pending:
+            states[index] = self._pending_state
+        self._pending = ()
+        if not 0 <= row_id < self._board.rows or not 0 <= column_id < self._board.columns:
+            return False
+        index = row_id * self._board.columns + column_id
+        if states[index] != MemoryBoard.HIDDEN:
             return False
+        states[index] = MemoryBoard.SHOWN
         self._move_count += 1
         if self._selected is None:
-            self._selected = card
+            self._selected = index
         else:
-            if card.value == self._selected.value:
-                self._cards_to_remove.extend([card, self._selected])
+            self._pending = (self._selected, index)
+            if self._board.values[index] == self._board.values[self._selected]:
+                self._pending_state = MemoryBoard.REMOVED
                 self._removed_count += 2
             else:
-                self._cards_to_hide.extend([card, self._selected])
+                self._pending_state = MemoryBoard.HIDDEN
             self._selected = None
         if self._removed_count == self._board.size:
             self._end(self._get_results())
@@ -97,5 +83,24 @@ class MemoryModel(GameModel):
     def get_board(self) -> MemoryBoard:
         return self._board
 
+    def get_snapshot(self) -> tuple:
+        board = self._board
+        return (board.rows, board.columns, board.variety, board.values, bytes(board.states), self._selected,
+                self._pending, self._pending_state, self._move_count, self._removed_count)
+
+    @staticmethod
+    def from_snapshot(snapshot: tuple):
+        rows, columns, variety, values, states, selected, pending, pending_state, move_count, removed_count = snapshot
+        model = MemoryModel.__new__(MemoryModel)    # The board is not generated
+        GameModel.__init__(model)
+        model._board = MemoryBoard(values, rows, columns, variety)
+        model._board.states[:] = states
+        model._selected = selected
+        model._pending = pending
+        model._pending_state = pending_state
+        model._move_count = move_count
+        model._removed_count = removed_count
+        return model
+
     def _get_results(self) -> list:
         return [MemoryResult(self.move_count)]
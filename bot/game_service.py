@@ -1,28 +1,54 @@
 import time
-from threading import Thread, Lock, Event
-from collections import deque
+import random
+import asyncio
+from threading import Thread, Lock, Event, Condition
 
-from game_service_bot import GameServiceBot
+from game_service_bot import GameServiceBot, AsyncGameServiceBot
 from utils.async_executor import BlockingLimitedExecutor
 from utils.single_access_dict import SingleAccessDict
+from utils.timer_service import TimerService, AsyncTimerService
 from multiplayer_provider import MultiplayerProvider, PlayerConnection
 from utils.logger import StaticLogger
-from call import Call
-from player import Player
+from utils.log_types import ExceptionLog, WarningLog
+from bot_opponent import BotOpponent, BotOpponentStats
+from data import content
+from call import Call, BotCall, TimerCall
+from player import Player, BotPlayer
 from game import Game
+from game_snapshots import GameSnapshots
+from data.results_store import ResultsStore
 from game_models.models_enum import GameModels
 from game_models.memory import MemoryModel
 from game_models.halma import HalmaModel
 
 
 class GameService:
-    def __init__(self, bot: GameServiceBot, max_workers: int):
+    """
+    Games are processed by calls added to their mailboxes, which are scheduled for the executor.
+    Timers add calls to the mailboxes as well: turn clocks of timed games and idle checks,
+    which cancel games without player calls for [idle-timeout] seconds of the game setup.
+    If [snapshot_path] is specified, active games are saved there on stop instead of being canceled
+    and restored on the next start. Results of ended games are added to [results_store] if specified.
+    """
+
+    MATCHMAKING_INTERVAL = 1    # In seconds, waiting connections are matched over time and expired this often
+    MAX_REJECTED_BOT_MOVES = 3    # In a row, then the bot ends its turn or makes a random move instead
+
+    def __init__(self, bot: GameServiceBot, max_workers: int, bot_opponent: BotOpponent = None,
+                 snapshot_path: str = None, results_store: ResultsStore = None):
         self._bot = bot
+        self._bot_opponent = bot_opponent    # Games with bots are not available if not specified
+        self._snapshot_path = snapshot_path
+        self._results_store = results_store
+        self._thinking_game_keys = set()    # Games waiting for a bot move
         self._executor = BlockingLimitedExecutor(max_workers)
-        self._multiplayer_provider = MultiplayerProvider()
+        self._multiplayer_provider = MultiplayerProvider(self._schedule_group)
+        self._timers = TimerService()
         self._active_games = SingleAccessDict()
-        self._call_groups = dict()    # Dict: [game.uid] = deque of CallInfo
-        self._call_groups_lock = Lock()
+        self._schedule_condition = Condition()
+        self._scheduled_game_keys = set()
+        self._scheduled_groups = []    # Tuples of (GameModels game_model, list connections)
+        self._matchmaking_scheduled = False
         self._stop_lock = Lock()
         self._stopped_event = Event()
         self._stopped_event.set()
@@ -36,17 +62,27 @@ class GameService:
     def is_active(self):
         return not (self._is_stopping or self._stopped_event.is_set())
 
+    @property
+    def bot_opponent_stats(self) -> BotOpponentStats:
+        return None if self._bot_opponent is None else self._bot_opponent.stats
+
     @StaticLogger.exception_logged
-    def start(self):
+    def start(self, find_player=Player):    # [find_player] provides players of restored games by (user_id, lang)
         self._stopped_event.wait()
         with self._stop_lock:
             self._stopped_event.clear()
+            self._timers.start()
+            self._timers.schedule(GameService.MATCHMAKING_INTERVAL, self._schedule_matchmaking)
+            for game in self._load_snapshots(self._snapshot_path, find_player):
+                self._resume_game(game)
             Thread(target=self._process_forever).start()
 
     @StaticLogger.exception_logged
     def stop(self):
         with self._stop_lock:
             self._is_stopping = True
+            with self._schedule_condition:
+                self._schedule_condition.notify()
             self._stopped_event.wait()
 
     @StaticLogger.exception_logged
@@ -59,98 +95,185 @@ class GameService:
             self._multiplayer_provider.try_disconnect(GameModels.from_key(call.args['game-key']),
                                                       PlayerConnection(player, call))
             self._bot.update_connection_status(player, call)
+        if call.args['action'] == 'connect-bot' and self._bot_opponent is not None and self.is_active:
+            self._start_game(self._create_bot_game(player, call))
 
     @StaticLogger.exception_logged
     def add_game_call(self, call: Call):
-        with self._call_groups_lock:
-            try:
-                self._call_groups[call.args['game-id']].append(call)
-            except KeyError:
-                pass
-                # self._bot.delete_call_message(call)
+        game = self._active_games.get(call.args['game-id'])
+        if game is None:
+            return
+            # self._bot.delete_call_message(call)
+        game.add_call(call)
+        self._schedule_game(game.uid)
+
+    def _schedule_game(self, key: str):
+        with self._schedule_condition:
+            self._scheduled_game_keys.add(key)
+            self._schedule_condition.notify()
+
+    def _schedule_group(self, game_model: GameModels, connections: list):
+        with self._schedule_condition:
+            self._scheduled_groups.append((game_model, connections))
+            self._schedule_condition.notify()
+
+    def _schedule_matchmaking(self):
+        with self._schedule_condition:
+            self._matchmaking_scheduled = True
+            self._schedule_condition.notify()
 
     @StaticLogger.exception_logged
     def _process_forever(self):
         while True:
-            if self._is_stopping:
-                self._clear_all()
-                break
-            self._executor.execute(self._handle_connections)
-            keys = self._active_games.stored_keys
+            with self._schedule_condition:
+                while not (self._is_stopping or self._scheduled_groups or self._scheduled_game_keys
+                           or self._matchmaking_scheduled):
+                    self._schedule_condition.wait()
+                if self._is_stopping:
+                    break
+                update_matchmaking, self._matchmaking_scheduled = self._matchmaking_scheduled, False
+                groups, self._scheduled_groups = self._scheduled_groups, []
+                keys, self._scheduled_game_keys = self._scheduled_game_keys, set()
+            if update_matchmaking:
+                self._timers.schedule(GameService.MATCHMAKING_INTERVAL, self._schedule_matchmaking)
+                self._executor.execute(self._update_matchmaking)
+            if len(groups):
+                self._executor.execute(self._handle_groups, groups)
             for key in keys:
                 game = self._active_games.acquire_by_key(key, wait=False)
-                if game is not None:
+                if game is not None:    # Otherwise the game is being processed and will be rescheduled on release
                     self._executor.execute(self._process_game, game)
+        self._clear_all()
 
     @StaticLogger.exception_logged
     def _clear_all(self):
+        self._timers.stop()
         time.sleep(0.5)  # Catching lost tasks (requested but not started)
         while self._executor.is_busy:
             time.sleep(0.2)
-        for connection in self._multiplayer_provider.get_all_connections():
+        connections = self._multiplayer_provider.pop_all_connections()
+        with self._schedule_condition:
+            groups, self._scheduled_groups = self._scheduled_groups, []
+        for game_model, group in groups:
+            connections.extend(group)
+        for connection in connections:
             self._bot.disconnect(connection.player, connection.call)
-        self._multiplayer_provider.clear()
-        keys = self._active_games.stored_keys
-        for key in keys:
-            game = self._active_games.acquire_by_key(key)
-            if game is not None:
+        games = [self._active_games.acquire_by_key(key) for key in self._active_games.stored_keys]
+        games = [game for game in games if game is not None]
+        if self._save_snapshots(self._snapshot_path, games):
+            for game in games:
+                self._remove_active_game(game)
+        else:
+            for game in games:
                 self._executor.execute(self._cancel_acquired_active_game, game, 'bot-stopped')
+        while self._executor.is_busy:
+            time.sleep(0.2)
+        self._bot.flush()
         self._stopped_event.set()
 
     @StaticLogger.exception_logged
     def _process_game(self, game):
-        with self._call_groups_lock:
-            calls = self._call_groups[game.uid].copy()
-            self._call_groups[game.uid].clear()
         while True:
-            try:
-                call = calls.popleft()
-            except IndexError:
+            call = game.pop_call()
+            if call is None:
                 break
-            if game.model_type is GameModels.MEMORY:
-                a, b = int(call.args['a']), int(call.args['b'])
-                if game.model.try_select(a, b):
-                    self._bot.display_game_state(game)
-            if game.model_type is GameModels.HALMA:
-                if call.args['action'] == 'end-turn':
-                    if game.model.try_end_turn(int(call.args['p'])):
-                        self._bot.display_game_state(game)
-                if call.args['action'] == 'click':
-                    player_index, a, b = int(call.args['p']), int(call.args['a']), int(call.args['b'])
-                    if game.model.try_click(player_index, a, b):
-                        self._bot.display_game_state(game)
+            if isinstance(call, TimerCall) and call.args['action'] == 'idle-check':
+                if self._check_idle(game):
+                    break
+                continue
+            if isinstance(call, BotCall):
+                self._thinking_game_keys.discard(game.uid)
+            elif not isinstance(call, TimerCall):
+                game.last_action_time = time.monotonic()
+            if self._apply_call(game, call) or self._apply_rejected_bot_call(game, call):
+                if game.is_ended:    # Recorded before the final state is displayed with rating changes
+                    self._record_results(game)
+                self._bot.display_game_state(game)
             if game.model.is_ended:
                 self._remove_active_game(game)
+        self._request_bot_move(game)
+        self._request_turn_clock(game)
         self._active_games.release_by_key(game.uid)    # Multiple release is possible, but it's OK
+        if game.has_calls:    # Calls added while the game was being processed
+            self._schedule_game(game.uid)
 
     @StaticLogger.exception_logged
-    def _handle_connections(self):
-        while True:
-            connections = self._multiplayer_provider.pop_group(GameModels.MEMORY)
-            if connections is None:
-                break
-            player, call = connections[0].player, connections[0].call
-            model = MemoryModel(int(call.args['h']), int(call.args['w']), int(call.args['variety']))
-            game = Game(model, [player])
-            game.set_message(0, call.message)
-            self._start_game(game)
-        while True:
-            connections = self._multiplayer_provider.pop_group(GameModels.HALMA)
-            if connections is None:
-                break
-            model = HalmaModel()
-            game = Game(model, [connection.player for connection in connections])
-            for i in range(len(connections)):
-                connection = connections[i]
-                game.set_message(i, connection.call.message)
-            self._start_game(game)
+    def _update_matchmaking(self):
+        for connection in self._multiplayer_provider.update():
+            self._bot.expire_connection(connection.player, connection.call)
+
+    @StaticLogger.exception_logged
+    def _handle_groups(self, groups: list):
+        for game_model, connections in groups:
+            self._start_game(self._create_game(game_model, connections))
 
     @StaticLogger.exception_logged
     def _start_game(self, game):
-        with self._call_groups_lock:
-            self._call_groups[game.uid] = deque()
         self._active_games.add(game.uid, game)
         self._bot.display_game_state(game)
+        self._request_bot_move(game)
+        self._request_turn_clock(game)
+        game.idle_timer = self._timers.schedule(self._get_remaining_idle_time(game), self.add_game_call,
+                                                self._create_timer_call(game, 'idle-check'))
+
+    def _resume_game(self, game: Game):    # Messages of a restored game are already displayed
+        self._active_games.add(game.uid, game)
+        self._request_bot_move(game)
+        self._request_turn_clock(game)
+        game.idle_timer = self._timers.schedule(self._get_remaining_idle_time(game), self.add_game_call,
+                                                self._create_timer_call(game, 'idle-check'))
+
+    def _request_turn_clock(self, game: Game):
+        turn_number = self._get_untimed_turn_number(game)
+        if turn_number is None:
+            return
+        game.timed_turn_number = turn_number
+        if game.turn_timer is not None:    # The clock of the previous turn
+            game.turn_timer.cancel()
+        game.turn_timer = self._timers.schedule(game.model.turn_time, self.add_game_call,
+                                                self._create_timer_call(game, 'turn-timeout', turn=turn_number))
+
+    def _check_idle(self, game: Game) -> bool:    # Returns True if the idle game is canceled
+        remaining_time = self._get_remaining_idle_time(game)
+        if remaining_time > 0:
+            game.idle_timer = self._timers.schedule(remaining_time, self.add_game_call,
+                                                    self._create_timer_call(game, 'idle-check'))
+            return False
+        game.model.cancel()
+        self._cancel_acquired_active_game(game, 'timeout')
+        return True
+
+    @StaticLogger.exception_logged
+    def _record_results(self, game: Game):
+        if self._results_store is not None:
+            self._results_store.add_game(game)
+
+    def _request_bot_move(self, game: Game):
+        player_index = self._get_thinking_bot_index(game)
+        if player_index is None or game.uid in self._thinking_game_keys:
+            return
+        self._thinking_game_keys.add(game.uid)
+        try:
+            future = self._bot_opponent.submit(game, player_index)
+        except Exception as e:    # The game waits, the bot is asked again after the next call
+            self._thinking_game_keys.discard(game.uid)
+            StaticLogger.logger.add_log(ExceptionLog(e, func_name='BotOpponent.submit'))
+            return
+        future.add_done_callback(lambda done_future: self._add_bot_move(game, player_index, done_future))
+
+    @StaticLogger.exception_logged
+    def _add_bot_move(self, game: Game, player_index: int, future):
+        move = None
+        try:
+            if future.exception() is not None:
+                StaticLogger.logger.add_log(ExceptionLog(future.exception(), func_name='BotOpponent.submit'))
+            else:
+                move = future.result()
+        finally:
+            if move is None:    # No move, the game waits
+                self._thinking_game_keys.discard(game.uid)
+        if move is not None:
+            self.add_game_call(self._create_bot_call(game, player_index, move))
 
     @StaticLogger.exception_logged
     def _cancel_acquired_active_game(self, game, cause=None):
@@ -162,6 +285,311 @@ class GameService:
         if not acquired:
             if self._active_games.acquire_by_key(game.uid) is None:
                 return
-        with self._call_groups_lock:
-            self._call_groups.pop(game.uid)
         self._active_games.release_by_key(game.uid, remove=True)
+        self._thinking_game_keys.discard(game.uid)    # A bot move found later is not added to the removed game
+        self._cancel_timers(game)
+
+    @staticmethod
+    def _apply_call(game: Game, call: Call) -> bool:    # Returns True if the game state is changed
+        if game.model_type is GameModels.MEMORY:
+            if call.args['action'] == 'click':
+                return game.model.try_select(call.args['a'], call.args['b'])
+        if game.model_type is GameModels.HALMA:
+            if call.args['action'] == 'bot-move' and isinstance(call, BotCall):
+                if not game.model.try_move(call.args['p'], call.args['move']):
+                    return False
+                game.rejected_bot_move_count = 0
+                return True
+            if call.args['action'] == 'turn-timeout' and isinstance(call, TimerCall):
+                return game.model.try_time_out(call.args['turn'])
+            if call.args['action'] == 'end-turn':
+                return game.model.try_end_turn(call.args['p'])
+            if call.args['action'] == 'click':
+                player_index, a, b = call.args['p'], call.args['a'], call.args['b']
+                return game.model.try_click(player_index, a, b)
+        return False
+
+    @staticmethod
+    def _apply_rejected_bot_call(game: Game, call: Call) -> bool:    # Returns True if a fallback move is made
+        if not isinstance(call, BotCall):
+            return False
+        player_index = call.args['p']
+        if GameService._get_thinking_bot_index(game) != player_index:    # Stale move, the bot is not asked again
+            return False
+        game.rejected_bot_move_count += 1
+        if game.rejected_bot_move_count < GameService.MAX_REJECTED_BOT_MOVES:
+            return False
+        StaticLogger.logger.add_log(WarningLog('Bot moves are rejected, a fallback move is made', game_id=game.uid,
+                                               count=game.rejected_bot_move_count))
+        game.rejected_bot_move_count = 0
+        if game.model.try_end_turn(player_index):
+            return True
+        moves = game.model.generate_moves(player_index)
+        return len(moves) > 0 and game.model.try_move(player_index, random.choice(moves))
+
+    @staticmethod
+    def _save_snapshots(snapshot_path: str, games: list) -> bool:    # Returns False if the games are not saved
+        if snapshot_path is None:
+            return False
+        try:
+            GameSnapshots.save(snapshot_path, games)
+            return True
+        except Exception as e:
+            StaticLogger.logger.add_log(ExceptionLog(e, func_name='GameSnapshots.save'))
+            return False
+
+    @staticmethod
+    def _load_snapshots(snapshot_path: str, find_player) -> list:
+        if snapshot_path is None:
+            return []
+        try:
+            return GameSnapshots.load(snapshot_path, find_player)
+        except Exception as e:
+            StaticLogger.logger.add_log(ExceptionLog(e, func_name='GameSnapshots.load'))
+            return []
+
+    @staticmethod
+    def _create_game(game_model: GameModels, connections: list) -> Game:
+        model = None
+        if game_model is GameModels.MEMORY:
+            call = connections[0].call
+            model = MemoryModel(call.args['h'], call.args['w'], call.args['variety'])
+        if game_model is GameModels.HALMA:
+            model = HalmaModel(content.game_setup[GameModels.HALMA.key].get('turn-time'))
+        game = Game(model, [connection.player for connection in connections])
+        for i in range(len(connections)):
+            game.set_message(i, connections[i].call.message)
+        return game
+
+    @staticmethod
+    def _create_bot_game(player: Player, call: Call) -> Game:    # The player moves first
+        game = Game(HalmaModel(content.game_setup[GameModels.HALMA.key].get('turn-time')),
+                    [player, BotPlayer(call.args['level'])])
+        game.set_message(0, call.message)
+        return game
+
+    @staticmethod
+    def _get_thinking_bot_index(game: Game) -> int:    # Returns None if no bot has to move
+        if game.is_ended or game.model_type is not GameModels.HALMA or not game.players[game.model.turn].is_bot:
+            return None
+        return game.model.turn
+
+    @staticmethod
+    def _create_bot_call(game: Game, player_index: int, move) -> BotCall:
+        return BotCall({'action': 'bot-move', 'game-id': game.uid, 'p': player_index, 'move': move})
+
+    @staticmethod
+    def _get_untimed_turn_number(game: Game) -> int:    # Returns None if the current turn needs no clock to start
+        if game.is_ended or game.model_type is not GameModels.HALMA or game.model.turn_time is None \
+                or game.timed_turn_number == game.model.turn_number:
+            return None
+        return game.model.turn_number
+
+    @staticmethod
+    def _cancel_timers(game: Game):    # Timers of a removed game would find nothing to do
+        for timer in (game.turn_timer, game.idle_timer):
+            if timer is not None:
+                timer.cancel()
+
+    @staticmethod
+    def _get_remaining_idle_time(game: Game) -> float:    # The game is idle if it's not positive
+        return content.game_setup[game.model_type.key]['idle-timeout'] - (time.monotonic() - game.last_action_time)
+
+    @staticmethod
+    def _create_timer_call(game: Game, action: str, **args) -> TimerCall:
+        return TimerCall({'action': action, 'game-id': game.uid, **args})
+
+
+class AsyncGameService:
+    """
+    Coroutine variant of GameService.
+    Runs on a single event loop: every game with pending calls is processed by its own task.
+    """
+
+    def __init__(self, bot: AsyncGameServiceBot, bot_opponent: BotOpponent = None, snapshot_path: str = None,
+                 results_store: ResultsStore = None):
+        self._bot = bot
+        self._bot_opponent = bot_opponent    # Games with bots are not available if not specified
+        self._snapshot_path = snapshot_path    # Active games are saved on stop and restored on start if specified
+        self._results_store = results_store    # Results are not recorded if not specified
+        self._thinking_game_keys = set()
+        self._multiplayer_provider = MultiplayerProvider(self._schedule_group)
+        self._timers = AsyncTimerService()
+        self._active_games = dict()    # Dict: [game.uid] = Game game
+        self._processed_game_keys = set()
+        self._tasks = set()
+        self._is_started = False
+        self._is_stopping = False
+
+    @property
+    def active_game_count(self):
+        return len(self._active_games)
+
+    @property
+    def is_active(self):
+        return self._is_started and not self._is_stopping
+
+    @property
+    def bot_opponent_stats(self) -> BotOpponentStats:
+        return None if self._bot_opponent is None else self._bot_opponent.stats
+
+    def start(self, find_player=Player):    # [find_player] provides players of restored games by (user_id, lang)
+        self._is_started = True
+        self._timers.start()
+        self._timers.schedule(GameService.MATCHMAKING_INTERVAL, self._schedule_matchmaking)
+        for game in GameService._load_snapshots(self._snapshot_path, find_player):
+            self._resume_game(game)
+
+    @StaticLogger.exception_logged
+    async def stop(self):
+        self._is_stopping = True
+        self._timers.stop()
+        while len(self._tasks):
+            await asyncio.wait(list(self._tasks))
+        for connection in self._multiplayer_provider.pop_all_connections():
+            await self._bot.disconnect(connection.player, connection.call)
+        games = list(self._active_games.values())
+        if not GameService._save_snapshots(self._snapshot_path, games):
+            for game in games:
+                await self._bot.cancel_game(game, 'bot-stopped')
+        self._active_games.clear()
+        await self._bot.flush()
+        self._is_started = False
+
+    @StaticLogger.exception_logged
+    async def handle_connecting_call(self, player: Player, call: Call):
+        if call.args['action'] == 'connect':
+            if self._multiplayer_provider.try_connect(GameModels.from_key(call.args['game-key']),
+                                                      PlayerConnection(player, call)):
+                await self._bot.update_connection_status(player, call)
+        if call.args['action'] == 'disconnect':
+            self._multiplayer_provider.try_disconnect(GameModels.from_key(call.args['game-key']),
+                                                      PlayerConnection(player, call))
+            await self._bot.update_connection_status(player, call)
+        if call.args['action'] == 'connect-bot' and self._bot_opponent is not None and self.is_active:
+            await self._start_game(GameService._create_bot_game(player, call))
+
+    @StaticLogger.exception_logged
+    def add_game_call(self, call: Call):
+        game = self._active_games.get(call.args['game-id'])
+        if game is None or self._is_stopping:
+            return
+        game.add_call(call)
+        self._schedule_game(game)
+
+    def _schedule_game(self, game: Game):
+        if game.uid not in self._processed_game_keys:
+            self._processed_game_keys.add(game.uid)
+            self._create_task(self._process_game(game))
+
+    def _schedule_group(self, game_model: GameModels, connections: list):
+        self._create_task(self._handle_group(game_model, connections))
+
+    def _schedule_matchmaking(self):
+        self._timers.schedule(GameService.MATCHMAKING_INTERVAL, self._schedule_matchmaking)
+        self._create_task(self._update_matchmaking())
+
+    def _create_task(self, coroutine):
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @StaticLogger.exception_logged
+    async def _process_game(self, game: Game):
+        try:
+            while True:
+                call = game.pop_call()
+                if call is None:
+                    break
+                if isinstance(call, TimerCall) and call.args['action'] == 'idle-check':
+                    if await self._check_idle(game):
+                        break
+                    continue
+                if isinstance(call, BotCall):
+                    self._thinking_game_keys.discard(game.uid)
+                elif not isinstance(call, TimerCall):
+                    game.last_action_time = time.monotonic()
+                if GameService._apply_call(game, call) or GameService._apply_rejected_bot_call(game, call):
+                    if game.is_ended:    # Recorded before the final state is displayed with rating changes
+                        self._record_results(game)
+                    await self._bot.display_game_state(game)
+                if game.model.is_ended:
+                    self._active_games.pop(game.uid, None)
+                    GameService._cancel_timers(game)
+            self._request_bot_move(game)
+            self._request_turn_clock(game)
+        finally:
+            self._processed_game_keys.discard(game.uid)
+
+    async def _check_idle(self, game: Game) -> bool:    # Returns True if the idle game is canceled
+        remaining_time = GameService._get_remaining_idle_time(game)
+        if remaining_time > 0:
+            game.idle_timer = self._timers.schedule(remaining_time, self.add_game_call,
+                                                    GameService._create_timer_call(game, 'idle-check'))
+            return False
+        game.model.cancel()
+        self._active_games.pop(game.uid, None)
+        GameService._cancel_timers(game)
+        await self._bot.cancel_game(game, 'timeout')
+        return True
+
+    @StaticLogger.exception_logged
+    async def _update_matchmaking(self):
+        for connection in self._multiplayer_provider.update():
+            await self._bot.expire_connection(connection.player, connection.call)
+
+    @StaticLogger.exception_logged
+    async def _handle_group(self, game_model: GameModels, connections: list):
+        if self._is_stopping:
+            for connection in connections:
+                await self._bot.disconnect(connection.player, connection.call)
+            return
+        await self._start_game(GameService._create_game(game_model, connections))
+
+    async def _start_game(self, game: Game):
+        self._active_games[game.uid] = game
+        await self._bot.display_game_state(game)
+        self._request_bot_move(game)
+        self._request_turn_clock(game)
+        game.idle_timer = self._timers.schedule(GameService._get_remaining_idle_time(game), self.add_game_call,
+                                                GameService._create_timer_call(game, 'idle-check'))
+
+    def _resume_game(self, game: Game):    # Messages of a restored game are already displayed
+        self._active_games[game.uid] = game
+        self._request_bot_move(game)
+        self._request_turn_clock(game)
+        game.idle_timer = self._timers.schedule(GameService._get_remaining_idle_time(game), self.add_game_call,
+                                                GameService._create_timer_call(game, 'idle-check'))
+
+    def _request_turn_clock(self, game: Game):
+        turn_number = GameService._get_untimed_turn_number(game)
+        if turn_number is None:
+            return
+        game.timed_turn_number = turn_number
+        if game.turn_timer is not None:    # The clock of the previous turn
+            game.turn_timer.cancel()
+        game.turn_timer = self._timers.schedule(game.model.turn_time, self.add_game_call,
+                                                GameService._create_timer_call(game, 'turn-timeout', turn=turn_number))
+
+    @StaticLogger.exception_logged
+    def _record_results(self, game: Game):
+        if self._results_store is not None:
+            self._results_store.add_game(game)
+
+    def _request_bot_move(self, game: Game):
+        player_index = GameService._get_thinking_bot_index(game)
+        if player_index is None or game.uid in self._thinking_game_keys or self._is_stopping:
+            return
+        self._thinking_game_keys.add(game.uid)
+        self._create_task(self._add_bot_move(game, player_index))
+
+    @StaticLogger.exception_logged
+    async def _add_bot_move(self, game: Game, player_index: int):
+        move = None
+        try:
+            move = await asyncio.wrap_future(self._bot_opponent.submit(game, player_index))
+        finally:
+            if move is None or self._is_stopping:    # No move, the game waits
+                self._thinking_game_keys.discard(game.uid)
+        if move is not None and not self._is_stopping:
+            self.add_game_call(GameService._create_bot_call(game, player_index, move))
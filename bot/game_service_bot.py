@@ -2,11 +2,12 @@ from message_schemes.game_schemes import *
 from message_schemes.menu_schemes import GameMenu
 from utils.logger import StaticLogger
 from data import content
-from chat_bot import ChatBot
+from chat_bot import ChatBot, AsyncChatBot
 from call import Call
 from player import Player
 from game import Game
 from game_models.models_enum import GameModels
+from outbound_dispatcher import Priority
 
 
 class GameServiceBot:
@@ -15,13 +16,9 @@ class GameServiceBot:
 
     @StaticLogger.exception_logged
     def update_connection_status(self, player: Player, call: Call):
-        if GameModels.from_key(call.args['game-key']).value.PLAYER_COUNT == 1:
+        scheme = self._get_connection_status_scheme(player, call)
+        if scheme is None:
             return
-        scheme = None
-        if call.args['action'] == 'connect':
-            scheme = OpponentSearch(player, call.args)
-        if call.args['action'] == 'disconnect':
-            scheme = GameMenu(player, call.args)
         message = call.message
         scheme.paste_to_message(message)
         self._bot.update_message(message)
@@ -33,22 +30,26 @@ class GameServiceBot:
         scheme.paste_to_message(message)
         self._bot.update_message(message)
 
+    @StaticLogger.exception_logged
+    def expire_connection(self, player: Player, call: Call):
+        scheme = OpponentSearchTimeout(player, call.args)
+        message = call.message
+        scheme.paste_to_message(message)
+        self._bot.update_message(message)
+
     @StaticLogger.exception_logged
     def display_game_state(self, game: Game, target_player_index: int = None):
         for player_index in range(game.player_count):
-            if target_player_index is not None and player_index != target_player_index:
+            if target_player_index is not None and player_index != target_player_index \
+                    or game.players[player_index].is_bot:
                 continue
-            scheme = None
-            if game.model_type == GameModels.MEMORY:
-                scheme = MemoryMain(game)
-            if game.model_type == GameModels.HALMA:
-                scheme = HalmaMain(game, player_index)
+            scheme = self._get_main_scheme(game, player_index)
             if game.message_is_set(player_index, 'main'):
                 message = game.messages[player_index]['main']
                 scheme.paste_to_message(message)
-                self._bot.update_message(message)
+                self._bot.update_message(message, Priority.GAME)
             else:
-                self._bot.send_message(game.players[player_index], scheme)
+                self._bot.send_message(game.players[player_index], scheme, Priority.GAME)
         if game.is_ended:
             self.end_game(game)
 
@@ -60,6 +61,8 @@ class GameServiceBot:
     def end_game(self, game: Game):
         for player_index in range(game.player_count):
             player = game.players[player_index]
+            if player.is_bot:
+                continue
             for message in game.messages[player_index].values():
                 if game.model_type in Game.DELETE_MESSAGES_WHEN_ENDED:
                     self._bot.delete_message(message)
@@ -67,18 +70,16 @@ class GameServiceBot:
                     scheme = MessageScheme(content.get_text(player.lang, 'game', 'ended'))
                     scheme.paste_to_message(message)
                     self._bot.update_message(message)
-            scheme = None
-            if game.model_type == GameModels.MEMORY:
-                scheme = MemoryFinal(game)
-            if game.model_type == GameModels.HALMA:
-                scheme = HalmaFinal(game, player_index)
-            self._bot.send_message(player, scheme)
+                    self._bot.forget_message(message)
+            self._bot.send_message(player, self._get_final_scheme(game, player_index))
             self._bot.send_message(player, GameMenu(player, {'game-key': game.model_type.key}))
 
     @StaticLogger.exception_logged
     def cancel_game(self, game: Game, cause_key: str = None):
         for player_index in range(game.player_count):
             player = game.players[player_index]
+            if player.is_bot:
+                continue
             text = content.get_text(player.lang, 'game', 'canceled')
             for message in game.messages[player_index].values():
                 if game.model_type in Game.DELETE_MESSAGES_WHEN_ENDED:
@@ -87,8 +88,136 @@ class GameServiceBot:
                     scheme = MessageScheme(text['title'])
                     scheme.paste_to_message(message)
                     self._bot.update_message(message)
-            title = text['title']
-            if cause_key is not None:
-                title = content.combine(title, content.subs(text['cause'], cause=text[cause_key]))
-            scheme = MessageScheme(title)
-            self._bot.send_message(player, scheme)
+                    self._bot.forget_message(message)
+            self._bot.send_message(player, self._get_canceled_scheme(player, cause_key))
+
+    @StaticLogger.exception_logged
+    def flush(self):
+        self._bot.flush()
+
+    @staticmethod
+    def _get_connection_status_scheme(player: Player, call: Call) -> MessageScheme:
+        if GameModels.from_key(call.args['game-key']).value.PLAYER_COUNT == 1:
+            return None
+        scheme = None
+        if call.args['action'] == 'connect':
+            scheme = OpponentSearch(player, call.args)
+        if call.args['action'] == 'disconnect':
+            scheme = GameMenu(player, call.args)
+        return scheme
+
+    @staticmethod
+    def _get_main_scheme(game: Game, player_index: int) -> MessageScheme:
+        scheme = None
+        if game.model_type == GameModels.MEMORY:
+            scheme = MemoryMain(game)
+        if game.model_type == GameModels.HALMA:
+            scheme = HalmaMain(game, player_index)
+        return scheme
+
+    @staticmethod
+    def _get_final_scheme(game: Game, player_index: int) -> MessageScheme:
+        scheme = None
+        if game.model_type == GameModels.MEMORY:
+            scheme = MemoryFinal(game)
+        if game.model_type == GameModels.HALMA:
+            scheme = HalmaFinal(game, player_index)
+        return scheme
+
+    @staticmethod
+    def _get_canceled_scheme(player: Player, cause_key: str = None) -> MessageScheme:
+        text = content.get_text(player.lang, 'game', 'canceled')
+        title = text['title']
+        if cause_key is not None:
+            title = content.combine(title, content.subs(text['cause'], cause=text[cause_key]))
+        return MessageScheme(title)
+
+
+class AsyncGameServiceBot(GameServiceBot):
+    """
+    Coroutine variant of GameServiceBot working with AsyncChatBot.
+    """
+
+    def __init__(self, bot: AsyncChatBot):
+        super().__init__(bot)
+
+    @StaticLogger.exception_logged
+    async def update_connection_status(self, player: Player, call: Call):
+        scheme = self._get_connection_status_scheme(player, call)
+        if scheme is None:
+            return
+        message = call.message
+        scheme.paste_to_message(message)
+        await self._bot.update_message(message)
+
+    @StaticLogger.exception_logged
+    async def disconnect(self, player: Player, call: Call):
+        scheme = GameMenu(player, call.args)
+        message = call.message
+        scheme.paste_to_message(message)
+        await self._bot.update_message(message)
+
+    @StaticLogger.exception_logged
+    async def expire_connection(self, player: Player, call: Call):
+        scheme = OpponentSearchTimeout(player, call.args)
+        message = call.message
+        scheme.paste_to_message(message)
+        await self._bot.update_message(message)
+
+    @StaticLogger.exception_logged
+    async def display_game_state(self, game: Game, target_player_index: int = None):
+        for player_index in range(game.player_count):
+            if target_player_index is not None and player_index != target_player_index \
+                    or game.players[player_index].is_bot:
+                continue
+            scheme = self._get_main_scheme(game, player_index)
+            if game.message_is_set(player_index, 'main'):
+                message = game.messages[player_index]['main']
+                scheme.paste_to_message(message)
+                await self._bot.update_message(message, Priority.GAME)
+            else:
+                await self._bot.send_message(game.players[player_index], scheme, Priority.GAME)
+        if game.is_ended:
+            await self.end_game(game)
+
+    @StaticLogger.exception_logged
+    async def delete_call_message(self, call: Call):
+        await self._bot.delete_message(call.message)
+
+    @StaticLogger.exception_logged
+    async def end_game(self, game: Game):
+        for player_index in range(game.player_count):
+            player = game.players[player_index]
+            if player.is_bot:
+                continue
+            for message in game.messages[player_index].values():
+                if game.model_type in Game.DELETE_MESSAGES_WHEN_ENDED:
+                    await self._bot.delete_message(message)
+                else:
+                    scheme = MessageScheme(content.get_text(player.lang, 'game', 'ended'))
+                    scheme.paste_to_message(message)
+                    await self._bot.update_message(message)
+                    self._bot.forget_message(message)
+            await self._bot.send_message(player, self._get_final_scheme(game, player_index))
+            await self._bot.send_message(player, GameMenu(player, {'game-key': game.model_type.key}))
+
+    @StaticLogger.exception_logged
+    async def cancel_game(self, game: Game, cause_key: str = None):
+        for player_index in range(game.player_count):
+            player = game.players[player_index]
+            if player.is_bot:
+                continue
+            text = content.get_text(player.lang, 'game', 'canceled')
+            for message in game.messages[player_index].values():
+                if game.model_type in Game.DELETE_MESSAGES_WHEN_ENDED:
+                    await self._bot.delete_message(message)
+                else:
+                    scheme = MessageScheme(text['title'])
+                    scheme.paste_to_message(message)
+                    await self._bot.update_message(message)
+                    self._bot.forget_message(message)
+            await self._bot.send_message(player, self._get_canceled_scheme(player, cause_key))
+
+    @StaticLogger.exception_logged
+    async def flush(self):
+        await self._bot.flush()
@@ -0,0 +1,192 @@
+import gc
+import os
+import math
+import struct
+from telebot.types import Message, Chat
+
+from player import Player, BotPlayer
+from game import Game
+from game_models.models_enum import GameModels
+from game_models.memory import MemoryModel
+from game_models.halma import HalmaModel
+
+
+class _SnapshotReader:
+    __slots__ = ('_data', '_offset')
+
+    def __init__(self, data: bytes):
+        self._data = memoryview(data)
+        self._offset = 0
+
+    def read(self, layout: struct.Struct) -> tuple:
+        values = layout.unpack_from(self._data, self._offset)
+        self._offset += layout.size
+        return values
+
+    def read_bytes(self, size: int) -> bytes:
+        value = bytes(self._data[self._offset:self._offset + size])
+        if len(value) != size:
+            raise ValueError('Snapshot is truncated.')
+        self._offset += size
+        return value
+
+    def read_string(self) -> str:
+        return self.read_bytes(self.read(GameSnapshots.STRING_SIZE)[0]).decode()
+
+
+class GameSnapshots:
+    """
+    Compact binary snapshots of active games, little-endian:
+    header (magic, version, game count), then every game as
+    uid, model index, player count, players, messages of every player and the model state.
+    A human player is user id and language, a bot is its level. A message is its tag, chat id and message id.
+    Models are stored as their get_snapshot tuples, None indexes are -1 and an unlimited turn time is NaN.
+    Mailboxes, timers and rendered texts are not stored: clocks restart and messages are updated by the next call.
+    """
+
+    MAGIC = b'BGSN'
+    VERSION = 1
+    HEADER = struct.Struct('<4sBI')
+    GAME = struct.Struct(f'<{Game.UID_LENGTH}sBB')
+    PLAYER_KIND = struct.Struct('<B')    # 0 is a human, 1 is a bot
+    HUMAN = struct.Struct('<q2s')
+    MESSAGE = struct.Struct('<qq')
+    STRING_SIZE = struct.Struct('<B')
+    MEMORY = struct.Struct('<BBBhhhBIH')    # Followed by card values and card states
+    HALMA = struct.Struct('<QQBbBQId')
+    MODELS = list(GameModels)
+
+    @staticmethod
+    def save(file_path: str, games: list):    # Replaces the file atomically
+        temporary_path = file_path + '.tmp'
+        with open(temporary_path, mode='wb') as f:
+            f.write(GameSnapshots.dump(games))
+        os.replace(temporary_path, file_path)
+
+    @staticmethod
+    def load(file_path: str, find_player=Player) -> list:
+        """
+        The file is removed once its games are restored, so they are restored once.
+        A file that can't be parsed is renamed to *.bad, so it's kept for inspection and not read on the next start.
+        """
+        if not os.path.exists(file_path):
+            return []
+        with open(file_path, mode='rb') as f:
+            data = f.read()
+        try:
+            games = GameSnapshots.loads(data, find_player)
+        except (struct.error, ValueError, IndexError):
+            os.replace(file_path, file_path + '.bad')
+            raise
+        os.remove(file_path)
+        return games
+
+    @staticmethod
+    def dump(games: list) -> bytes:
+        data = bytearray(GameSnapshots.HEADER.pack(GameSnapshots.MAGIC, GameSnapshots.VERSION, len(games)))
+        for game in games:
+            GameSnapshots._dump_game(data, game)
+        return bytes(data)
+
+    @staticmethod
+    def loads(data: bytes, find_player=Player) -> list:
+        """
+        [find_player] is called with (int user_id, str lang) and returns the player to put into a restored game.
+        """
+        reader = _SnapshotReader(data)
+        magic, version, game_count = reader.read(GameSnapshots.HEADER)
+        if magic != GameSnapshots.MAGIC or version != GameSnapshots.VERSION:
+            raise ValueError('Unknown snapshot format.')
+        is_gc_enabled = gc.isenabled()
+        gc.disable()    # Only new objects are created, collections triggered by them would find nothing
+        try:
+            return [GameSnapshots._load_game(reader, find_player) for _ in range(game_count)]
+        finally:
+            if is_gc_enabled:
+                gc.enable()
+
+    @staticmethod
+    def _dump_game(data: bytearray, game: Game):
+        data += GameSnapshots.GAME.pack(game.uid.encode(), GameSnapshots.MODELS.index(game.model_type),
+                                        game.player_count)
+        for player in game.players:
+            if player.is_bot:
+                data += GameSnapshots.PLAYER_KIND.pack(1)
+                GameSnapshots._dump_string(data, player.level)
+            else:
+                data += GameSnapshots.PLAYER_KIND.pack(0)
+                data += GameSnapshots.HUMAN.pack(player.user_id, player.lang.encode())
+        for messages in game.messages:
+            data += GameSnapshots.STRING_SIZE.pack(len(messages))
+            for message_tag, message in messages.items():
+                GameSnapshots._dump_string(data, message_tag)
+                data += GameSnapshots.MESSAGE.pack(message.chat.id, message.message_id)
+        if game.model_type is GameModels.MEMORY:
+            rows, columns, variety, values, states, selected, pending, pending_state, move_count, removed_count = \
+                game.model.get_snapshot()
+            pending = pending + (-1,) * (2 - len(pending))
+            data += GameSnapshots.MEMORY.pack(rows, columns, variety, GameSnapshots._to_index(selected), *pending,
+                                              pending_state, move_count, removed_count)
+            data += values
+            data += states
+        if game.model_type is GameModels.HALMA:
+            first_mask, second_mask, turn, selected, is_selection_shown, visited_mask, move_count, turn_time = \
+                game.model.get_snapshot()
+            data += GameSnapshots.HALMA.pack(first_mask, second_mask, turn, GameSnapshots._to_index(selected),
+                                             is_selection_shown, visited_mask, move_count,
+                                             math.nan if turn_time is None else turn_time)
+
+    @staticmethod
+    def _load_game(reader: _SnapshotReader, find_player) -> Game:
+        uid, model_index, player_count = reader.read(GameSnapshots.GAME)
+        players = []
+        for _ in range(player_count):
+            if reader.read(GameSnapshots.PLAYER_KIND)[0] == 1:
+                players.append(BotPlayer(reader.read_string()))
+            else:
+                user_id, lang = reader.read(GameSnapshots.HUMAN)
+                players.append(find_player(user_id, lang.decode()))
+        messages = []
+        for _ in range(player_count):
+            player_messages = dict()
+            for _ in range(reader.read(GameSnapshots.STRING_SIZE)[0]):
+                message_tag = reader.read_string()
+                player_messages[message_tag] = GameSnapshots._create_message(*reader.read(GameSnapshots.MESSAGE))
+            messages.append(player_messages)
+        model = None
+        model_type = GameSnapshots.MODELS[model_index]
+        if model_type is GameModels.MEMORY:
+            rows, columns, variety, selected, first_pending, second_pending, pending_state, move_count, \
+                removed_count = reader.read(GameSnapshots.MEMORY)
+            values, states = reader.read_bytes(rows * columns), reader.read_bytes(rows * columns)
+            pending = tuple(index for index in (first_pending, second_pending) if index >= 0)
+            model = MemoryModel.from_snapshot((rows, columns, variety, values, states,
+                                               GameSnapshots._from_index(selected), pending, pending_state,
+                                               move_count, removed_count))
+        if model_type is GameModels.HALMA:
+            first_mask, second_mask, turn, selected, is_selection_shown, visited_mask, move_count, turn_time = \
+                reader.read(GameSnapshots.HALMA)
+            model = HalmaModel.from_snapshot((first_mask, second_mask, turn, GameSnapshots._from_index(selected),
+                                              bool(is_selection_shown), visited_mask, move_count,
+                                              None if math.isnan(turn_time) else turn_time))
+        game = Game(model, players, uid.decode())
+        game.messages = messages
+        return game
+
+    @staticmethod
+    def _dump_string(data: bytearray, value: str):
+        encoded = value.encode()
+        data += GameSnapshots.STRING_SIZE.pack(len(encoded))
+        data += encoded
+
+    @staticmethod
+    def _to_index(index: int) -> int:
+        return -1 if index is None else index
+
+    @staticmethod
+    def _from_index(index: int) -> int:
+        return None if index < 0 else index
+
+    @staticmethod
+    def _create_message(chat_id: int, message_id: int) -> Message:    # Only the reference is restored
+        return Message(message_id, None, 0, Chat(chat_id, 'private'), 'text', dict(), '')
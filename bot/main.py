@@ -1,13 +1,23 @@
 import telebot
+from telebot import apihelper, asyncio_helper
+from telebot.async_telebot import AsyncTeleBot
 
 from os import environ
 from dotenv import load_dotenv
 
-from query_handler import QueryHandler
-from game_service import GameService
-from chat_bot import ChatBot
-from menu_bot import MenuBot
-from game_service_bot import GameServiceBot
+from query_handler import QueryHandler, AsyncQueryHandler
+from game_service import GameService, AsyncGameService
+from chat_bot import ChatBot, AsyncChatBot
+from menu_bot import MenuBot, AsyncMenuBot
+from game_service_bot import GameServiceBot, AsyncGameServiceBot
+from webhook_server import WebhookServer
+from outbound_dispatcher import OutboundDispatcher, AsyncOutboundDispatcher
+from api_session import PooledApiSession
+from bot_opponent import BotOpponent
+from utils.process_lane import ProcessLane
+from data.cache import Cache
+from data.player_store import PlayerStore
+from data.results_store import ResultsStore
 from utils.logger import Logger, StaticLogger
 
 load_dotenv()
@@ -15,13 +25,65 @@ load_dotenv()
 token = environ['BOT_TOKEN']
 admin_var = environ.get('ADMIN_USER_ID')
 admin_user_id = int(environ['ADMIN_USER_ID']) if admin_var is not None and admin_var.isnumeric() else None
+api_url = environ.get('API_URL')    # Bot API url template, e.g. of a local server: http://127.0.0.1:8081/bot{0}/{1}
+transport = environ.get('TRANSPORT', 'threads')    # threads, asyncio
+webhook_port = environ.get('WEBHOOK_PORT')    # Updates are received with polling if not specified
 update_workers = int(environ['UPDATE_HANDLER_WORKERS'])
 callback_workers = int(environ['CALLBACK_HANDLER_WORKERS'])
 game_manager_workers = int(environ['GAME_MANAGER_WORKERS'])
+edit_window = float(environ.get('EDIT_COALESCING_WINDOW') or 0)    # In seconds, edits are not coalesced if 0
+outbound_workers = int(environ.get('OUTBOUND_WORKERS') or game_manager_workers)
+global_rate = float(environ.get('OUTBOUND_GLOBAL_RATE') or 30)    # Requests per second, Telegram limit is 30
+chat_rate = float(environ.get('OUTBOUND_CHAT_RATE') or 1)    # Requests per second in a chat, Telegram limit is 1
+chat_burst = float(environ.get('OUTBOUND_CHAT_BURST') or 3)
+api_pool_size = int(environ.get('API_POOL_SIZE') or outbound_workers + callback_workers + 1)
+api_connect_timeout = float(environ.get('API_CONNECT_TIMEOUT') or 5)    # In seconds
+api_read_timeout = float(environ.get('API_READ_TIMEOUT') or 15)    # In seconds
+process_lane_workers = int(environ.get('PROCESS_LANE_WORKERS') or 1)    # Processes for CPU-heavy game work
+player_cache_size = int(environ.get('PLAYER_CACHE_SIZE') or 100000)
+player_cache_ttl = float(environ.get('PLAYER_CACHE_TTL') or 7 * 24 * 3600)    # In seconds since the last call
+player_database = environ.get('PLAYER_DATABASE')    # SQLite file of player settings and game results
+player_flush_interval = float(environ.get('PLAYER_FLUSH_INTERVAL') or 2)    # In seconds between database writes
+game_snapshot_path = environ.get('GAME_SNAPSHOT_FILE') or None    # Active games are canceled on stop if not specified
 
-bot = telebot.TeleBot(token)
-StaticLogger.logger = Logger(allow_printing=True)
-chat_bot = ChatBot(bot)
-game_service = GameService(GameServiceBot(chat_bot), game_manager_workers)
-handler = QueryHandler(bot, MenuBot(chat_bot), game_service, update_workers, callback_workers, admin_user_id)
-handler.start()
+if __name__ == '__main__':    # Not performed when imported by process lane workers
+    if api_url:
+        apihelper.API_URL = api_url
+        asyncio_helper.API_URL = api_url
+    StaticLogger.logger = Logger(allow_printing=True)
+    api_session = PooledApiSession(api_pool_size, api_connect_timeout, api_read_timeout)
+    process_lane = ProcessLane(process_lane_workers)
+    player_store, results_store = None, None    # Nothing is saved if the database is not specified
+    if player_database:
+        player_store = PlayerStore(player_database, player_flush_interval)
+        player_store.start()
+        results_store = ResultsStore(player_database, player_flush_interval, player_store)
+        results_store.start()
+    player_cache = Cache(player_cache_size, player_cache_ttl, None if player_store is None else player_store.load)
+    webhook_server = None
+    if webhook_port:
+        webhook_server = WebhookServer(environ.get('WEBHOOK_HOST') or '0.0.0.0', int(webhook_port),
+                                       environ.get('WEBHOOK_URL') or None, environ.get('WEBHOOK_SECRET') or None)
+    if transport == 'asyncio':
+        api_session.install_async()
+        bot = AsyncTeleBot(token)
+        chat_bot = AsyncChatBot(bot, AsyncOutboundDispatcher(outbound_workers, global_rate, chat_rate, chat_burst),
+                                edit_window)
+        game_service = AsyncGameService(AsyncGameServiceBot(chat_bot), BotOpponent(process_lane), game_snapshot_path,
+                                        results_store)
+        handler = AsyncQueryHandler(bot, AsyncMenuBot(chat_bot, results_store), game_service, admin_user_id,
+                                    webhook_server, player_cache, player_store)
+    else:
+        api_session.install()
+        bot = telebot.TeleBot(token)
+        chat_bot = ChatBot(bot, OutboundDispatcher(outbound_workers, global_rate, chat_rate, chat_burst), edit_window)
+        game_service = GameService(GameServiceBot(chat_bot), game_manager_workers, BotOpponent(process_lane),
+                                   game_snapshot_path, results_store)
+        handler = QueryHandler(bot, MenuBot(chat_bot, results_store), game_service, update_workers, callback_workers,
+                               admin_user_id, webhook_server, player_cache, player_store, api_session)
+    handler.start()
+    process_lane.shutdown()
+    if results_store is not None:
+        results_store.stop()
+    if player_store is not None:
+        player_store.stop()
@@ -1,18 +1,29 @@
 import re
+import asyncio
 from telebot.types import Message
 
 from message_schemes.menu_schemes import *
+from message_schemes.scheme_cache import SchemeCache
 from utils.logger import StaticLogger, LogReport
 from data import content
-from chat_bot import ChatBot
+from chat_bot import ChatBot, AsyncChatBot
 from call import Call
 from player import Player
 from bot_status import BotStatus
+from data.results_store import ResultsStore, Leaderboard
 
 
 class MenuBot:
-    def __init__(self, bot: ChatBot):
+    _scheme_cache = SchemeCache()    # Schemes of static menus
+    LEADERBOARD_SIZE = 10
+
+    def __init__(self, bot: ChatBot, results_store: ResultsStore = None):
         self._bot = bot
+        self._results_store = results_store    # Leaderboards are empty if not specified
+
+    @property
+    def skipped_edit_count(self) -> int:
+        return self._bot.skipped_edit_count
 
     @staticmethod
     def get_command_from_message(message: Message) -> str:
@@ -22,30 +33,11 @@ class MenuBot:
     def reply_to_message(self, player: Player, message: Message):
         command = self.get_command_from_message(message)
         if command == 'games' or command == 'start':
-            self._bot.send_message(player, MainMenu(player))
+            self._bot.send_message(player, MenuBot._scheme_cache.get(MainMenu, player))
 
     @StaticLogger.exception_logged
     def reply_to_navigation(self, player: Player, call: Call):
-        category, target = call.args['category'], call.args['target']
-        scheme = None
-        send_new_message = False
-        if category == 'menu':
-            if target == 'main':
-                scheme = MainMenu(player)
-            if target == 'game':
-                scheme = GameMenu(player, call.args)
-                send_new_message = True
-            if target == 'settings':
-                scheme = Settings(player)
-        if category == 'info':
-            send_new_message = True
-            if target == 'rules':
-                scheme = RulesInfo(player, call.args)
-        if category == 'settings':
-            if target == 'lang':
-                scheme = LangSettings(player)
-            if target == 'difficulty':
-                scheme = DifficultySettings(player, call.args)
+        scheme, send_new_message = self._get_navigation_reply(player, call)
         if send_new_message:
             self._bot.send_message(player, scheme)
         else:
@@ -54,15 +46,9 @@ class MenuBot:
 
     @StaticLogger.exception_logged
     def reply_to_param_update(self, player: Player, call: Call):
-        param = call.args['param']
-        if param == 'lang':
-            player.lang = call.args['lang']
-            MainMenu(player).paste_to_message(call.message)
-            self._bot.update_message(call.message)
-        if param == 'difficulty':
-            player.game_settings[call.args['game-key']] = {'w': int(call.args['w']), 'h': int(call.args['h']),
-                                                           'variety': int(call.args['variety'])}
-            GameMenu(player, call.args).paste_to_message(call.message)
+        scheme = self._apply_param_update(player, call)
+        if scheme is not None:
+            scheme.paste_to_message(call.message)
             self._bot.update_message(call.message)
 
     @StaticLogger.exception_logged
@@ -92,3 +78,125 @@ class MenuBot:
     @StaticLogger.exception_logged
     def inform_server_is_stopped(self, player: Player):
         self._bot.send_message(player, MessageScheme(content.get_text(player.lang, 'admin-menu', 'server-stopped')))
+
+    @StaticLogger.exception_logged
+    def flush(self):
+        self._bot.flush()
+
+    def _get_navigation_reply(self, player: Player, call: Call) -> tuple:    # (MessageScheme, bool send_new_message)
+        category, target = call.args['category'], call.args['target']
+        scheme = None
+        send_new_message = False
+        if category == 'menu':
+            if target == 'main':
+                scheme = MenuBot._scheme_cache.get(MainMenu, player)
+            if target == 'game':
+                scheme = GameMenu(player, call.args)
+                send_new_message = True
+            if target == 'settings':
+                scheme = MenuBot._scheme_cache.get(Settings, player)
+        if category == 'info':
+            send_new_message = True
+            if target == 'rules':
+                scheme = MenuBot._scheme_cache.get(RulesInfo, player, {'game-key': call.args['game-key']})
+            if target == 'rating':
+                scheme = LeaderboardInfo(player, self._get_leaderboard(player, call.args['game-key']))
+        if category == 'settings':
+            if target == 'lang':
+                scheme = MenuBot._scheme_cache.get(LangSettings, player)
+            if target == 'difficulty':
+                scheme = MenuBot._scheme_cache.get(DifficultySettings, player, {'game-key': call.args['game-key']})
+            if target == 'bot-level':
+                scheme = MenuBot._scheme_cache.get(BotLevelSettings, player, {'game-key': call.args['game-key']})
+        return scheme, send_new_message
+
+    def _get_leaderboard(self, player: Player, game_key: str) -> Leaderboard:
+        board = ResultsStore.HALMA_KEY
+        if game_key == GameModels.MEMORY.key:    # Of the difficulty set by the player
+            settings = player.game_settings[game_key]
+            board = ResultsStore.get_memory_board(settings['w'] * settings['h'], settings['variety']) \
+                or f"{game_key}/{next(iter(content.game_setup[game_key]['levels']))}"    # The first level if custom
+        if self._results_store is None:
+            return Leaderboard(board, [])
+        return self._results_store.get_leaderboard(board, player.user_id, MenuBot.LEADERBOARD_SIZE)
+
+    @staticmethod
+    def _apply_param_update(player: Player, call: Call) -> MessageScheme:
+        param = call.args['param']
+        if param == 'lang':
+            player.lang = call.args['lang']
+            return MenuBot._scheme_cache.get(MainMenu, player)
+        if param == 'difficulty':
+            player.game_settings[call.args['game-key']] = {'w': call.args['w'], 'h': call.args['h'],
+                                                           'variety': call.args['variety']}
+            return GameMenu(player, call.args)
+
+
+class AsyncMenuBot(MenuBot):
+    """
+    Coroutine variant of MenuBot working with AsyncChatBot.
+    """
+
+    def __init__(self, bot: AsyncChatBot, results_store: ResultsStore = None):
+        super().__init__(bot, results_store)
+
+    @StaticLogger.exception_logged
+    async def reply_to_message(self, player: Player, message: Message):
+        command = self.get_command_from_message(message)
+        if command == 'games' or command == 'start':
+            await self._bot.send_message(player, MenuBot._scheme_cache.get(MainMenu, player))
+
+    @StaticLogger.exception_logged
+    async def reply_to_navigation(self, player: Player, call: Call):
+        if call.args['category'] == 'info' and call.args['target'] == 'rating':    # Database is read off the loop
+            leaderboard = await asyncio.get_running_loop().run_in_executor(None, self._get_leaderboard, player,
+                                                                           call.args['game-key'])
+            await self._bot.send_message(player, LeaderboardInfo(player, leaderboard))
+            return
+        scheme, send_new_message = self._get_navigation_reply(player, call)
+        if send_new_message:
+            await self._bot.send_message(player, scheme)
+        else:
+            scheme.paste_to_message(call.message)
+            await self._bot.update_message(call.message)
+
+    @StaticLogger.exception_logged
+    async def reply_to_param_update(self, player: Player, call: Call):
+        scheme = self._apply_param_update(player, call)
+        if scheme is not None:
+            scheme.paste_to_message(call.message)
+            await self._bot.update_message(call.message)
+
+    @StaticLogger.exception_logged
+    async def display_admin_menu(self, player: Player, status: BotStatus, message: Message = None):
+        scheme = AdminMenu(player, status)
+        if message is not None:
+            scheme.paste_to_message(message)
+            await self._bot.update_message(message)
+        else:
+            await self._bot.send_message(player, scheme)
+
+    @StaticLogger.exception_logged
+    async def display_logs(self, player: Player, log_report: LogReport):
+        logs = LogsInfo(player, log_report)
+        await self._bot.send_message(player, logs)
+        if logs.file is not None:
+            await self._bot.send_document(player, logs.file)
+
+    @StaticLogger.exception_logged
+    async def inform_bot_is_paused(self, player: Player):
+        await self._bot.send_message(player, MessageScheme(content.get_text(player.lang, 'info', 'bot-paused')))
+
+    @StaticLogger.exception_logged
+    async def inform_server_is_stopping(self, player: Player):
+        await self._bot.send_message(player, MessageScheme(content.get_text(player.lang, 'admin-menu',
+                                                                            'server-stopping')))
+
+    @StaticLogger.exception_logged
+    async def inform_server_is_stopped(self, player: Player):
+        await self._bot.send_message(player, MessageScheme(content.get_text(player.lang, 'admin-menu',
+                                                                            'server-stopped')))
+
+    @StaticLogger.exception_logged
+    async def flush(self):
+        await self._bot.flush()
@@ -1,9 +1,10 @@
-from message_schemes.message_scheme import MessageScheme, MarkupScheme, ButtonScheme
+from message_schemes.message_scheme import MessageScheme, MarkupScheme, ButtonScheme, KeyboardTemplate
 from message_schemes import converters
 from utils.logger import StaticLogger
 from data import content
 from game_models.models_enum import GameModels
-from call import CallSources
+from game_models.memory import MemoryBoard
+from call import CallSchemas
 from player import Player
 from game import Game
 
@@ -17,16 +18,16 @@ class MemoryMain(MessageScheme):
         hidden_emoji, removed_emoji = emoji['hidden'], emoji['removed']
         board = game.model.get_board()
         markup = MarkupScheme(width=board.columns)
+        values, states = board.values, board.states
         for i in range(board.rows):
             for j in range(board.columns):
-                card = board[i, j]
-                item_emoji = removed_emoji
-                if not card.is_removed:
-                    item_emoji = hidden_emoji
-                    if not card.is_hidden:
-                        item_emoji = card_emoji[card.value]
-                markup.add(ButtonScheme(item_emoji,
-                                        f'{CallSources.GAME.value}:action=click,game-id={game.uid},a={i},b={j}'))
+                index = i * board.columns + j
+                item_emoji = hidden_emoji
+                if states[index] == MemoryBoard.REMOVED:
+                    item_emoji = removed_emoji
+                elif states[index] == MemoryBoard.SHOWN:
+                    item_emoji = card_emoji[values[index]]
+                markup.add(ButtonScheme(item_emoji, CallSchemas.MEMORY_CLICK.encode(game.uid, i, j)))
 
         text = content.get_text(player.lang, 'game')
         removed = game.model.removed_count
@@ -42,29 +43,41 @@ class HalmaMain(MessageScheme):
     def __init__(self, game: Game, player_index: int):
         player = game.players[player_index]
         emoji = content.emoji['game'][GameModels.HALMA.key]
+        piece_emoji = ((emoji['player-piece'], emoji['player-selected-piece']),
+                       (emoji['opponent-piece'], emoji['opponent-selected-piece']))
         board = game.model.get_board(player_index)
-        markup = MarkupScheme(width=8)
+        labels = []
         for i in range(8):
             for j in range(8):
                 square = board[i, j]
-                item_emoji = ' '
-                if square.color == 0:
-                    item_emoji = emoji['player-piece']
-                    if square.is_selected:
-                        item_emoji = emoji['player-selected-piece']
-                if square.color == 1:
-                    item_emoji = emoji['opponent-piece']
-                    if square.is_selected:
-                        item_emoji = emoji['opponent-selected-piece']
-                a, b = ((i, j), (7 - i, 7 - j))[player_index]
-                markup.add(ButtonScheme(item_emoji,
-                           f'{CallSources.GAME.value}:action=click,game-id={game.uid},p={player_index},a={a},b={b}'))
-        if game.model.can_end_turn(player_index):
-            markup.row(ButtonScheme(content.get_text(player.lang, 'game', 'halma', 'end-turn'),
-                                    f'{CallSources.GAME.value}:action=end-turn,game-id={game.uid},p={player_index}'))
+                if square.is_empty:
+                    labels.append(emoji['move-target'] if square.is_move_target else ' ')
+                else:
+                    labels.append(piece_emoji[square.color][square.is_selected])
+        can_end_turn = game.model.can_end_turn(player_index)
+        if can_end_turn:
+            labels.append(content.get_text(player.lang, 'game', 'halma', 'end-turn'))
+        template = HalmaMain._get_keyboard_template(game, player_index, can_end_turn)
         text = content.get_text(player.lang, 'game')
         title = text['player-turn'] if player_index == game.model.turn else text['opponent-turn']
-        super().__init__(title, markup)
+        super().__init__(title, template.fill(labels))
+
+    @staticmethod
+    def _get_keyboard_template(game: Game, player_index: int, can_end_turn: bool) -> KeyboardTemplate:
+        key = (player_index, can_end_turn)
+        template = game.keyboard_templates.get(key)
+        if template is None:
+            rows = []
+            for i in range(8):
+                rows.append([])
+                for j in range(8):
+                    a, b = ((i, j), (7 - i, 7 - j))[player_index]
+                    rows[-1].append(CallSchemas.HALMA_CLICK.encode(game.uid, player_index, a, b))
+            if can_end_turn:
+                rows.append([CallSchemas.END_TURN.encode(game.uid, player_index)])
+            template = KeyboardTemplate(rows)
+            game.keyboard_templates[key] = template
+        return template
 
 
 class MemoryFinal(MessageScheme):
@@ -94,6 +107,10 @@ class HalmaFinal(MessageScheme):
                                  game=content.combine(icon, text[GameModels.HALMA.key]['name']),
                                  result=text['result'][result.status.value])
         title = content.combine(main_line, converters.game_move_count(player, game))
+        if result.rating_change is not None:
+            change = round(result.rating_change)
+            title = content.combine(title, content.subs(text['rating-change'], rating=round(player.rating),
+                                                        change=f'+{change}' if change >= 0 else change))
         super().__init__(title)
 
 
@@ -104,6 +121,18 @@ class OpponentSearch(MessageScheme):
         title = text['finding-opponent'] if GameModels.from_key(args['game-key']).value.PLAYER_COUNT == 2 \
             else text['finding-opponents']
         markup = MarkupScheme()
-        markup.add(ButtonScheme(text['stop-searching'],
-                                f"{CallSources.CONNECTING.value}:action=disconnect,game-key={args['game-key']}"))
+        markup.add(ButtonScheme(text['stop-searching'], CallSchemas.DISCONNECT.encode(args['game-key'])))
         super().__init__(title, markup)
+
+
+class OpponentSearchTimeout(MessageScheme):
+    @StaticLogger.exception_logged
+    def __init__(self, player: Player, args: dict):
+        game_key = args['game-key']
+        text, emoji = content.get_text(player.lang), content.emoji
+        markup = MarkupScheme(width=2)
+        label = content.combine(emoji['game'][game_key]['icon'], text['game-menu']['play'])
+        markup.add(ButtonScheme(label, CallSchemas.CONNECT.encode(game_key)))
+        label = content.combine(emoji['menu']['navigate-back'], text['game'][game_key]['name'])
+        markup.add(ButtonScheme(label, CallSchemas.GAME_NAVIGATION.encode('menu', 'game', game_key)))
+        super().__init__(text['game-menu']['search-timeout'], markup)
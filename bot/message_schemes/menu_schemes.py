@@ -5,9 +5,10 @@ from message_schemes import converters
 from utils.logger import StaticLogger, LogReport
 from data import content
 from game_models.models_enum import GameModels
-from call import CallSources
+from call import CallSchemas
 from player import Player
 from bot_status import BotStatus
+from data.results_store import Leaderboard
 
 
 class MainMenu(MessageScheme):
@@ -18,10 +19,9 @@ class MainMenu(MessageScheme):
         for model in GameModels:
             game_key = model.key
             label = content.combine(emoji['game'][game_key]['icon'], text['game'][game_key]['name'])
-            markup.row(ButtonScheme(label,
-                                    f'{CallSources.NAVIGATION.value}:category=menu,target=game,game-key={game_key}'))
+            markup.row(ButtonScheme(label, CallSchemas.GAME_NAVIGATION.encode('menu', 'game', game_key)))
         label = content.combine(emoji['menu']['settings'], text['settings']['label'])
-        markup.row(ButtonScheme(label, f'{CallSources.NAVIGATION.value}:category=menu,target=settings'))
+        markup.row(ButtonScheme(label, CallSchemas.NAVIGATION.encode('menu', 'settings')))
         title = content.combine_with_dash(text['main-menu']['title'])
         super().__init__(title, markup)
 
@@ -36,26 +36,26 @@ class GameMenu(MessageScheme):
         markup = MarkupScheme(width=2)
         if game_model == GameModels.MEMORY:
             if 'w' in arg_dict and 'h' in arg_dict and 'variety' in arg_dict:
-                w, h, variety = int(arg_dict['w']), int(arg_dict['h']), int(arg_dict['variety'])
+                w, h, variety = arg_dict['w'], arg_dict['h'], arg_dict['variety']
             else:
                 default = player.game_settings[game_model.key]
                 w, h, variety = default['w'], default['h'], default['variety']
             title = converters.memory_difficulty_title(player, w * h, variety, custom_detailed=True)
-            args = f"w={w},h={h},variety={variety}"
             label = content.combine(emoji['game'][game_key]['icon'], text['game-menu']['play'])
-            markup.add(ButtonScheme(label,
-                                    f'{CallSources.CONNECTING.value}:action=connect,game-key={game_key},{args}'))
+            markup.add(ButtonScheme(label, CallSchemas.CONNECT_MEMORY.encode(game_key, w, h, variety)))
             label = content.combine(emoji['menu']['difficulty'], text['game-menu']['difficulty'])
-            markup.add(ButtonScheme(label,
-                       f'{CallSources.NAVIGATION.value}:category=settings,target=difficulty,game-key={game_key}'))
+            markup.add(ButtonScheme(label, CallSchemas.GAME_NAVIGATION.encode('settings', 'difficulty', game_key)))
         if game_model == GameModels.HALMA:
             label = content.combine(emoji['game'][game_key]['icon'], text['game-menu']['play'])
-            markup.add(ButtonScheme(label, f'{CallSources.CONNECTING.value}:action=connect,game-key={game_key}'))
+            markup.add(ButtonScheme(label, CallSchemas.CONNECT.encode(game_key)))
+            label = content.combine(emoji['menu']['bot'], text['game-menu']['play-with-bot'])
+            markup.add(ButtonScheme(label, CallSchemas.GAME_NAVIGATION.encode('settings', 'bot-level', game_key)))
         label = content.combine(emoji['menu']['rules'], text['game-menu']['rules'])
-        markup.row(ButtonScheme(label,
-                                f'{CallSources.NAVIGATION.value}:category=info,target=rules,game-key={game_key}'))
+        markup.row(ButtonScheme(label, CallSchemas.GAME_NAVIGATION.encode('info', 'rules', game_key)))
+        label = content.combine(emoji['menu']['rating'], text['game-menu']['rating'])
+        markup.add(ButtonScheme(label, CallSchemas.GAME_NAVIGATION.encode('info', 'rating', game_key)))
         label = content.combine(emoji['menu']['navigate-back'], text['main-menu']['title'])
-        markup.add(ButtonScheme(label, f'{CallSources.NAVIGATION.value}:category=menu,target=main'))
+        markup.row(ButtonScheme(label, CallSchemas.NAVIGATION.encode('menu', 'main')))
         title = content.combine(text['game'][game_key]['name'], title)
         title = content.combine_with_dash(title)
         super().__init__(title, markup)
@@ -67,7 +67,7 @@ class Settings(MessageScheme):
         text, emoji = content.get_text(player.lang, 'settings'), content.emoji['menu']
         markup = MarkupScheme()
         label = content.combine(emoji['lang'], text['lang']['label'])
-        markup.row(ButtonScheme(label, f'{CallSources.NAVIGATION.value}:category=settings,target=lang'))
+        markup.row(ButtonScheme(label, CallSchemas.NAVIGATION.encode('settings', 'lang')))
         title = content.combine_with_dash(text['title'])
         super().__init__(title, markup)
 
@@ -77,16 +77,34 @@ class AdminMenu(MessageScheme):
     def __init__(self, player: Player, status: BotStatus):
         text, emoji = content.get_text(player.lang, 'admin-menu'), content.emoji['admin']
         markup = MarkupScheme(width=2)
-        markup.add(ButtonScheme(text['pause-bot'], f'{CallSources.ADMIN.value}:action=pause-bot'),
-                   ButtonScheme(text['resume-bot'], f'{CallSources.ADMIN.value}:action=resume-bot'),
-                   ButtonScheme(text['stop-server'], f'{CallSources.ADMIN.value}:action=stop-server'),
-                   ButtonScheme(text['load-logs'], f'{CallSources.ADMIN.value}:action=load-logs'))
+        markup.add(ButtonScheme(text['pause-bot'], CallSchemas.ADMIN.encode('pause-bot')),
+                   ButtonScheme(text['resume-bot'], CallSchemas.ADMIN.encode('resume-bot')),
+                   ButtonScheme(text['stop-server'], CallSchemas.ADMIN.encode('stop-server')),
+                   ButtonScheme(text['load-logs'], CallSchemas.ADMIN.encode('load-logs')))
         key = 'bot-paused' if status.is_paused else 'bot-active'
         label = content.combine(emoji[key], text[key])
         if status.active_game_count is not None:
             label = content.combine(label, content.subs(text['active-games'], count=status.active_game_count))
         if status.log_count is not None:
             label = content.combine(label, content.subs(text['total-log-count'], count=status.log_count))
+        if status.skipped_edit_count is not None:
+            label = content.combine(label, content.subs(text['skipped-edit-count'], count=status.skipped_edit_count))
+        if status.bot_opponent_stats is not None:
+            stats = status.bot_opponent_stats
+            label = content.combine(label, content.subs(text['bot-opponent-stats'], count=stats.move_count,
+                                                        speed=round(stats.nodes_per_second),
+                                                        time=round(stats.average_think_time * 1000)))
+        if status.player_cache_stats is not None:
+            stats = status.player_cache_stats
+            label = content.combine(label, content.subs(text['player-cache-stats'], count=stats.size,
+                                                        rate=round(stats.hit_rate * 100),
+                                                        evicted=stats.eviction_count))
+        if status.api_session_stats is not None:
+            stats = status.api_session_stats
+            label = content.combine(label, content.subs(text['api-session-stats'], count=stats.request_count,
+                                                        latency=round(stats.average_latency * 1000),
+                                                        errors=stats.error_count,
+                                                        connections=stats.connection_count))
         super().__init__(label, markup)
 
 
@@ -96,14 +114,39 @@ class RulesInfo(MessageScheme):
         super().__init__(content.get_text(player.lang, 'game', args['game-key'], 'rules'))
 
 
+class LeaderboardInfo(MessageScheme):
+    @StaticLogger.exception_logged
+    def __init__(self, player: Player, leaderboard: Leaderboard):
+        game_key, _, level = leaderboard.key.partition('/')
+        text = content.get_text(player.lang)
+        entry_key, player_key, score_name = ('rating-entry', 'player-rating', 'rating') \
+            if game_key == GameModels.HALMA.key else ('moves-entry', 'player-moves', 'moves')
+        name = content.combine(content.emoji['game'][game_key]['icon'], text['game'][game_key]['name'])
+        title = content.combine(content.emoji['menu']['rating'], content.subs(text['leaderboard']['title'], game=name))
+        if len(level):
+            difficulty = text['game'][game_key]['difficulty']
+            title = content.combine(title, content.subs(difficulty['message'], value=difficulty['levels'][level]))
+        lines = []
+        for rank, (user_id, score) in enumerate(leaderboard.entries, start=1):
+            line = content.subs(text['leaderboard'][entry_key], rank=rank, **{score_name: round(score)})
+            lines.append(f"{line} {text['leaderboard']['you']}" if user_id == player.user_id else line)
+        if not len(lines):
+            lines.append(text['leaderboard']['empty'])
+        if leaderboard.rank is None:
+            lines.append(text['leaderboard']['not-ranked'])
+        else:
+            lines.append(content.subs(text['leaderboard'][player_key], rank=leaderboard.rank,
+                                      **{score_name: round(leaderboard.score)}))
+        super().__init__(content.combine(content.combine_with_dash(title), *lines))
+
+
 class LangSettings(MessageScheme):
     @StaticLogger.exception_logged
     def __init__(self, player: Player):
         text = content.get_text(player.lang, 'settings', 'lang')
         markup = MarkupScheme(width=2)
         for lang_key in text['keys']:
-            markup.add(ButtonScheme(text['keys'][lang_key],
-                                    f'{CallSources.UPDATE_PARAM.value}:param=lang,lang={lang_key}'))
+            markup.add(ButtonScheme(text['keys'][lang_key], CallSchemas.LANG.encode(lang_key)))
         title = content.combine_with_dash(text['title'])
         super().__init__(title, markup)
 
@@ -119,12 +162,24 @@ class DifficultySettings(MessageScheme):
             for level in levels:
                 w, h, variety = levels[level]['columns'], levels[level]['rows'], levels[level]['variety']
                 label = content.subs(text['value'], level=text['levels'][level], size=w*h, variety=variety)
-                markup.add(ButtonScheme(label, f'{CallSources.UPDATE_PARAM.value}:'
-                                        f'param=difficulty,game-key={game_key},w={w},h={h},variety={variety}'))
+                markup.add(ButtonScheme(label, CallSchemas.DIFFICULTY.encode(game_key, w, h, variety)))
             title = content.combine_with_dash(text['title'])
             super().__init__(title, markup)
 
 
+class BotLevelSettings(MessageScheme):
+    @StaticLogger.exception_logged
+    def __init__(self, player: Player, args: dict):
+        game_key = args['game-key']
+        text = content.get_text(player.lang, 'game', game_key, 'bot-level')
+        markup = MarkupScheme(width=1)
+        for level in content.game_setup[game_key]['bot-levels']:
+            markup.add(ButtonScheme(content.combine(content.emoji['menu']['bot'], text['levels'][level]),
+                                    CallSchemas.CONNECT_BOT.encode(game_key, level)))
+        title = content.combine_with_dash(text['title'])
+        super().__init__(title, markup)
+
+
 class LogsInfo(MessageScheme):
     @StaticLogger.exception_logged
     def __init__(self, player: Player, log_report: LogReport):
@@ -1,13 +1,13 @@
-from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton, Message
+import json
+from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton, Message, JsonSerializable
 
 
 class ButtonScheme:
+    __slots__ = ('label', 'callback_data')
+
     def __init__(self, label: str, callback_data: str):
         self.label = label
         self.callback_data = callback_data
-        if len(callback_data) > 64:    # FIXME: TEMP
-            print(callback_data)
-            print(len(callback_data))
 
     def to_inline_button(self):
         return InlineKeyboardButton(text=self.label, callback_data=self.callback_data)
@@ -37,11 +37,83 @@ class MarkupScheme:
         for row in self._button_schemes:
             markup.row(*[scheme.to_inline_button() for scheme in row])
         return markup
-            
-    
+
+
+class KeyboardTemplate:
+    """
+    Prebuilt inline keyboard with fixed callback data, only button labels change between renders.
+    The keyboard JSON is precompiled into segments around the labels.
+    """
+
+    def __init__(self, callback_data_rows: list):
+        self._segments = []
+        prefix = '{"inline_keyboard": ['
+        for row_index, row in enumerate(callback_data_rows):
+            prefix += '[' if row_index == 0 else '], ['
+            for button_index, callback_data in enumerate(row):
+                self._segments.append(prefix + ('{"text": ' if button_index == 0 else ', {"text": '))
+                prefix = f', "callback_data": {json.dumps(callback_data)}}}'
+        self._segments.append(prefix + (']]}' if len(callback_data_rows) else ']}'))
+        self._encoded_labels = dict()    # Dict: [str label] = str JSON encoded label
+
+    @property
+    def button_count(self) -> int:
+        return len(self._segments) - 1
+
+    def fill(self, labels: list):
+        return TemplateMarkup(self, labels)
+
+    def to_json(self, labels: list) -> str:
+        parts = [self._segments[0]]
+        for label, segment in zip(labels, self._segments[1:]):
+            encoded_label = self._encoded_labels.get(label)
+            if encoded_label is None:
+                encoded_label = self._encoded_labels.setdefault(label, json.dumps(label))
+            parts.append(encoded_label)
+            parts.append(segment)
+        return ''.join(parts)
+
+
+class TemplateMarkup(JsonSerializable):
+    """
+    Reply markup of a filled KeyboardTemplate, serialized on demand.
+    Used instead of MarkupScheme, so it's also its own inline markup.
+    """
+
+    def __init__(self, template: KeyboardTemplate, labels: list):
+        if len(labels) != template.button_count:
+            raise ValueError(f'Expected {template.button_count} labels, got {len(labels)}')
+        self._template = template
+        self._labels = labels
+        self._json = None
+
+    def to_inline_markup(self):
+        return self
+
+    def to_json(self) -> str:
+        if self._json is None:
+            self._json = self._template.to_json(self._labels)
+        return self._json
+
+
+class SerializedMarkup(JsonSerializable):
+    """
+    Reply markup serialized once, used instead of MarkupScheme for schemes reused many times.
+    """
+
+    def __init__(self, markup_json: str):
+        self._json = markup_json
+
+    def to_inline_markup(self):
+        return self
+
+    def to_json(self) -> str:
+        return self._json
+
+
 class MessageScheme:
 
-    def __init__(self, title: str, markup_scheme: MarkupScheme = None):
+    def __init__(self, title: str, markup_scheme=None):    # MarkupScheme, TemplateMarkup or SerializedMarkup
         self.title = title
         self.markup_scheme = markup_scheme
 
@@ -52,3 +124,8 @@ class MessageScheme:
 
     def get_inline_markup(self):
         return None if self.markup_scheme is None else self.markup_scheme.to_inline_markup()
+
+    def frozen(self):    # Returns a copy with the markup serialized once
+        if self.markup_scheme is None:
+            return MessageScheme(self.title)
+        return MessageScheme(self.title, SerializedMarkup(self.get_inline_markup().to_json()))
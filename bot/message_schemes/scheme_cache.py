@@ -0,0 +1,28 @@
+from threading import Lock
+
+from message_schemes.message_scheme import MessageScheme
+from player import Player
+
+
+class SchemeCache:
+    """
+    Thread-safe storage of frozen schemes depending only on the player language and the given args.
+    Schemes are built by scheme_type(player) or scheme_type(player, args) on the first request.
+    """
+
+    def __init__(self):
+        self._schemes = dict()    # Dict: [(type scheme_type, str lang, tuple args)] = MessageScheme scheme
+        self._lock = Lock()
+
+    def get(self, scheme_type: type, player: Player, args: dict = None) -> MessageScheme:
+        key = (scheme_type, player.lang, None if args is None else tuple(sorted(args.items())))
+        with self._lock:
+            scheme = self._schemes.get(key)
+        if scheme is not None:
+            return scheme
+        scheme = scheme_type(player) if args is None else scheme_type(player, args)
+        if getattr(scheme, 'title', None) is None:    # Not built, not cached
+            return scheme
+        scheme = scheme.frozen()
+        with self._lock:
+            return self._schemes.setdefault(key, scheme)
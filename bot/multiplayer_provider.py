@@ -1,69 +1,215 @@
+import math
+import time
+from bisect import bisect_left
+from heapq import heappush, heappop
 from threading import Lock
-from collections import deque
+from collections import OrderedDict
 
+from data import content
 from call import Call
 from player import Player
 from game_models.models_enum import GameModels
 
 
 class PlayerConnection:
+    MESSAGE_KEYED_MODELS = {GameModels.HALMA}    # A player can wait for several games from different messages
+
+    __slots__ = ('player', 'call', 'key')
+
     def __init__(self, player: Player, call: Call):
         self.player = player
         self.call = call
+        self.key = PlayerConnection._get_key(player, call)    # Connections with equal keys are the same
+
+    @staticmethod
+    def _get_key(player: Player, call: Call):
+        if GameModels.from_key(call.args['game-key']) in PlayerConnection.MESSAGE_KEYED_MODELS:
+            return call.chat_id, call.message.message_id
+        return player.user_id
+
+
+class RatedQueue:
+    """
+    Waiting connections of a two player game ordered by player rating.
+    Two waiting connections are paired when their rating gap fits the search window of the longer waiting one,
+    the window widens from [initial-window] by [window-growth] per second up to [max-window] of the settings.
+    Connections waiting longer than [wait-timeout] seconds expire.
+    Pairing of rating neighbours and expiry are planned as events in a heap by time,
+    events of changed neighbourhoods are skipped when popped.
+    """
+
+    def __init__(self, settings: dict):
+        self._initial_window = settings['initial-window']
+        self._window_growth = settings['window-growth']
+        self._max_window = settings['max-window']
+        self._wait_timeout = settings['wait-timeout']
+        self._entries = dict()    # Dict: [key] = (float rating, int number, float since, PlayerConnection connection)
+        self._order = []    # Sorted list of (float rating, int number, key)
+        self._events = []    # Heap of (float time, int number, first, second), first and second are (key, int number)
+        self._counter = 0    # Numbers entries and events
+
+    def __len__(self):
+        return len(self._entries)
 
-    def equals(self, connection):
-        if self.call.args['game-key'] != connection.call.args['game-key']:
-            return False
-        if GameModels.from_key(connection.call.args['game-key']) in {GameModels.HALMA}:
-            return self.call.message.message_id == connection.call.message.message_id
-        return self.player.user_id == connection.player.user_id
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def connections(self) -> list:
+        return [entry[3] for entry in self._entries.values()]
+
+    def add(self, connection: PlayerConnection, now: float) -> list:    # Returns a group if paired at once
+        self._counter += 1
+        entry = (connection.player.rating, self._counter, now, connection)
+        item = (entry[0], entry[1], connection.key)
+        index = bisect_left(self._order, item)
+        best_key, best_gap = None, None
+        for neighbour_index in (index - 1, index):
+            if 0 <= neighbour_index < len(self._order):
+                neighbour = self._entries[self._order[neighbour_index][2]]
+                gap = abs(neighbour[0] - entry[0])
+                if self._get_pairing_time(neighbour, entry) <= now and (best_gap is None or gap < best_gap):
+                    best_key, best_gap = neighbour[3].key, gap
+        if best_key is not None:
+            return [self.remove(best_key)[3], connection]
+        self._entries[connection.key] = entry
+        self._order.insert(index, item)
+        self._push_event(now + self._wait_timeout, item, None)
+        self._push_pair_event(index - 1, index)
+        self._push_pair_event(index, index + 1)
+        return None
+
+    def remove(self, key) -> tuple:    # Returns the removed entry
+        entry = self._entries.pop(key)
+        index = bisect_left(self._order, (entry[0], entry[1], key))
+        self._order.pop(index)
+        self._push_pair_event(index - 1, index)
+        return entry
+
+    def update(self, now: float) -> tuple:    # Returns (list groups, list expired_connections)
+        groups, expired = [], []
+        while len(self._events) and self._events[0][0] <= now:
+            _, _, first, second = heappop(self._events)
+            first_entry = self._get_entry(*first)
+            if first_entry is None:
+                continue
+            if second is None:
+                expired.append(self.remove(first[0])[3])
+                continue
+            second_entry = self._get_entry(*second)
+            if second_entry is None or not self._are_neighbours(first_entry, second_entry):
+                continue
+            if first_entry[2] > second_entry[2]:
+                first_entry, second_entry = second_entry, first_entry    # The longer waiting is the first
+            self.remove(first[0])
+            self.remove(second[0])
+            groups.append([first_entry[3], second_entry[3]])
+        return groups, expired
+
+    def clear(self):
+        self._entries.clear()
+        self._order.clear()
+        self._events.clear()
+
+    def _get_entry(self, key, number: int) -> tuple:    # None if the entry was removed or replaced
+        entry = self._entries.get(key)
+        return entry if entry is not None and entry[1] == number else None
+
+    def _are_neighbours(self, first_entry: tuple, second_entry: tuple) -> bool:
+        first_item = (first_entry[0], first_entry[1], first_entry[3].key)
+        second_item = (second_entry[0], second_entry[1], second_entry[3].key)
+        if first_item > second_item:
+            first_item, second_item = second_item, first_item
+        index = bisect_left(self._order, first_item)
+        return index + 1 < len(self._order) and self._order[index + 1] == second_item
+
+    def _get_pairing_time(self, first_entry: tuple, second_entry: tuple) -> float:
+        gap = abs(first_entry[0] - second_entry[0])
+        if gap > self._max_window:
+            return math.inf
+        since = min(first_entry[2], second_entry[2])
+        if gap <= self._initial_window:
+            return since
+        return since + (gap - self._initial_window) / self._window_growth
+
+    def _push_pair_event(self, first_index: int, second_index: int):
+        if first_index < 0 or second_index >= len(self._order):
+            return
+        first_item, second_item = self._order[first_index], self._order[second_index]
+        pairing_time = self._get_pairing_time(self._entries[first_item[2]], self._entries[second_item[2]])
+        if pairing_time != math.inf:
+            self._push_event(pairing_time, first_item, second_item)
+
+    def _push_event(self, event_time: float, first_item: tuple, second_item):
+        self._counter += 1
+        second = None if second_item is None else (second_item[2], second_item[1])
+        heappush(self._events, (event_time, self._counter, (first_item[2], first_item[1]), second))
 
 
 class MultiplayerProvider:
-    def __init__(self):
-        self._lock = Lock()
-        self._queues = {model: [] for model in GameModels}
-        self._groups = {model: deque() for model in GameModels}
+    """
+    Waiting connections of every game model are kept separately and guarded by their own lock.
+    Rated models are matched by player rating in a RatedQueue, other models in an insertion-ordered dict
+    by connection key, where a group is formed of the longest waiting connections.
+    Groups are passed to [group_listener] outside of the locks.
+    Rated queues are matched over time and expired by update, which has to be called periodically.
+    """
+
+    RATED_MODELS = {GameModels.HALMA}
+
+    def __init__(self, group_listener):
+        self._group_listener = group_listener    # Called with (GameModels game_model, list connections)
+        self._locks = {model: Lock() for model in GameModels}
+        self._queues = {model: RatedQueue(content.game_setup[model.key]['matchmaking'])
+                        if model in MultiplayerProvider.RATED_MODELS else OrderedDict() for model in GameModels}
+
+    @property
+    def waiting_count(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
 
     def try_connect(self, game_model: GameModels, connection: PlayerConnection) -> bool:
-        with self._lock:
-            for i in range(len(self._queues[game_model])):
-                if self._queues[game_model][i].equals(connection):
-                    return False
-            self._queues[game_model].append(connection)
-            if len(self._queues[game_model]) >= game_model.value.PLAYER_COUNT:
-                self._groups[game_model].append(self._queues[game_model].copy())
-                self._queues[game_model].clear()
+        group = None
+        queue = self._queues[game_model]
+        with self._locks[game_model]:
+            if connection.key in queue:
+                return False
+            if game_model in MultiplayerProvider.RATED_MODELS:
+                group = queue.add(connection, time.monotonic())
+            else:
+                queue[connection.key] = connection
+                if len(queue) >= game_model.value.PLAYER_COUNT:
+                    group = [queue.popitem(last=False)[1] for _ in range(game_model.value.PLAYER_COUNT)]
+        if group is not None:
+            self._group_listener(game_model, group)
         return True
 
     def try_disconnect(self, game_model: GameModels, connection: PlayerConnection) -> bool:
-        with self._lock:
-            for i in range(len(self._queues[game_model])):
-                if self._queues[game_model][i].equals(connection):
-                    self._queues[game_model].pop(i)
-                    return True
-        return False
-
-    def pop_group(self, game_model: GameModels) -> list:
-        with self._lock:
-            try:
-                return self._groups[game_model].popleft()
-            except IndexError:
-                pass
-
-    def get_all_connections(self) -> set:
-        connections = set()
-        with self._lock:
-            for game_model in self._queues:
-                for connection in self._queues[game_model]:
-                    connections.add(connection)
-            for game_model in self._groups:
-                for group in self._groups[game_model]:
-                    for connection in group:
-                        connections.add(connection)
-        return connections
+        queue = self._queues[game_model]
+        with self._locks[game_model]:
+            if connection.key not in queue:
+                return False
+            if game_model in MultiplayerProvider.RATED_MODELS:
+                queue.remove(connection.key)
+            else:
+                queue.pop(connection.key)
+            return True
 
-    def clear(self):
-        with self._lock:
-            self._queues.clear()
-            self._groups.clear()
+    def update(self) -> list:    # Returns expired connections
+        expired = []
+        for game_model in MultiplayerProvider.RATED_MODELS:
+            with self._locks[game_model]:
+                groups, model_expired = self._queues[game_model].update(time.monotonic())
+            expired.extend(model_expired)
+            for group in groups:
+                self._group_listener(game_model, group)
+        return expired
+
+    def pop_all_connections(self) -> list:
+        connections = []
+        for game_model in GameModels:
+            with self._locks[game_model]:
+                queue = self._queues[game_model]
+                connections.extend(queue.connections if game_model in MultiplayerProvider.RATED_MODELS
+                                   else queue.values())
+                queue.clear()
+        return connections
@@ -0,0 +1,314 @@
+import enum
+import time
+import heapq
+import asyncio
+from threading import Thread, Condition
+from collections import deque
+
+from utils.async_executor import BlockingLimitedExecutor
+from utils.logger import StaticLogger
+from utils.log_types import ExceptionLog
+
+
+class Priority(enum.IntEnum):
+    GAME = 0
+    MENU = 1
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float, now: float):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = now
+        self._blocked_until = now
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self._tokens >= self._capacity and self._blocked_until <= now
+
+    def get_delay(self, now: float) -> float:    # Time left until a token can be taken
+        self._refill(now)
+        token_delay = 0 if self._tokens >= 1 else (1 - self._tokens) / self._rate
+        return max(token_delay, self._blocked_until - now)
+
+    def take(self, now: float):
+        self._refill(now)
+        self._tokens -= 1
+
+    def block(self, now: float, duration: float):
+        self._blocked_until = max(self._blocked_until, now + duration)
+
+    def _refill(self, now: float):
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+class OutboundRequest:
+    def __init__(self, chat_id: int, action, priority: Priority, key=None, on_failed=None):
+        self.chat_id = chat_id
+        self.action = action    # Performs the API call
+        self.priority = priority
+        self.key = key    # Queued request with the same key is replaced, latest wins
+        self.on_failed = on_failed    # Called if the request fails with an error that is not retried
+        self.order = None
+
+
+class _ChatState:
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.requests = deque()
+        self.is_scheduled = False
+        self.in_flight = False
+
+
+class OutboundQueue:
+    """
+    Not thread-safe scheduling core of outbound dispatchers.
+    Requests of a chat are sent one at a time in order of adding, limited by the chat token bucket.
+    Chats are served by priority of their first request, limited by the global token bucket.
+    """
+
+    SWEEP_INTERVAL = 60
+
+    def __init__(self, global_rate: float, chat_rate: float, chat_burst: float):
+        now = time.monotonic()
+        self._global_bucket = TokenBucket(global_rate, max(global_rate, 1), now)
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._chats = dict()    # Dict: [chat_id] = _ChatState state
+        self._keyed_requests = dict()    # Dict: [request.key] = OutboundRequest queued request
+        self._ready = []    # Heap of (priority, order, chat_id)
+        self._waiting = []    # Heap of (ready_time, chat_id)
+        self._order = 0
+        self._request_count = 0
+        self._last_sweep = now
+        self.sent_count = 0
+        self.replaced_count = 0
+        self.retried_count = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return self._request_count == 0
+
+    def put(self, request: OutboundRequest, now: float):
+        if request.key is not None and request.key in self._keyed_requests:
+            queued = self._keyed_requests[request.key]
+            queued.action, queued.priority = request.action, min(queued.priority, request.priority)
+            queued.on_failed = request.on_failed
+            self.replaced_count += 1
+            return
+        self._order += 1
+        request.order = self._order
+        self._request_count += 1
+        if request.key is not None:
+            self._keyed_requests[request.key] = request
+        state = self._chats.get(request.chat_id)
+        if state is None:
+            state = _ChatState(TokenBucket(self._chat_rate, self._chat_burst, now))
+            self._chats[request.chat_id] = state
+        state.requests.append(request)
+        self._schedule(request.chat_id, state, now)
+
+    def pop(self, now: float) -> OutboundRequest:    # Returns None if no request can be sent now
+        while len(self._waiting) and self._waiting[0][0] <= now:
+            chat_id = heapq.heappop(self._waiting)[1]
+            state = self._chats[chat_id]
+            state.is_scheduled = False
+            self._schedule(chat_id, state, now)
+        if not len(self._ready) or self._global_bucket.get_delay(now) > 0:
+            return None
+        chat_id = heapq.heappop(self._ready)[2]
+        state = self._chats[chat_id]
+        state.is_scheduled = False
+        request = state.requests.popleft()
+        if request.key is not None:
+            self._keyed_requests.pop(request.key, None)
+        state.in_flight = True
+        state.bucket.take(now)
+        self._global_bucket.take(now)
+        return request
+
+    def get_delay(self, now: float) -> float:    # Returns None if nothing is scheduled
+        if len(self._ready):
+            return self._global_bucket.get_delay(now)
+        if len(self._waiting):
+            return max(self._waiting[0][0] - now, 0)
+        return None
+
+    def complete(self, request: OutboundRequest, now: float, retry_after: float = None):
+        state = self._chats[request.chat_id]
+        state.in_flight = False
+        if retry_after is None:
+            self.sent_count += 1
+            self._request_count -= 1
+        else:
+            self.retried_count += 1
+            state.bucket.block(now, retry_after)
+            if request.key is not None and request.key in self._keyed_requests:
+                self._request_count -= 1    # Newer request with the same key is queued
+            else:
+                if request.key is not None:
+                    self._keyed_requests[request.key] = request
+                state.requests.appendleft(request)
+        self._schedule(request.chat_id, state, now)
+        if now - self._last_sweep > OutboundQueue.SWEEP_INTERVAL:
+            self._sweep(now)
+
+    def _schedule(self, chat_id: int, state: _ChatState, now: float):
+        if state.is_scheduled or state.in_flight or not len(state.requests):
+            return
+        state.is_scheduled = True
+        delay = state.bucket.get_delay(now)
+        if delay > 0:
+            heapq.heappush(self._waiting, (now + delay, chat_id))
+        else:
+            head = state.requests[0]
+            heapq.heappush(self._ready, (head.priority, head.order, chat_id))
+
+    def _sweep(self, now: float):    # Removes states of idle chats
+        self._last_sweep = now
+        for chat_id in list(self._chats):
+            state = self._chats[chat_id]
+            if not (state.is_scheduled or state.in_flight or len(state.requests)) and state.bucket.is_full(now):
+                self._chats.pop(chat_id)
+
+    @staticmethod
+    def get_retry_after(exception: Exception) -> float:    # Returns None if it's not a rate limit error
+        if getattr(exception, 'error_code', None) != 429:
+            return None
+        result_json = getattr(exception, 'result_json', None) or dict()
+        return float(result_json.get('parameters', dict()).get('retry_after', 1))
+
+
+class OutboundDispatcher:
+    """
+    Sends API requests from up to [workers] threads respecting global and per-chat rate limits.
+    Requests rejected with 429 are retried after retry_after, other failed requests are logged and passed to on_failed.
+    """
+
+    def __init__(self, workers: int, global_rate: float, chat_rate: float, chat_burst: float):
+        self._queue = OutboundQueue(global_rate, chat_rate, chat_burst)
+        self._condition = Condition()
+        self._executor = BlockingLimitedExecutor(workers)
+        Thread(target=self._dispatch_forever, daemon=True).start()
+
+    @property
+    def sent_count(self) -> int:
+        return self._queue.sent_count
+
+    @property
+    def replaced_count(self) -> int:
+        return self._queue.replaced_count
+
+    @property
+    def retried_count(self) -> int:
+        return self._queue.retried_count
+
+    def submit(self, chat_id: int, action, priority: Priority = Priority.MENU, key=None, on_failed=None):
+        with self._condition:
+            self._queue.put(OutboundRequest(chat_id, action, priority, key, on_failed), time.monotonic())
+            self._condition.notify_all()
+
+    def wait_empty(self):
+        with self._condition:
+            while not self._queue.is_empty:
+                self._condition.wait()
+
+    def _dispatch_forever(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    request = self._queue.pop(now)
+                    if request is not None:
+                        break
+                    self._condition.wait(self._queue.get_delay(now))
+            self._executor.execute(self._send, request)
+
+    def _send(self, request: OutboundRequest):
+        retry_after = None
+        try:
+            request.action()
+        except Exception as exception:
+            retry_after = OutboundQueue.get_retry_after(exception)
+            if retry_after is None:
+                StaticLogger.logger.add_log(ExceptionLog(exception, func_name=f'{type(self).__qualname__}._send'))
+                if request.on_failed is not None:
+                    request.on_failed()
+        with self._condition:
+            self._queue.complete(request, time.monotonic(), retry_after)
+            self._condition.notify_all()
+
+
+class AsyncOutboundDispatcher:
+    """
+    Coroutine variant of OutboundDispatcher.
+    Actions return awaitables, up to [max_in_flight] of them are awaited at the same time.
+    """
+
+    def __init__(self, max_in_flight: int, global_rate: float, chat_rate: float, chat_burst: float):
+        self._queue = OutboundQueue(global_rate, chat_rate, chat_burst)
+        self._max_in_flight = max_in_flight
+        self._semaphore = None
+        self._changed_event = None
+        self._tasks = set()
+
+    @property
+    def sent_count(self) -> int:
+        return self._queue.sent_count
+
+    @property
+    def replaced_count(self) -> int:
+        return self._queue.replaced_count
+
+    @property
+    def retried_count(self) -> int:
+        return self._queue.retried_count
+
+    def submit(self, chat_id: int, action, priority: Priority = Priority.MENU, key=None, on_failed=None):
+        if self._changed_event is None:    # Started lazily to be bound to the running loop
+            self._semaphore = asyncio.Semaphore(self._max_in_flight)
+            self._changed_event = asyncio.Event()
+            self._create_task(self._dispatch_forever())
+        self._queue.put(OutboundRequest(chat_id, action, priority, key, on_failed), time.monotonic())
+        self._changed_event.set()
+
+    async def wait_empty(self):
+        while not self._queue.is_empty:
+            self._changed_event.clear()
+            await self._changed_event.wait()
+
+    def _create_task(self, coroutine):
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch_forever(self):
+        while True:
+            now = time.monotonic()
+            request = self._queue.pop(now)
+            if request is None:
+                self._changed_event.clear()
+                try:
+                    await asyncio.wait_for(self._changed_event.wait(), self._queue.get_delay(now))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._semaphore.acquire()
+            self._create_task(self._send(request))
+
+    async def _send(self, request: OutboundRequest):
+        retry_after = None
+        try:
+            await request.action()
+        except Exception as exception:
+            retry_after = OutboundQueue.get_retry_after(exception)
+            if retry_after is None:
+                StaticLogger.logger.add_log(ExceptionLog(exception, func_name=f'{type(self).__qualname__}._send'))
+                if request.on_failed is not None:
+                    request.on_failed()
+        finally:
+            self._semaphore.release()
+        self._queue.complete(request, time.monotonic(), retry_after)
+        self._changed_event.set()
@@ -3,8 +3,28 @@ from game_models.models_enum import GameModels
 
 class Player:
     _default_settings = {GameModels.MEMORY.key: {'w': 4, 'h': 3, 'variety': 6}}
+    DEFAULT_RATING = 1500
+
+    __slots__ = ('user_id', 'lang', 'game_settings', 'rating')
 
     def __init__(self, user_id: int, lang: str = None):
         self.user_id = user_id
         self.lang = 'en' if lang is None else lang
-        self.game_settings = Player._default_settings
+        self.game_settings = {key: dict(settings) for key, settings in Player._default_settings.items()}
+        self.rating = Player.DEFAULT_RATING    # Used for matchmaking in rated games
+
+    @property
+    def is_bot(self) -> bool:
+        return False
+
+
+class BotPlayer(Player):
+    __slots__ = ('level',)
+
+    def __init__(self, level: str):
+        super().__init__(None)
+        self.level = level    # Key of the bot level in game setup
+
+    @property
+    def is_bot(self) -> bool:
+        return True
@@ -1,28 +1,43 @@
 import time
+import asyncio
 from telebot import TeleBot
+from telebot.async_telebot import AsyncTeleBot
 from telebot.types import Message
-from threading import Thread, Lock
+from threading import Thread, Lock, Event
 
 from utils.async_executor import IgnoringLimitedExecutor
 from utils.logger import StaticLogger
 from data.cache import Cache
-from game_service import GameService
-from menu_bot import MenuBot
+from data.player_store import PlayerStore
+from api_session import PooledApiSession
+from game_service import GameService, AsyncGameService
+from menu_bot import MenuBot, AsyncMenuBot
 from call import Call, CallSources
 from player import Player
 from bot_status import BotStatus
+from webhook_server import WebhookServer
 
 
 class QueryHandler:
     def __init__(self, bot: TeleBot, menu_bot: MenuBot, game_service: GameService,
-                 update_workers_count: int, callback_workers_count: int, admin_user_id: int = None):
+                 update_workers_count: int, callback_workers_count: int, admin_user_id: int = None,
+                 webhook_server: WebhookServer = None, player_cache: Cache = None, player_store: PlayerStore = None,
+                 api_session: PooledApiSession = None):
+        self._init_handler(bot, menu_bot, game_service, admin_user_id, webhook_server, player_cache, player_store)
+        self._api_session = api_session    # Request stats are not shown if not specified
+        self._update_executor = IgnoringLimitedExecutor(update_workers_count)
+        self._callback_executor = IgnoringLimitedExecutor(callback_workers_count)
+        self._stopped_event = Event()
+
+    def _init_handler(self, bot, menu_bot, game_service, admin_user_id: int, webhook_server: WebhookServer,
+                      player_cache: Cache, player_store: PlayerStore):    # Fields shared by both variants
         self._admin_user_id = admin_user_id
+        self._webhook_server = webhook_server    # Updates are received with polling if not specified
         self._bot = bot
         self._menu_bot = menu_bot
         self._game_service = game_service
-        self._update_executor = IgnoringLimitedExecutor(update_workers_count)
-        self._callback_executor = IgnoringLimitedExecutor(callback_workers_count)
-        self._player_cache = Cache()
+        self._player_cache = player_cache if player_cache is not None else Cache()
+        self._player_store = player_store    # Player settings are not saved if not specified
         self._bot.set_update_listener(self._handle_updates_async)
         self._bot.register_callback_query_handler(self._handle_callback_async, None)
         self._start_lock = Lock()
@@ -32,14 +47,23 @@ class QueryHandler:
     def start(self):
         if not self._start_lock.acquire(blocking=False):
             raise RuntimeError('Handler can be started only once.')
-        self._game_service.start()
-        self._bot.infinity_polling()
+        self._game_service.start(self._find_player)
+        if self._webhook_server is None:
+            self._bot.infinity_polling()
+        else:
+            if self._webhook_server.url is not None:
+                self._bot.set_webhook(self._webhook_server.url, secret_token=self._webhook_server.secret_token)
+            self._webhook_server.serve(self._handle_updates_async, self._handle_callback_async)
+        self._stopped_event.wait()    # Receiving is finished only by stop()
 
     @StaticLogger.exception_logged
     def stop(self):
         if self._admin_user_id is not None:
             self._menu_bot.inform_server_is_stopping(self._player_cache[self._admin_user_id])   # FIXME: not in cache?
-        self._bot.stop_polling()
+        if self._webhook_server is None:
+            self._bot.stop_polling()
+        else:
+            self._webhook_server.shutdown()
         self._update_executor.pause()
         self._callback_executor.pause()
         time.sleep(0.5)    # Catching lost tasks (requested but not started)
@@ -48,6 +72,8 @@ class QueryHandler:
         self._game_service.stop()
         if self._admin_user_id is not None:
             self._menu_bot.inform_server_is_stopped(self._player_cache[self._admin_user_id])   # FIXME: not in cache?
+        self._menu_bot.flush()
+        self._stopped_event.set()
 
     @StaticLogger.exception_logged
     def _handle_updates_async(self, updates):
@@ -62,8 +88,7 @@ class QueryHandler:
     def _handle_message(self, message: Message):
         player = self._find_player_from_message(message)
         if message.text == '/admin' and player.user_id == self._admin_user_id:
-            self._menu_bot.display_admin_menu(player, BotStatus(self._is_paused, self._game_service.active_game_count,
-                                                                StaticLogger.logger.log_count))
+            self._menu_bot.display_admin_menu(player, self._get_status())
         if self._is_paused and player.user_id != self._admin_user_id:
             self._menu_bot.inform_bot_is_paused(player)
         else:
@@ -81,6 +106,7 @@ class QueryHandler:
                 self._menu_bot.reply_to_navigation(player, call)
             if call.source == CallSources.UPDATE_PARAM:
                 self._menu_bot.reply_to_param_update(player, call)
+                self._save_player(player)
             if call.source == CallSources.GAME:
                 self._game_service.add_game_call(call)
             if call.source == CallSources.CONNECTING:
@@ -96,28 +122,184 @@ class QueryHandler:
         if call.args['action'] == 'pause-bot':
             if not self._is_paused:
                 self._is_paused = True
-                self._menu_bot.display_admin_menu(player, BotStatus(self._is_paused,
-                                                  self._game_service.active_game_count, StaticLogger.logger.log_count),
-                                                  call.message)
+                self._menu_bot.display_admin_menu(player, self._get_status(), call.message)
         if call.args['action'] == 'resume-bot':
             if self._is_paused:
                 self._is_paused = False
-                self._menu_bot.display_admin_menu(player, BotStatus(self._is_paused,
-                                                  self._game_service.active_game_count, StaticLogger.logger.log_count),
-                                                  call.message)
+                self._menu_bot.display_admin_menu(player, self._get_status(), call.message)
         if call.args['action'] == 'stop-server':
             Thread(target=self.stop).start()
         if call.args['action'] == 'load-logs':
             self._menu_bot.display_logs(player, StaticLogger.logger.get_report())
 
+    def _get_status(self) -> BotStatus:
+        return BotStatus(self._is_paused, self._game_service.active_game_count, StaticLogger.logger.log_count,
+                         self._menu_bot.skipped_edit_count, self._game_service.bot_opponent_stats,
+                         self._player_cache.stats, None if self._api_session is None else self._api_session.stats)
+
+    def _save_player(self, player: Player):
+        if self._player_store is not None:
+            self._player_store.save(player)
+
     @StaticLogger.exception_logged
     def _find_player_from_message(self, message: Message) -> Player:
-        player = self._player_cache[message.chat.id]
+        return self._find_player(message.chat.id, QueryHandler._get_message_lang(message))
+
+    def _find_player(self, user_id: int, lang: str) -> Player:    # [lang] is used if the player is new
+        player = self._player_cache[user_id]
+        if player is None:
+            player = Player(user_id, lang)
+            self._player_cache[user_id] = player
+        return player
+
+    @staticmethod
+    def _get_message_lang(message: Message) -> str:    # Language of a new player
+        lang = message.from_user.language_code
+        return lang if lang in ['en', 'ru'] else 'en'
+
+
+class AsyncQueryHandler(QueryHandler):
+    """
+    Coroutine variant of QueryHandler.
+    Updates are handled by tasks on a single event loop instead of worker threads.
+    """
+
+    POLLING_TIMEOUT = 20
+
+    def __init__(self, bot: AsyncTeleBot, menu_bot: AsyncMenuBot, game_service: AsyncGameService,
+                 admin_user_id: int = None, webhook_server: WebhookServer = None, player_cache: Cache = None,
+                 player_store: PlayerStore = None):
+        self._init_handler(bot, menu_bot, game_service, admin_user_id, webhook_server, player_cache, player_store)
+        self._api_session = None    # Requests are counted only by the threaded session
+        self._is_stopping = False
+        self._tasks = set()
+        self._loop = None
+        self._receiving_future = None
+        self._stop_task = None
+        self._stopped_event = None
+
+    @StaticLogger.exception_logged
+    def start(self):
+        if not self._start_lock.acquire(blocking=False):
+            raise RuntimeError('Handler can be started only once.')
+        asyncio.run(self._run())
+
+    @StaticLogger.exception_logged
+    async def stop(self):
+        if self._admin_user_id is not None:
+            await self._menu_bot.inform_server_is_stopping(self._player_cache[self._admin_user_id])
+        self._is_stopping = True
+        if self._webhook_server is None:
+            self._receiving_future.cancel()
+        else:
+            await self._loop.run_in_executor(None, self._webhook_server.shutdown)
+        await asyncio.wait([self._receiving_future])    # Polling closes the API session when finished
+        current_task = asyncio.current_task()
+        while len(self._tasks.difference({current_task})):
+            await asyncio.wait(list(self._tasks.difference({current_task})))
+        await self._game_service.stop()
+        if self._admin_user_id is not None:
+            await self._menu_bot.inform_server_is_stopped(self._player_cache[self._admin_user_id])
+        await self._menu_bot.flush()
+        self._stopped_event.set()
+
+    async def _run(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped_event = asyncio.Event()
+        self._game_service.start(self._find_player)
+        if self._webhook_server is None:
+            self._receiving_future = self._loop.create_task(self._bot.infinity_polling(
+                timeout=AsyncQueryHandler.POLLING_TIMEOUT, request_timeout=AsyncQueryHandler.POLLING_TIMEOUT + 10))
+        else:
+            if self._webhook_server.url is not None:
+                await self._bot.set_webhook(self._webhook_server.url, secret_token=self._webhook_server.secret_token)
+            self._receiving_future = self._loop.run_in_executor(None, self._webhook_server.serve,
+                                                                self._receive_updates_threadsafe,
+                                                                self._receive_callback_threadsafe)
+        try:
+            await self._receiving_future
+        except asyncio.CancelledError:
+            pass
+        if self._is_stopping:
+            await self._stopped_event.wait()
+        await self._bot.close_session()
+
+    def _receive_updates_threadsafe(self, updates):    # Called by webhook server threads
+        asyncio.run_coroutine_threadsafe(self._handle_updates_async(updates), self._loop)
+
+    def _receive_callback_threadsafe(self, callback_query):    # Called by webhook server threads
+        asyncio.run_coroutine_threadsafe(self._handle_callback_async(callback_query), self._loop)
+
+    def _create_task(self, coroutine):
+        if self._is_stopping:
+            coroutine.close()
+            return
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @StaticLogger.exception_logged
+    async def _handle_updates_async(self, updates):
+        for update in updates:
+            self._create_task(self._handle_message(update))
+
+    @StaticLogger.exception_logged
+    async def _handle_callback_async(self, callback_query):
+        self._create_task(self._handle_callback(Call(callback_query)))
+
+    @StaticLogger.exception_logged
+    async def _handle_message(self, message: Message):
+        player = await self._find_player_from_message(message)
+        if message.text == '/admin' and player.user_id == self._admin_user_id:
+            await self._menu_bot.display_admin_menu(player, self._get_status())
+        if self._is_paused and player.user_id != self._admin_user_id:
+            await self._menu_bot.inform_bot_is_paused(player)
+        else:
+            await self._menu_bot.reply_to_message(player, message)
+
+    @StaticLogger.exception_logged
+    async def _handle_callback(self, call: Call):
+        player = await self._find_player_from_message(call.message)
+        if self._is_paused and call.source not in [CallSources.GAME, CallSources.ADMIN] \
+                and player.user_id != self._admin_user_id:
+            await self._menu_bot.inform_bot_is_paused(player)
+            await self._bot.answer_callback_query(call.call_id)
+        else:
+            if call.source == CallSources.NAVIGATION:
+                await self._menu_bot.reply_to_navigation(player, call)
+            if call.source == CallSources.UPDATE_PARAM:
+                await self._menu_bot.reply_to_param_update(player, call)
+                self._save_player(player)
+            if call.source == CallSources.GAME:
+                self._game_service.add_game_call(call)
+            if call.source == CallSources.CONNECTING:
+                await self._game_service.handle_connecting_call(player, call)
+            if call.source == CallSources.ADMIN:
+                await self._handle_admin_callback(player, call)
+            await self._bot.answer_callback_query(call.call_id)
+
+    @StaticLogger.exception_logged
+    async def _handle_admin_callback(self, player: Player, call: Call):
+        if player.user_id != self._admin_user_id:
+            return
+        if call.args['action'] == 'pause-bot':
+            if not self._is_paused:
+                self._is_paused = True
+                await self._menu_bot.display_admin_menu(player, self._get_status(), call.message)
+        if call.args['action'] == 'resume-bot':
+            if self._is_paused:
+                self._is_paused = False
+                await self._menu_bot.display_admin_menu(player, self._get_status(), call.message)
+        if call.args['action'] == 'stop-server':
+            if self._stop_task is None:
+                self._stop_task = asyncio.get_running_loop().create_task(self.stop())
+        if call.args['action'] == 'load-logs':
+            await self._menu_bot.display_logs(player, StaticLogger.logger.get_report())
+
+    @StaticLogger.exception_logged
+    async def _find_player_from_message(self, message: Message) -> Player:
+        player = self._player_cache.get_cached(message.chat.id)    # Hits don't leave the event loop
         if player is not None:
             return player
-        lang = message.from_user.language_code
-        if lang not in ['en', 'ru']:
-            lang = 'en'
-        player = Player(message.chat.id, lang)
-        self._player_cache[player.user_id] = player
-        return player
+        return await self._loop.run_in_executor(None, self._find_player, message.chat.id,
+                                                QueryHandler._get_message_lang(message))
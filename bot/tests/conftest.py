@@ -0,0 +1,28 @@
+import os
+import sys
+
+BOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BOT_DIRECTORY)    # Modules of the bot are imported as top-level ones, like by main.py
+os.environ.setdefault('DATA_DIRECTORY', os.path.join(BOT_DIRECTORY, 'data'))
+
+import pytest
+from telebot import apihelper, asyncio_helper
+
+from utils.logger import Logger, StaticLogger
+from fake_api import FakeApi
+
+
+@pytest.fixture(autouse=True)
+def logger() -> Logger:
+    StaticLogger.logger = Logger()
+    return StaticLogger.logger
+
+
+@pytest.fixture
+def fake_api() -> FakeApi:    # TeleBot and AsyncTeleBot requests are sent to the fake API
+    api = FakeApi()
+    urls = apihelper.API_URL, asyncio_helper.API_URL
+    apihelper.API_URL = asyncio_helper.API_URL = api.url
+    yield api
+    apihelper.API_URL, asyncio_helper.API_URL = urls
+    api.close()
@@ -0,0 +1,143 @@
+import json
+import time
+import socket
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread, Condition
+
+
+class FakeApi:
+    """
+    Local stand-in of the Telegram Bot API: records called methods and serves pushed updates to getUpdates.
+    Queued failures are returned instead of the next results of their method, e.g. 429 with retry_after.
+    """
+
+    POLLING_TIMEOUT = 0.5    # In seconds, getUpdates returns earlier than requested to let polling stop quickly
+
+    def __init__(self):
+        self._condition = Condition()
+        self._updates = []
+        self._calls = []    # Tuples of (float time, str method, dict params)
+        self._failures = dict()    # Dict: [str method] = list of (int error_code, dict parameters)
+        self._message_id = 1000
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._create_request_handler())
+        self._server.daemon_threads = True
+        Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:    # Template of TeleBot API_URL
+        return f'http://127.0.0.1:{self._server.server_address[1]}/bot{{0}}/{{1}}'
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def push_update(self, update: dict):
+        with self._condition:
+            update['update_id'] = len(self._updates) + 1
+            self._updates.append(update)
+            self._condition.notify_all()
+
+    def fail(self, method: str, error_code: int, parameters: dict = None, count: int = 1):
+        with self._condition:
+            self._failures.setdefault(method, []).extend([(error_code, parameters)] * count)
+
+    def get_calls(self, method: str) -> list:    # Tuples of (float time, dict params)
+        with self._condition:
+            return [(call_time, params) for call_time, call_method, params in self._calls if call_method == method]
+
+    def wait_for(self, predicate, timeout: float = 10) -> bool:    # [predicate] is called with the fake API
+        return wait_until(lambda: predicate(self), timeout)
+
+    def handle(self, method: str, params: dict) -> tuple:    # (int status, dict response)
+        with self._condition:
+            self._calls.append((time.monotonic(), method, params))
+            failures = self._failures.get(method)
+            if failures:
+                error_code, parameters = failures.pop(0)
+                return error_code, {'ok': False, 'error_code': error_code, 'description': 'Fake failure',
+                                    'parameters': parameters or dict()}
+        if method == 'getUpdates':
+            return 200, {'ok': True, 'result': self._get_updates(int(params.get('offset') or 0))}
+        if method == 'getMe':
+            return 200, {'ok': True, 'result': {'id': 1, 'is_bot': True, 'first_name': 'bot', 'username': 'bot'}}
+        if method == 'sendMessage':
+            with self._condition:
+                self._message_id += 1
+                message_id = self._message_id
+            return 200, {'ok': True, 'result': {'message_id': message_id, 'date': 1, 'text': params.get('text', ''),
+                                                'chat': {'id': int(params['chat_id']), 'type': 'private'}}}
+        return 200, {'ok': True, 'result': True}
+
+    def _get_updates(self, offset: int) -> list:
+        deadline = time.monotonic() + FakeApi.POLLING_TIMEOUT
+        with self._condition:
+            while True:
+                updates = [update for update in self._updates if update['update_id'] >= offset]
+                remaining_time = deadline - time.monotonic()
+                if len(updates) or remaining_time <= 0:
+                    return updates
+                self._condition.wait(remaining_time)
+
+    def _create_request_handler(self):
+        api = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'    # Connections are kept alive
+            disable_nagle_algorithm = True    # Headers and body are written separately, delayed ACKs stall them
+
+            def do_GET(self):
+                self.do_POST()
+
+            def do_POST(self):
+                path, _, query = self.path.partition('?')
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode() if length else ''
+                if 'json' in self.headers.get('Content-Type', '') and body:
+                    params = json.loads(body)
+                else:
+                    params = {key: values[0] for key, values in urllib.parse.parse_qs(body or query).items()}
+                status, response = api.handle(path.rsplit('/', 1)[-1], params)
+                data = json.dumps(response).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return RequestHandler
+
+
+def wait_until(predicate, timeout: float = 10) -> bool:    # Returns False if [predicate] is still false
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def get_free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def create_user(user_id: int) -> dict:
+    return {'id': user_id, 'is_bot': False, 'first_name': 'Player', 'language_code': 'en'}
+
+
+def create_message_update(chat_id: int, text: str, message_id: int = 1) -> dict:
+    return {'message': {'message_id': message_id, 'date': 1, 'text': text, 'from': create_user(chat_id),
+                        'chat': {'id': chat_id, 'type': 'private'}}}
+
+
+def create_callback_update(chat_id: int, data: str, message_id: int) -> dict:
+    return {'callback_query': {'id': f'{chat_id}-{message_id}-{data}', 'chat_instance': 'chat', 'data': data,
+                               'from': create_user(chat_id),
+                               'message': {'message_id': message_id, 'date': 1, 'text': 'Menu',
+                                           'chat': {'id': chat_id, 'type': 'private'},
+                                           'from': {'id': 1, 'is_bot': True, 'first_name': 'bot'}}}}
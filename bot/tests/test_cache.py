@@ -0,0 +1,46 @@
+import time
+
+from data.cache import Cache
+
+
+class CountingLoader:
+    def __init__(self, values: dict):
+        self.values = values
+        self.keys = []
+
+    def __call__(self, key):
+        self.keys.append(key)
+        return self.values.get(key)
+
+
+def test_least_recently_called_items_are_evicted():
+    cache = Cache(max_size=2 * Cache.STRIPE_COUNT)    # Two items per stripe
+    first, second, third = 0, Cache.STRIPE_COUNT, 2 * Cache.STRIPE_COUNT    # Keys of the same stripe
+    cache[first], cache[second] = 'a', 'b'
+    assert cache[first] == 'a'
+    cache[third] = 'c'
+    assert (cache[first], cache[second], cache[third]) == ('a', None, 'c')
+    assert cache.stats.eviction_count == 1 and cache.stats.size == 2
+
+
+def test_items_expire_after_ttl_since_the_last_call():
+    cache = Cache(ttl=0.1)
+    cache[1] = 'a'
+    time.sleep(0.06)
+    assert cache[1] == 'a'
+    time.sleep(0.06)
+    assert cache[1] == 'a'    # Called within the ttl
+    time.sleep(0.12)
+    assert cache[1] is None
+    assert cache.stats.eviction_count == 1
+
+
+def test_missing_items_are_read_through_the_loader_once():
+    loader = CountingLoader({1: 'a'})
+    cache = Cache(loader=loader)
+    assert cache.get_cached(1) is None
+    assert cache[1] == 'a' and cache[1] == 'a' and cache.get_cached(1) == 'a'
+    assert cache[2] is None and cache[2] is None    # Unknown keys are not stored
+    assert loader.keys == [1, 2, 2]
+    stats = cache.stats
+    assert (stats.hit_count, stats.miss_count, stats.size) == (2, 3, 1)
@@ -0,0 +1,41 @@
+from concurrent.futures import Future
+
+from game_service import GameService
+from game_models.halma import HalmaModel
+from player import Player, BotPlayer
+from game import Game
+
+
+class FakeBotOpponent:    # Searches are finished by the test
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, game: Game, player_index: int) -> Future:
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
+def test_removed_game_is_not_left_thinking():
+    bot_opponent = FakeBotOpponent()
+    service = GameService(None, 1, bot_opponent)
+    game = Game(HalmaModel(), [BotPlayer('easy'), Player(1)])
+    service._active_games.add(game.uid, game)
+    service._request_bot_move(game)
+    assert game.uid in service._thinking_game_keys
+    service._remove_active_game(game, acquired=False)
+    assert game.uid not in service._thinking_game_keys
+    bot_opponent.futures[0].set_result(game.model.generate_moves(0)[0])
+    assert game.uid not in service._thinking_game_keys and not game.has_calls
+
+
+def test_timers_of_a_removed_game_are_canceled():
+    service = GameService(None, 1)
+    game = Game(HalmaModel(60), [Player(1), Player(2)])
+    service._resume_game(game)
+    turn_timer = game.turn_timer
+    game.model.try_move(0, game.model.generate_moves(0)[0])
+    service._request_turn_clock(game)
+    assert turn_timer.is_canceled and not game.turn_timer.is_canceled    # The clock of the next turn
+    service._remove_active_game(game, acquired=False)
+    assert game.turn_timer.is_canceled and game.idle_timer.is_canceled
@@ -0,0 +1,50 @@
+import struct
+
+import pytest
+
+from game_snapshots import GameSnapshots
+from game_models.memory import MemoryModel
+from game_models.halma import HalmaModel
+from player import Player, BotPlayer
+from game import Game
+
+
+def create_games() -> list:    # With moves made and messages displayed
+    memory_game = Game(MemoryModel(4, 5, 10), [Player(1, 'en')])
+    memory_game.model.try_select(0, 0)
+    memory_game.messages[0]['main'] = GameSnapshots._create_message(1, 100)
+    halma_game = Game(HalmaModel(60), [Player(2, 'ru'), BotPlayer('easy')])
+    halma_game.model.try_move(0, halma_game.model.generate_moves(0)[0])
+    halma_game.messages[0]['main'] = GameSnapshots._create_message(2, 200)
+    untimed_game = Game(HalmaModel(), [Player(3, 'en'), Player(4, 'ru')])
+    untimed_game.model.try_click(0, 5, 7)
+    return [memory_game, halma_game, untimed_game]
+
+
+def get_state(game: Game) -> tuple:
+    players = [(player.level,) if player.is_bot else (player.user_id, player.lang) for player in game.players]
+    messages = [{tag: (message.chat.id, message.message_id) for tag, message in messages.items()}
+                for messages in game.messages]
+    return game.uid, game.model_type, players, messages, game.model.get_snapshot()
+
+
+def test_games_are_restored_as_dumped():
+    games = create_games()
+    restored_games = GameSnapshots.loads(GameSnapshots.dump(games))
+    assert [get_state(game) for game in restored_games] == [get_state(game) for game in games]
+
+
+def test_file_is_removed_after_games_are_restored(tmp_path):
+    file_path = str(tmp_path / 'games.snapshot')
+    GameSnapshots.save(file_path, create_games())
+    assert len(GameSnapshots.load(file_path)) == 3
+    assert GameSnapshots.load(file_path) == []
+
+
+def test_bad_file_is_kept_aside(tmp_path):
+    file_path = tmp_path / 'games.snapshot'
+    file_path.write_bytes(GameSnapshots.dump(create_games())[:-5])
+    with pytest.raises((struct.error, ValueError)):
+        GameSnapshots.load(str(file_path))
+    assert not file_path.exists() and (tmp_path / 'games.snapshot.bad').exists()
+    assert GameSnapshots.load(str(file_path)) == []
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from game_models.halma import HalmaModel
+import reference_halma
+
+SQUARES = [(i, j) for i in range(8) for j in range(8)]
+
+
+def get_view(model) -> tuple:    # Everything the players can observe, both models must have the same views
+    boards = []
+    for player_index in (0, 1):
+        board = model.get_board(player_index)
+        boards.append(tuple((board[i, j].color, board[i, j].is_selected, board[i, j].is_empty) for i, j in SQUARES))
+    return (tuple(boards), model.turn, model.is_ended, model.move_count, model.can_end_turn(0),
+            model.can_end_turn(1), tuple(result.status for result in model.results))
+
+
+def set_position(reference: reference_halma.HalmaModel, model: HalmaModel, pieces: tuple):
+    for square in SQUARES:
+        reference._board[square] = reference_halma.HalmaSquare()
+    for color in (0, 1):
+        for square in pieces[color]:
+            reference._board[square].color = color
+    model._masks = [sum(1 << (i * 8 + j) for i, j in pieces[color]) for color in (0, 1)]
+
+
+def create_endgame_pieces(rng: random.Random) -> tuple:    # Few pieces are left out of the goals, games can end
+    top = [square for square in SQUARES if sum(square) < 4]
+    bottom = [square for square in SQUARES if sum(square) > 10]
+    middle = [square for square in SQUARES if 4 <= sum(square) <= 10]
+    outside_count = rng.randrange(1, 4)
+    outside = rng.sample(middle, 2 * outside_count)
+    return (rng.sample(top, 10 - outside_count) + outside[:outside_count],
+            rng.sample(bottom, 10 - outside_count) + outside[outside_count:])
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_bitboard_model_behaves_like_reference(seed: int):
+    rng = random.Random(seed)
+    for game_index in range(10):
+        reference, model = reference_halma.HalmaModel(), HalmaModel()
+        if game_index % 2:
+            set_position(reference, model, create_endgame_pieces(rng))
+
+        def click(player_index: int, i: int, j: int) -> bool:
+            clicked = reference.try_click(player_index, i, j)
+            assert model.try_click(player_index, i, j) == clicked
+            return clicked
+
+        for step in range(1000):
+            player_index = reference.turn ^ (rng.random() < 0.03)    # Sometimes the other player clicks
+            action = rng.random()
+            if action < 0.05:
+                assert model.try_end_turn(player_index) == reference.try_end_turn(player_index)
+            elif action < 0.15:
+                click(player_index, rng.randrange(8), rng.randrange(8))
+            else:    # Selects an own piece and tries to move it forward
+                board = reference.get_board(0)
+                own = [square for square in SQUARES if board[square].color == player_index]
+                behind = [square for square in own if (sum(square) >= 4 if player_index == 0 else sum(square) <= 10)]
+                i, j = rng.choice(behind if len(behind) and rng.random() < 0.9 else own)
+                click(player_index, i, j)
+                direction = 1 if player_index == 0 else -1
+                targets = [(i + di, j + dj) for di in range(-2, 3) for dj in range(-2, 3)
+                           if 0 <= i + di < 8 and 0 <= j + dj < 8]
+                targets.sort(key=lambda target: direction * sum(target) + rng.random() * 3)
+                for target in targets[:6]:
+                    if click(player_index, *target):
+                        break
+            assert get_view(model) == get_view(reference), (game_index, step)
+            if reference.is_ended:
+                break
@@ -0,0 +1,14 @@
+from game_models.halma import HalmaModel
+from game_models.halma_search import search_move
+
+
+def test_searched_moves_are_legal():
+    model = HalmaModel()
+    for _ in range(40):
+        player_index = model.turn
+        result = search_move(2, 1, 0.2, model.get_masks(), player_index)
+        assert result.move is not None
+        assert model.try_move(player_index, result.move)
+        assert model.turn != player_index
+        if model.is_ended:
+            break
@@ -0,0 +1,83 @@
+import time
+
+from telebot import TeleBot
+from telebot.types import Message
+
+from chat_bot import ChatBot
+from outbound_dispatcher import OutboundDispatcher, OutboundQueue, OutboundRequest, Priority
+from fake_api import FakeApi, create_message_update
+
+
+def create_message(chat_id: int, message_id: int, text: str) -> Message:
+    return Message.de_json(create_message_update(chat_id, text, message_id)['message'])
+
+
+def get_last_texts(api: FakeApi) -> dict:    # Dict: [(int chat_id, int message_id)] = str text of the last edit
+    texts = dict()
+    for _, params in api.get_calls('editMessageText'):
+        texts[(int(params['chat_id']), int(params['message_id']))] = params['text']
+    return texts
+
+
+def test_edit_rejected_with_429_is_retried_after_retry_after(fake_api: FakeApi, logger):
+    fake_api.fail('editMessageText', 429, {'retry_after': 1})
+    dispatcher = OutboundDispatcher(4, 30, 1, 3)
+    chat_bot = ChatBot(TeleBot('1:token'), dispatcher)
+    chat_bot.update_message(create_message(5, 10, 'Board'))
+    chat_bot.flush()
+    (rejected_time, _), (sent_time, params) = fake_api.get_calls('editMessageText')
+    assert sent_time - rejected_time >= 0.95
+    assert params['text'] == 'Board'
+    assert (dispatcher.retried_count, dispatcher.sent_count) == (1, 1)
+    assert logger.log_count == 0
+
+
+def test_no_edits_are_lost_under_429s(fake_api: FakeApi, logger):
+    fake_api.fail('editMessageText', 429, {'retry_after': 1}, count=10)
+    dispatcher = OutboundDispatcher(8, 30, 1, 3)
+    chat_bot = ChatBot(TeleBot('1:token'), dispatcher)
+    messages = [create_message(100 + chat_index, 10, '') for chat_index in range(20)]
+    for state in range(5):
+        for message in messages:
+            message.text = f'State {state}'
+            chat_bot.update_message(message, Priority.GAME)
+    chat_bot.flush()
+    assert get_last_texts(fake_api) == {(message.chat.id, 10): 'State 4' for message in messages}
+    assert dispatcher.retried_count == 10
+    assert logger.log_count == 0
+
+
+def test_game_requests_are_sent_before_menu_requests():
+    queue = OutboundQueue(30, 1, 3)
+    now = time.monotonic()
+    queue.put(OutboundRequest(1, 'menu', Priority.MENU), now)
+    queue.put(OutboundRequest(2, 'game', Priority.GAME), now)
+    assert [queue.pop(now).action, queue.pop(now).action] == ['game', 'menu']
+
+
+def test_chat_requests_are_limited_by_chat_bucket():
+    queue = OutboundQueue(30, 1, 3)
+    now = time.monotonic()
+    for index in range(5):
+        queue.put(OutboundRequest(1, index, Priority.GAME), now)
+    sent = []
+    for _ in range(3):    # Burst
+        request = queue.pop(now)
+        sent.append(request.action)
+        queue.complete(request, now)
+    assert queue.pop(now) is None
+    assert 0 < queue.get_delay(now) <= 1
+    request = queue.pop(now + 1)
+    assert request.action == 3 and sent == [0, 1, 2]
+
+
+def test_retry_after_is_read_from_429_only():
+    class ApiError(Exception):
+        def __init__(self, error_code: int, parameters: dict):
+            super().__init__()
+            self.error_code = error_code
+            self.result_json = {'parameters': parameters}
+
+    assert OutboundQueue.get_retry_after(ApiError(429, {'retry_after': 7})) == 7
+    assert OutboundQueue.get_retry_after(ApiError(400, {'retry_after': 7})) is None
+    assert OutboundQueue.get_retry_after(ConnectionError()) is None
@@ -0,0 +1,66 @@
+import pytest
+from telebot import TeleBot
+from telebot.types import Message
+
+from data.cache import Cache
+from data.player_store import PlayerStore
+from query_handler import QueryHandler
+from player import Player
+from fake_api import create_message_update
+
+
+@pytest.fixture
+def file_path(tmp_path) -> str:
+    return str(tmp_path / 'players.db')
+
+
+def create_player(user_id: int) -> Player:
+    player = Player(user_id, 'ru')
+    player.game_settings['memory'] = {'w': 5}
+    player.rating = 1600.5
+    return player
+
+
+def get_state(player: Player) -> tuple:
+    return player.user_id, player.lang, player.game_settings, player.rating
+
+
+def test_saved_players_are_loaded_before_and_after_writing(file_path: str):
+    store = PlayerStore(file_path, 3600)
+    store.save(create_player(1))
+    assert get_state(store.load(1)) == get_state(create_player(1))    # Pending
+    assert store.load(2) is None
+    store.start()
+    store.stop()
+    assert store.written_count == 1
+    store = PlayerStore(file_path, 3600)
+    assert get_state(store.load(1)) == get_state(create_player(1))
+    store.stop()
+
+
+def test_rows_saved_again_are_written_once(file_path: str):
+    store = PlayerStore(file_path, 3600)
+    store.save(Player(1, 'en'))
+    store.save(create_player(1))
+    store.start()
+    store.stop()
+    assert store.written_count == 1
+    store = PlayerStore(file_path, 3600)
+    assert store.load(1).lang == 'ru'
+    store.stop()
+
+
+def test_new_player_is_read_from_the_store_once(file_path: str):
+    store = PlayerStore(file_path, 3600)
+    loaded_user_ids = []
+
+    def load(user_id: int) -> Player:
+        loaded_user_ids.append(user_id)
+        return store.load(user_id)
+
+    handler = QueryHandler(TeleBot('1:token'), None, None, 1, 1, player_cache=Cache(loader=load), player_store=store)
+    message = Message.de_json(create_message_update(5, '/start')['message'])
+    assert handler._find_player_from_message(message).user_id == 5
+    assert handler._find_player_from_message(message).user_id == 5
+    assert loaded_user_ids == [5]
+    store.stop()
@@ -0,0 +1,30 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from utils.process_lane import ProcessLane
+from utils.log_types import ExceptionLog
+
+
+@pytest.fixture
+def lane() -> ProcessLane:
+    lane = ProcessLane(1)
+    yield lane
+    lane.shutdown()
+
+
+def test_lane_gets_new_workers_after_a_worker_dies(lane: ProcessLane):
+    failed_future = lane.submit(os._exit, 1)
+    assert isinstance(failed_future.exception(timeout=30), BrokenProcessPool)
+    assert 'BrokenProcessPool' in str(ExceptionLog(failed_future.exception(), func_name='os._exit'))
+    assert lane.submit(pow, 2, 10).result(timeout=30) == 1024
+
+
+def test_worker_exceptions_are_logged_without_traceback(lane: ProcessLane):
+    future = lane.submit(int, 'x')
+    assert future.exception(timeout=30).__traceback__ is None
+    assert 'ValueError' in str(ExceptionLog(future.exception()))
+    lane.shutdown()
+    with pytest.raises(RuntimeError):
+        lane.submit(pow, 2, 10)
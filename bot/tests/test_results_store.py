@@ -0,0 +1,43 @@
+import pytest
+
+from data.results_store import ResultsStore
+
+MEMORY_BOARD = 'memory/easy'
+
+
+@pytest.fixture
+def store(tmp_path) -> ResultsStore:
+    store = ResultsStore(str(tmp_path / 'results.db'), 1)
+    yield store
+    store.stop()
+
+
+def add_scores(store: ResultsStore, board: str, scores: dict):    # Dict: [int user_id] = float score
+    store._add_pending([(0, board, user_id, 'win', 0, score) for user_id, score in scores.items()])
+    store._flush(store._connection)
+
+
+def get_ranks(store: ResultsStore, board: str, user_ids) -> list:
+    return [store.get_leaderboard(board, user_id, 3).rank for user_id in user_ids]
+
+
+def test_players_of_one_bucket_have_distinct_ranks(store: ResultsStore):
+    add_scores(store, ResultsStore.HALMA_KEY, {1: 1516.2, 2: 1516.9, 3: 1517.5, 4: 1400, 5: 1516.5})
+    assert get_ranks(store, ResultsStore.HALMA_KEY, [3, 2, 5, 1, 4]) == [1, 2, 3, 4, 5]
+    leaderboard = store.get_leaderboard(ResultsStore.HALMA_KEY, 1, 3)
+    assert leaderboard.entries == [(3, 1517.5), (2, 1516.9), (5, 1516.5)]
+    assert leaderboard.score == 1516.2
+
+
+def test_changed_rating_moves_player_between_buckets(store: ResultsStore):
+    add_scores(store, ResultsStore.HALMA_KEY, {1: 1516.2, 2: 1516.9})
+    add_scores(store, ResultsStore.HALMA_KEY, {2: 1480.4})
+    assert get_ranks(store, ResultsStore.HALMA_KEY, [1, 2]) == [1, 2]
+    assert store.get_leaderboard(ResultsStore.HALMA_KEY, 3, 3).rank is None
+
+
+def test_best_memory_result_is_ranked(store: ResultsStore):
+    add_scores(store, MEMORY_BOARD, {1: 12, 2: 15, 3: 11, 4: 12})
+    add_scores(store, MEMORY_BOARD, {2: 18, 3: 10})    # Only the better result of player 3 is kept
+    assert get_ranks(store, MEMORY_BOARD, [3, 1, 4, 2]) == [1, 2, 2, 4]
+    assert store.get_leaderboard(MEMORY_BOARD, 2, 3).score == 15
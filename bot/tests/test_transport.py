@@ -0,0 +1,96 @@
+import json
+import time
+import urllib.error
+import urllib.request
+from threading import Thread
+
+import pytest
+from telebot import TeleBot
+from telebot.async_telebot import AsyncTeleBot
+
+from query_handler import QueryHandler, AsyncQueryHandler
+from game_service import GameService, AsyncGameService
+from chat_bot import ChatBot, AsyncChatBot
+from menu_bot import MenuBot, AsyncMenuBot
+from game_service_bot import GameServiceBot, AsyncGameServiceBot
+from outbound_dispatcher import OutboundDispatcher, AsyncOutboundDispatcher
+from webhook_server import WebhookServer
+from call import Call
+from fake_api import FakeApi, get_free_port, create_message_update, create_callback_update
+
+TOKEN = '1:token'
+ADMIN_USER_ID = 1
+PLAYER_USER_ID = 5
+
+
+def create_handler(transport: str, webhook_server: WebhookServer = None):
+    if transport == 'asyncio':
+        bot = AsyncTeleBot(TOKEN)
+        chat_bot = AsyncChatBot(bot, AsyncOutboundDispatcher(8, 1000, 1000, 1000))
+        return AsyncQueryHandler(bot, AsyncMenuBot(chat_bot), AsyncGameService(AsyncGameServiceBot(chat_bot)),
+                                 ADMIN_USER_ID, webhook_server)
+    bot = TeleBot(TOKEN)
+    chat_bot = ChatBot(bot, OutboundDispatcher(8, 1000, 1000, 1000))
+    return QueryHandler(bot, MenuBot(chat_bot), GameService(GameServiceBot(chat_bot), 4), 2, 2, ADMIN_USER_ID,
+                        webhook_server)
+
+
+def get_edits(api: FakeApi, chat_id: int) -> list:    # Params of edits of the chat messages
+    return [params for _, params in api.get_calls('editMessageText') if int(params['chat_id']) == chat_id]
+
+
+def get_game_id(edit: dict) -> str:    # Of the game keyboard in the edit, None if there is no game keyboard
+    if not edit.get('reply_markup'):
+        return None
+    for row in json.loads(edit['reply_markup'])['inline_keyboard']:
+        for button in row:
+            game_id = Call.decode(button['callback_data'])[1].get('game-id')
+            if game_id is not None:
+                return game_id
+    return None
+
+
+@pytest.mark.parametrize('transport, uses_webhook', [('threads', False), ('asyncio', False),
+                                                     ('threads', True), ('asyncio', True)])
+def test_handler_plays_memory_and_stops(fake_api: FakeApi, transport: str, uses_webhook: bool):
+    webhook_server = WebhookServer('127.0.0.1', get_free_port(), secret_token='secret') if uses_webhook else None
+
+    def post_update(update: dict):
+        if webhook_server is None:
+            fake_api.push_update(update)
+            return
+        request = urllib.request.Request(f'http://127.0.0.1:{webhook_server.port}/',
+                                         data=json.dumps(dict(update, update_id=1)).encode(),
+                                         headers={'Content-Type': 'application/json',
+                                                  WebhookServer.SECRET_TOKEN_HEADER: 'secret'})
+        for _ in range(50):    # The server may be starting
+            try:
+                assert urllib.request.urlopen(request).status == 200
+                return
+            except urllib.error.URLError:
+                time.sleep(0.1)
+        raise ConnectionError('Webhook server is not available.')
+
+    handler = create_handler(transport, webhook_server)
+    thread = Thread(target=handler.start)
+    thread.start()
+    post_update(create_message_update(PLAYER_USER_ID, '/start'))
+    assert fake_api.wait_for(lambda api: any(int(params['chat_id']) == PLAYER_USER_ID
+                                             for _, params in api.get_calls('sendMessage')))
+
+    post_update(create_callback_update(PLAYER_USER_ID,
+                                       'connecting:action=connect,game-key=memory,w=4,h=3,variety=6', 77))
+    assert fake_api.wait_for(lambda api: any(get_game_id(edit) for edit in get_edits(api, PLAYER_USER_ID)))
+    game_id = next(get_game_id(edit) for edit in get_edits(fake_api, PLAYER_USER_ID) if get_game_id(edit))
+    edit_count = len(get_edits(fake_api, PLAYER_USER_ID))
+    post_update(create_callback_update(PLAYER_USER_ID, f'game:action=click,game-id={game_id},a=0,b=0',
+                                       77))    # Reveals a card
+    assert fake_api.wait_for(lambda api: len(get_edits(api, PLAYER_USER_ID)) > edit_count)
+
+    post_update(create_callback_update(ADMIN_USER_ID, 'admin:action=stop-server', 10))
+    thread.join(20)
+    assert not thread.is_alive()
+    assert len(fake_api.get_calls('answerCallbackQuery')) == 3
+    assert [int(params['message_id']) for _, params in fake_api.get_calls('deleteMessage')] == [77]    # Canceled game
+    if uses_webhook:
+        assert not len(fake_api.get_calls('getUpdates'))
@@ -0,0 +1,101 @@
+import json
+import time
+import http.client
+import urllib.error
+import urllib.request
+from threading import Thread
+
+import pytest
+
+from webhook_server import WebhookServer
+from fake_api import get_free_port, wait_until, create_message_update, create_callback_update
+
+SECRET_TOKEN = 'secret'
+
+
+class Listeners:
+    def __init__(self):
+        self.messages = []
+        self.callback_queries = []
+
+
+@pytest.fixture
+def listeners() -> Listeners:
+    return Listeners()
+
+
+@pytest.fixture
+def server(listeners: Listeners) -> WebhookServer:    # Running webhook server passing updates to the listeners
+    server = WebhookServer('127.0.0.1', get_free_port(), secret_token=SECRET_TOKEN)
+    thread = Thread(target=server.serve, args=(listeners.messages.extend, listeners.callback_queries.append))
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def post(server: WebhookServer, body: bytes, secret_token: str = SECRET_TOKEN) -> int:    # Returns the status
+    headers = {'Content-Type': 'application/json'}
+    if secret_token is not None:
+        headers[WebhookServer.SECRET_TOKEN_HEADER] = secret_token
+    request = urllib.request.Request(f'http://127.0.0.1:{server.port}/', data=body, headers=headers)
+    for _ in range(50):    # The server may be starting
+        try:
+            return urllib.request.urlopen(request).status
+        except urllib.error.HTTPError as error:
+            return error.code
+        except urllib.error.URLError:
+            time.sleep(0.1)
+    raise ConnectionError('Webhook server is not available.')
+
+
+def encode_update(update: dict) -> bytes:
+    return json.dumps(dict(update, update_id=1)).encode()
+
+
+@pytest.mark.parametrize('secret_token', [None, 'wrong'])
+def test_update_without_secret_token_is_rejected(server: WebhookServer, listeners: Listeners, secret_token: str):
+    assert post(server, encode_update(create_message_update(5, '/start')), secret_token) == 403
+    assert post(server, encode_update(create_message_update(5, '/games'))) == 200
+    assert wait_until(lambda: len(listeners.messages))
+    assert [message.text for message in listeners.messages] == ['/games']
+
+
+def test_bad_body_is_rejected(server: WebhookServer, listeners: Listeners, logger):
+    assert post(server, b'{not json') == 400
+    assert post(server, b'') == 400
+    assert listeners.messages == [] and listeners.callback_queries == []
+    assert logger.log_count == 2
+
+
+@pytest.mark.parametrize('content_length', ['abc', '-1'])
+def test_bad_content_length_is_rejected(server: WebhookServer, listeners: Listeners, content_length: str):
+    connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+    connection.putrequest('POST', '/')
+    connection.putheader(WebhookServer.SECRET_TOKEN_HEADER, SECRET_TOKEN)
+    connection.putheader('Content-Length', content_length)
+    connection.endheaders(encode_update(create_message_update(5, '/start')))
+    assert connection.getresponse().status == 400
+    connection.close()
+    assert listeners.messages == []
+
+
+def test_busy_port_fails_on_creation(server: WebhookServer):
+    with pytest.raises(OSError):
+        WebhookServer('127.0.0.1', server.port)
+
+
+def test_server_shut_down_before_serving_does_not_serve():
+    server = WebhookServer('127.0.0.1', 0)
+    server.shutdown()    # Doesn't wait for serving
+    server.serve(None, None)    # Returns at once
+    WebhookServer('127.0.0.1', server.port).shutdown()    # The port is released
+
+
+def test_valid_updates_are_passed_to_listeners(server: WebhookServer, listeners: Listeners):
+    assert post(server, encode_update(create_message_update(5, '/start'))) == 200
+    assert post(server, encode_update(create_callback_update(5, 'admin:action=load-logs', 10))) == 200
+    assert wait_until(lambda: len(listeners.messages) and len(listeners.callback_queries))
+    assert [message.text for message in listeners.messages] == ['/start']
+    assert [callback_query.data for callback_query in listeners.callback_queries] == ['admin:action=load-logs']
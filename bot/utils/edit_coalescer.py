@@ -0,0 +1,81 @@
+import time
+from threading import Condition
+
+
+class EditCoalescer:
+    """
+    Thread-safe latest-wins storage of pending message edits.
+    An edit is due [window] seconds after the first pending edit of its key is added.
+    Newer edits of a pending key replace the older one.
+    A key is not due while the previous edit of this key is being sent.
+    """
+
+    def __init__(self, window: float):
+        self._window = window
+        self._condition = Condition()
+        self._pending = dict()    # Dict: [key] = [float due_time, edit]
+        self._in_flight = set()
+        self._coalesced_count = 0
+
+    @property
+    def coalesced_count(self) -> int:
+        return self._coalesced_count
+
+    def put(self, key, edit):
+        with self._condition:
+            if key in self._pending:
+                self._pending[key][1] = edit
+                self._coalesced_count += 1
+            else:
+                self._pending[key] = [time.monotonic() + self._window, edit]
+                self._condition.notify_all()
+
+    def discard(self, key):
+        with self._condition:
+            if self._pending.pop(key, None) is not None:
+                self._condition.notify_all()
+
+    def wait_due(self) -> list:
+        """
+        Blocks until some edits are due and marks them as being sent.
+        Returns list of (key, edit).
+        """
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                due, next_due_time = [], None
+                for key in self._pending:
+                    if key in self._in_flight:
+                        continue
+                    due_time = self._pending[key][0]
+                    if due_time <= now:
+                        due.append(key)
+                    elif next_due_time is None or due_time < next_due_time:
+                        next_due_time = due_time
+                if len(due):
+                    self._in_flight.update(due)
+                    return [(key, self._pending.pop(key)[1]) for key in due]
+                self._condition.wait(None if next_due_time is None else next_due_time - now)
+
+    def take(self, match) -> list:
+        """
+        Blocks while edits of keys matching [match] are being sent,
+        then marks pending edits of such keys as being sent regardless of their due time.
+        Returns list of (key, edit).
+        """
+        with self._condition:
+            while any(match(key) for key in self._in_flight):
+                self._condition.wait()
+            taken = [key for key in self._pending if match(key)]
+            self._in_flight.update(taken)
+            return [(key, self._pending.pop(key)[1]) for key in taken]
+
+    def report_sent(self, key):
+        with self._condition:
+            self._in_flight.discard(key)
+            self._condition.notify_all()
+
+    def wait_empty(self):
+        with self._condition:
+            while len(self._pending) or len(self._in_flight):
+                self._condition.wait()
@@ -0,0 +1,39 @@
+from threading import Lock
+from collections import OrderedDict
+
+
+class FingerprintCache:
+    """
+    Thread-safe storage of the last rendered state fingerprint of every message.
+    Least recently updated fingerprints are evicted when [max_size] is reached.
+    """
+
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._fingerprints = OrderedDict()    # Dict: [key] = int fingerprint
+        self._lock = Lock()
+        self._skipped_count = 0
+
+    @property
+    def skipped_count(self) -> int:
+        return self._skipped_count
+
+    @staticmethod
+    def get_fingerprint(text: str, reply_markup) -> int:
+        return hash((text, None if reply_markup is None else reply_markup.to_json()))
+
+    def try_update(self, key, fingerprint: int) -> bool:    # Returns False if the fingerprint is not changed
+        with self._lock:
+            if self._fingerprints.get(key) == fingerprint:
+                self._fingerprints.move_to_end(key)
+                self._skipped_count += 1
+                return False
+            self._fingerprints[key] = fingerprint
+            self._fingerprints.move_to_end(key)
+            if len(self._fingerprints) > self._max_size:
+                self._fingerprints.popitem(last=False)
+            return True
+
+    def remove(self, key):
+        with self._lock:
+            self._fingerprints.pop(key, None)
@@ -15,6 +15,8 @@ class ConsoleColors:
 
 
 class LogReport:
+    __slots__ = ('text', 'count', 'creation_time')
+
     def __init__(self, logs: list):
         self.text = '\n'.join([str(log) for log in logs])
         self.count = len(logs)
@@ -28,6 +30,8 @@ class LogReport:
 class Log:
     message_color = ConsoleColors.DEFAULT
 
+    __slots__ = ('message', 'kwargs', 'creation_time', 'time_format')
+
     def __init__(self, message: str = None, **kwargs):
         self.message = '' if message is None else message
         self.kwargs = kwargs
@@ -48,6 +52,8 @@ class Log:
 class CriticalLog(Log):
     message_color = ConsoleColors.RED
 
+    __slots__ = ()
+
     def __init__(self, message: str, **kwargs):
         super().__init__(message, **kwargs)
 
@@ -55,9 +61,14 @@ class CriticalLog(Log):
 class ExceptionLog(Log):
     message_color = ConsoleColors.YELLOW
 
+    __slots__ = ('exception',)
+
     def __init__(self, exception: Exception, func_name: str = None, show_call_stack: bool = False):
         self.exception = exception
         traceback = exception.__traceback__
+        if traceback is None:    # Not raised in this process, like exceptions passed back from worker processes
+            super().__init__(f'[{type(exception).__name__}]  {str(exception)}   /   {func_name}')
+            return
         while traceback.tb_next is not None:
             traceback = traceback.tb_next
         tb_frame = traceback.tb_frame
@@ -79,11 +90,15 @@ class ExceptionLog(Log):
 class WarningLog(Log):
     message_color = ConsoleColors.PINK
 
+    __slots__ = ()
+
     def __init__(self, message, **kwargs):
         super().__init__(message, **kwargs)
 
 
 class InfoLog(Log):
+    __slots__ = ()
+
     def __init__(self, message: str = None, **kwargs):
         super().__init__(message, **kwargs)
 
@@ -91,5 +106,7 @@ class InfoLog(Log):
 class DebugLog(Log):
     message_color = ConsoleColors.BLUE
 
+    __slots__ = ()
+
     def __init__(self, message: str = None, **kwargs):
         super().__init__(message, **kwargs)
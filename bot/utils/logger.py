@@ -1,3 +1,4 @@
+from inspect import iscoroutinefunction
 from threading import Lock
 from utils.log_types import LogReport, Log, ExceptionLog
 
@@ -56,6 +57,14 @@ class StaticLogger:
 
     @staticmethod
     def exception_logged(func):    # Decorator
+        if iscoroutinefunction(func):
+            async def execute_and_log_async(*args, **kwargs):
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as exception:
+                    StaticLogger.logger.add_log(ExceptionLog(exception, func_name=func.__qualname__))
+            return execute_and_log_async
+
         def execute_and_log(*args, **kwargs):
             try:
                 return func(*args, **kwargs)
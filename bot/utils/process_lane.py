@@ -0,0 +1,48 @@
+import multiprocessing
+from threading import Lock
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+
+class ProcessLane:
+    """
+    Performs CPU-heavy actions in up to [max_workers] separate processes, so they don't hold the GIL of I/O threads.
+    Actions must be module-level functions, their arguments and results must be picklable.
+    If a worker process dies, actions in progress fail with BrokenProcessPool and the next ones get new workers.
+    """
+
+    def __init__(self, max_workers: int):
+        self._max_workers = max_workers
+        self._executor = self._create_executor()
+        self._futures_lock = Lock()
+        self._futures = set()    # Of actions not done yet
+        self._is_shut_down = False
+
+    def submit(self, function, *args) -> Future:
+        with self._futures_lock:
+            if self._is_shut_down:
+                raise RuntimeError('Process lane is shut down')
+            try:
+                future = self._executor.submit(function, *args)
+            except BrokenProcessPool:
+                self._executor.shutdown(wait=False)
+                self._executor = self._create_executor()
+                future = self._executor.submit(function, *args)
+            self._futures.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def shutdown(self):    # Pending actions are cancelled, running ones are waited for
+        with self._futures_lock:
+            self._is_shut_down = True
+            futures = list(self._futures)
+        for future in futures:    # Executor.shutdown has no cancel_futures before Python 3.9
+            future.cancel()
+        self._executor.shutdown(wait=True)
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(self._max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _discard(self, future: Future):
+        with self._futures_lock:
+            self._futures.discard(future)
@@ -28,6 +28,10 @@ class SingleAccessDict:
                 self._items[value.uid] = value
                 self._item_locks[value.uid] = Lock()
 
+    def get(self, key: str):    # Non-blocking, the item is not acquired
+        with self._storage_lock:
+            return self._items.get(key)
+
     def contains(self, key: str) -> bool:    # TODO: Remove
         with self._storage_lock:
             return key in self._items
@@ -0,0 +1,91 @@
+import time
+import asyncio
+from heapq import heappush, heappop
+from threading import Thread, Condition
+
+from utils.logger import StaticLogger
+
+
+class Timer:
+    __slots__ = ('deadline', 'callback', 'args', 'is_canceled')
+
+    def __init__(self, deadline: float, callback, args: tuple):
+        self.deadline = deadline    # time.monotonic() value
+        self.callback = callback
+        self.args = args
+        self.is_canceled = False
+
+    def cancel(self):
+        self.is_canceled = True
+
+
+class TimerService:
+    """
+    Calls callbacks at their deadlines from a single thread, timers are kept in a heap by deadline.
+    Canceled timers are dropped when they come up. Callbacks must be short, longer work has to be passed on.
+    """
+
+    def __init__(self):
+        self._timers = []    # Heap of (float deadline, int number, Timer timer)
+        self._condition = Condition()
+        self._counter = 0
+        self._is_active = False
+
+    def start(self):
+        with self._condition:
+            self._is_active = True
+        Thread(target=self._run_forever, daemon=True).start()
+
+    def stop(self):    # Pending timers are dropped
+        with self._condition:
+            self._is_active = False
+            self._timers.clear()
+            self._condition.notify()
+
+    def schedule(self, delay: float, callback, *args) -> Timer:
+        timer = Timer(time.monotonic() + delay, callback, args)
+        with self._condition:
+            self._counter += 1
+            heappush(self._timers, (timer.deadline, self._counter, timer))
+            if self._timers[0][2] is timer:    # The thread may wait for a later deadline
+                self._condition.notify()
+        return timer
+
+    def _run_forever(self):
+        while True:
+            with self._condition:
+                while self._is_active and not (len(self._timers) and self._timers[0][0] <= time.monotonic()):
+                    self._condition.wait(self._timers[0][0] - time.monotonic() if len(self._timers) else None)
+                if not self._is_active:
+                    break
+                timer = heappop(self._timers)[2]
+            if not timer.is_canceled:
+                self._call(timer)
+
+    @staticmethod
+    @StaticLogger.exception_logged
+    def _call(timer: Timer):
+        timer.callback(*timer.args)
+
+
+class AsyncTimerService:
+    """
+    Coroutine variant of TimerService, timers are kept by the running event loop.
+    """
+
+    def __init__(self):
+        self._is_active = False
+
+    def start(self):
+        self._is_active = True
+
+    def stop(self):    # Pending timers are dropped
+        self._is_active = False
+
+    def schedule(self, delay: float, callback, *args) -> asyncio.TimerHandle:
+        return asyncio.get_running_loop().call_later(delay, self._call, callback, args)
+
+    @StaticLogger.exception_logged
+    def _call(self, callback, args: tuple):
+        if self._is_active:
+            callback(*args)
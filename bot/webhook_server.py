@@ -0,0 +1,93 @@
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Lock
+from telebot.types import Update
+
+from utils.logger import StaticLogger
+
+
+class WebhookServer:
+    """
+    Built-in HTTP server receiving Telegram updates instead of long polling.
+    Parsed updates are passed to the listeners, the request is answered without waiting for their handling.
+    The port is bound on creation, so a busy port fails before the bot starts anything else.
+    """
+
+    SECRET_TOKEN_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+    def __init__(self, host: str, port: int, url: str = None, secret_token: str = None):
+        self.host = host
+        self.url = url    # Public url registered with setWebhook, no registration if not specified
+        self.secret_token = secret_token
+        self._update_listener = None
+        self._callback_listener = None
+        self._server = ThreadingHTTPServer((host, port), self._create_request_handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]    # The bound one if 0 is passed
+        self._state_lock = Lock()
+        self._is_serving = False
+        self._is_shut_down = False
+
+    def serve(self, update_listener, callback_listener):
+        """
+        Blocks until shutdown, returns at once if the server is already shut down.
+        update_listener receives a list of messages, callback_listener receives a callback query.
+        """
+        with self._state_lock:
+            if self._is_shut_down:
+                return
+            self._update_listener, self._callback_listener = update_listener, callback_listener
+            self._is_serving = True
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def shutdown(self):    # The port is released at once if the server is not serving
+        with self._state_lock:
+            if self._is_shut_down:
+                return
+            self._is_shut_down = True
+            is_serving = self._is_serving
+        if is_serving:
+            self._server.shutdown()
+        else:
+            self._server.server_close()
+
+    def _create_request_handler(self):
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if server.secret_token is not None \
+                        and self.headers.get(WebhookServer.SECRET_TOKEN_HEADER) != server.secret_token:
+                    self._reply(HTTPStatus.FORBIDDEN)
+                    return
+                length = self.headers.get('Content-Length', '0')
+                if not length.isdecimal():
+                    self._reply(HTTPStatus.BAD_REQUEST)
+                    return
+                update = server.parse_update(self.rfile.read(int(length)))
+                if update is None:
+                    self._reply(HTTPStatus.BAD_REQUEST)
+                    return
+                self._reply(HTTPStatus.OK)
+                if update.message is not None:
+                    server._update_listener([update.message])
+                if update.callback_query is not None:
+                    server._callback_listener(update.callback_query)
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: HTTPStatus):
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+        return RequestHandler
+
+    @staticmethod
+    @StaticLogger.exception_logged
+    def parse_update(body: bytes) -> Update:
+        return Update.de_json(body.decode('utf-8'))